@@ -1,275 +1,648 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import Optional
+from pydantic import ValidationError
 from api.models.user import UserCreate, UserLogin, UserUpdate
 from api.models.exercise import WorkoutLog, ExerciseAction, ExerciseCreate, WorkoutUpdate
 from api.models.nutrition import NutritionLog, NutritionUpdate
-from api.models.coach import CoachRequest, OneRMRequest, LogUpdate
-from utils.database import DatabaseManager
+from api.models.coach import CoachRequest, OneRMRequest, OneRMBatchRequest, LogUpdate
+from utils.database import DatabaseManager, DASHBOARD_FIELDS
+from utils.async_database import AsyncDatabaseManager
+from utils.coach import build_report, TREND_WINDOW
+from utils.analysis import chart_series, CHART_RESOLUTIONS
+from utils.strength import estimate_1rm, training_zones, MAX_REPS
+from utils.cache import LRUCache
+from utils.auth import hash_password, verify_password, needs_rehash
+from utils.tokens import TokenManager
+from utils.leaderboard import PercentileIndex, band_of, band_label
+from utils.catalog import ExerciseCatalog
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
+import numpy as np
+import asyncio
+import json
+import multiprocessing
+import os
 
 app = FastAPI()
-db = DatabaseManager()
+db = DatabaseManager(os.getenv("DB_PATH", "data/fitai.db"), csv_dir=os.getenv("CSV_DIR", "data/csv_backups/"))
+adb = AsyncDatabaseManager(db)
+# Coach reports keyed by (user_id, data version); any write to the user's data bumps the version
+report_cache = LRUCache(maxsize=1024, ttl=600)
+# scrypt is CPU-bound: run it in worker processes so logins neither block the
+# event loop nor serialize on the GIL. Workers start on first use.
+auth_pool = ProcessPoolExecutor(max_workers=int(os.getenv("AUTH_WORKERS", os.cpu_count() or 2)),
+                                mp_context=multiprocessing.get_context("spawn"))
+
+async def in_auth_pool(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(auth_pool, fn, *args)
+
+# Signed session tokens; set TOKEN_SECRET so tokens survive restarts and work across workers
+tokens = TokenManager(os.getenv("TOKEN_SECRET"), ttl=int(os.getenv("TOKEN_TTL", 86400)))
+# Profiles for /me, keyed by user_id; admin writes to a user drop its entry
+profile_cache = LRUCache(maxsize=4096, ttl=300)
+# Cross-user percentiles by exercise and bodyweight/age band; built on first use, then synced per request
+percentiles = PercentileIndex(db)
+# In-memory exercise catalog with a ranked search; reloaded when catalog_version moves
+catalog = ExerciseCatalog(db)
+
+def bearer_token(authorization: Optional[str]):
+    if authorization and authorization.startswith("Bearer "):
+        return authorization[7:]
+    return None
+
+async def current_user(authorization: Optional[str] = Header(None)):
+    """Verifies the Bearer token from the signature alone (no DB hit) and returns its claims."""
+    claims = tokens.verify(bearer_token(authorization))
+    if claims is None:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    return claims
+
+def can_access(claims, user_id):
+    """Users may only read and write their own data; admins may act on anyone's."""
+    return claims["uid"] == user_id or bool(claims.get("adm"))
+
+def authorize(claims, user_id):
+    if not can_access(claims, user_id):
+        raise HTTPException(status_code=403, detail="Not allowed to access another user's data")
+
+async def owner_or_admin(user_id: int, claims: dict = Depends(current_user)):
+    """Dependency for routes with a {user_id} path parameter."""
+    authorize(claims, user_id)
+    return claims
+
+async def require_admin(claims: dict = Depends(current_user)):
+    if not claims.get("adm"):
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return claims
+
+def ndjson_response(rows):
+    """Streams an iterator of dicts as newline-delimited JSON without materializing it."""
+    def encode():
+        for row in rows:
+            yield json.dumps(row) + "\n"
+    return StreamingResponse(encode(), media_type="application/x-ndjson")
 
 # --- AUTHENTICATION ---
 @app.post("/auth/login")
-def login(data: UserLogin):
+async def login(data: UserLogin):
     try:
-        user = db.get_user(data.username, data.password)
-        if not user:
+        user = await adb.get_user_record(data.username)
+        if not user or not await in_auth_pool(verify_password, user[2], data.password):
             raise HTTPException(status_code=401, detail="Invalid credentials")
-        return {
+        if needs_rehash(user[2]):
+            await adb.update_password_hash(user[0], await in_auth_pool(hash_password, data.password))
+        profile = {
             "id": user[0], "username": user[1], "age": user[3],
             "height": user[4], "weight": user[5], "goal": user[6],
             "frequency": user[7], "is_admin": user[8]
         }
+        profile_cache.put(user[0], profile)
+        return {**profile, "token": tokens.issue(user[0], user[8])}
     except HTTPException:
         raise
     except Exception:
         raise HTTPException(status_code=500, detail="Failed to process login request.")
 
+@app.post("/auth/logout")
+async def logout(authorization: Optional[str] = Header(None), claims: dict = Depends(current_user)):
+    tokens.revoke(bearer_token(authorization))
+    return {"status": "logged out"}
+
+@app.get("/me")
+async def me(claims: dict = Depends(current_user)):
+    try:
+        profile = profile_cache.get(claims["uid"])
+        if profile is None:
+            profile = await adb.get_user_profile(claims["uid"])
+            if profile is None:
+                raise HTTPException(status_code=404, detail="User not found")
+            profile_cache.put(claims["uid"], profile)
+        # Versions are read fresh (primary-key lookups): clients key their caches on them
+        return {**profile, "data_version": await adb.get_data_version(claims["uid"]),
+                "catalog_version": await adb.get_catalog_version()}
+    except HTTPException:
+        raise
+    except Exception:
+        raise HTTPException(status_code=500, detail="Failed to load profile.")
+
 @app.post("/auth/register")
-def register(u: UserCreate):
+async def register(u: UserCreate):
     try:
-        return db.add_user(u.username, u.password, u.age, u.height, u.weight, u.goal, u.frequency, u.is_admin)
+        hashed = await in_auth_pool(hash_password, u.password)
+        # Public sign-up never creates admins; they are promoted from the admin panel
+        return await adb.add_user(u.username, u.password, u.age, u.height, u.weight, u.goal, u.frequency, 0,
+                                  password_hash=hashed)
     except Exception:
         raise HTTPException(status_code=500, detail="Failed to register user.")
 
 # --- DATA RETRIEVAL ---
-@app.get("/data/stats/{user_id}")
-def get_stats(user_id: int):
+@app.get("/data/stats/{user_id}", dependencies=[Depends(owner_or_admin)])
+async def get_stats(user_id: int, after_id: Optional[int] = None, since: Optional[str] = None, until: Optional[str] = None,
+                    limit: Optional[int] = Query(None, ge=1, le=10000), format: str = "json"):
     try:
-        df = db.get_user_stats(user_id)
-        return df.to_dict(orient="records")
+        if format == "ndjson":
+            return ndjson_response(db.iter_user_stats(user_id, after_id, since, until, limit))
+        return await adb.get_user_stats(user_id, as_frame=False, after_id=after_id, since=since, until=until, limit=limit)
     except Exception:
         raise HTTPException(status_code=500, detail="Failed to fetch stats data.")
 
-@app.get("/data/nutrition/{user_id}")
-def get_nutri(user_id: int):
+@app.get("/data/version/{user_id}", dependencies=[Depends(owner_or_admin)])
+async def get_version(user_id: int):
+    """The user's data version (bumped by every write to their logs), for clients caching their pages."""
     try:
-        df = db.get_daily_nutrition_summary(user_id)
-        return df.to_dict(orient="records")
+        return {"data_version": await adb.get_data_version(user_id)}
+    except Exception:
+        raise HTTPException(status_code=500, detail="Failed to fetch data version.")
+
+@app.get("/data/nutrition/{user_id}", dependencies=[Depends(owner_or_admin)])
+async def get_nutri(user_id: int, after: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None,
+                    limit: Optional[int] = Query(None, ge=1, le=10000), format: str = "json"):
+    try:
+        if format == "ndjson":
+            return ndjson_response(db.iter_daily_nutrition_summary(user_id, after, since, until, limit))
+        return await adb.get_daily_nutrition_summary(user_id, as_frame=False, after=after, since=since, until=until, limit=limit)
     except Exception:
         raise HTTPException(status_code=500, detail="Failed to fetch nutrition data.")
 
+# Chart shapes: time column, plotted values, per-period aggregate, group column
+CHART_SERIES = {
+    "stats": ("updated_at", ["pr"], "max", "name"),
+    "nutrition": ("date", ["total_calories", "total_protein"], "mean", None),
+}
+
+def series_columns(series, rows, resolution, points):
+    """Column-oriented chart data reduced to `resolution` (see utils.analysis.chart_series)."""
+    time_col, value_cols, how, by = CHART_SERIES[series]
+    df = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(rows)
+    return chart_series(df, time_col, value_cols, resolution, points, by=by, how=how).to_dict(orient="list")
+
+@app.get("/analytics/{series}/{user_id}", dependencies=[Depends(owner_or_admin)])
+async def analytics_series(series: str, user_id: int, resolution: str = "lttb", points: int = Query(300, ge=3, le=10000),
+                           since: Optional[str] = None, until: Optional[str] = None):
+    """Chart-ready stats or nutrition series: weekly/monthly aggregates or LTTB-downsampled to `points` per exercise."""
+    try:
+        if series not in CHART_SERIES:
+            raise HTTPException(status_code=404, detail="Unknown series")
+        if resolution not in CHART_RESOLUTIONS:
+            raise HTTPException(status_code=400, detail=f"resolution must be one of: {', '.join(CHART_RESOLUTIONS)}")
+        # Frames keep their columns when empty, so an empty series still has every key
+        if series == "stats":
+            rows = await adb.get_user_stats(user_id, since=since, until=until)
+        else:
+            rows = await adb.get_daily_nutrition_summary(user_id, since=since, until=until)
+        return await adb.run(series_columns, series, rows, resolution, points)
+    except HTTPException:
+        raise
+    except Exception:
+        raise HTTPException(status_code=500, detail="Failed to build chart series.")
+
+@app.get("/dashboard/{user_id}", dependencies=[Depends(owner_or_admin)])
+async def dashboard(user_id: int, fields: Optional[str] = None, points: Optional[int] = Query(None, ge=3, le=10000)):
+    """
+    First-render data for the program/analytics view in one round trip.
+    - fields: comma-separated subset of DASHBOARD_FIELDS
+    - points: LTTB-downsample the chart series to this many points per exercise
+    """
+    try:
+        wanted = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+        unknown = set(wanted or ()) - set(DASHBOARD_FIELDS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        result = await adb.get_dashboard(user_id, wanted)
+        if result is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        if points:
+            for series in ("stats", "nutrition"):
+                if f"{series}_series" in result:
+                    result[f"{series}_series"] = await adb.run(series_columns, series, result[f"{series}_series"], "lttb", points)
+        return result
+    except HTTPException:
+        raise
+    except Exception:
+        raise HTTPException(status_code=500, detail="Failed to build dashboard.")
+
 @app.get("/exercises/all")
-def all_ex():
+async def all_ex():
     try:
-        return db.get_exercises().to_dict(orient="records")
+        await adb.run(catalog.sync)
+        return catalog.all()
     except Exception:
         raise HTTPException(status_code=500, detail="Failed to fetch exercise list.")
 
-@app.get("/exercises/user/{user_id}")
-def user_ex(user_id: int):
+@app.get("/exercises/search")
+async def search_ex(q: str = "", limit: int = Query(20, ge=1, le=100)):
+    try:
+        await adb.run(catalog.sync)
+        return catalog.search(q, limit)
+    except Exception:
+        raise HTTPException(status_code=500, detail="Failed to search exercises.")
+
+@app.get("/exercises/user/{user_id}", dependencies=[Depends(owner_or_admin)])
+async def user_ex(user_id: int):
     try:
-        return db.get_user_exercises(user_id).to_dict(orient="records")
+        return await adb.get_user_exercises(user_id, as_frame=False)
     except Exception:
         raise HTTPException(status_code=500, detail="Failed to fetch user exercises.")
 
 # --- LOGGING & ACTIONS ---
 @app.post("/log/workout")
-def log_work(d: WorkoutLog):
+async def log_work(d: WorkoutLog, claims: dict = Depends(current_user)):
     try:
-        return db.update_stat(d.user_id, d.exercise_id, d.weight, d.reps, d.date)
+        authorize(claims, d.user_id)
+        return await adb.update_stat(d.user_id, d.exercise_id, d.weight, d.reps, d.date)
+    except HTTPException:
+        raise
     except Exception:
         raise HTTPException(status_code=500, detail="Failed to log workout.")
 
 @app.post("/log/nutrition")
-def log_nutri(d: NutritionLog):
+async def log_nutri(d: NutritionLog, claims: dict = Depends(current_user)):
     try:
-        return db.add_nutrition_log(d.user_id, d.calories, d.protein, d.date)
+        authorize(claims, d.user_id)
+        return await adb.add_nutrition_log(d.user_id, d.calories, d.protein, d.date)
+    except HTTPException:
+        raise
     except Exception:
         raise HTTPException(status_code=500, detail="Failed to log nutrition.")
 
+# --- BULK INGESTION ---
+INGEST_CHUNK = 5000
+# Validation errors reported in detail per upload; the rest are only counted
+INGEST_MAX_ERRORS = 1000
+
+def parse_line(line):
+    # A malformed line is passed through as text so it fails validation as a per-row error
+    try:
+        return json.loads(line)
+    except ValueError:
+        return line.decode(errors="replace")
+
+async def read_batch(request: Request):
+    """Yields raw items from a JSON array body, or line by line from an NDJSON body."""
+    if "ndjson" in request.headers.get("content-type", ""):
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield parse_line(line)
+        if buffer.strip():
+            yield parse_line(buffer)
+    else:
+        body = await request.json()
+        if not isinstance(body, list):
+            raise HTTPException(status_code=422, detail="Expected a JSON array of log entries.")
+        for item in body:
+            yield item
+
+async def ingest_batch(request, claims, model, to_row, insert_bulk):
+    """
+    Validates every item against `model`, inserts the valid ones with executemany
+    (one transaction for a JSON array, one per INGEST_CHUNK rows for NDJSON) and
+    returns counts, the inserted rows as runs of consecutive indexes/ids and the
+    first INGEST_MAX_ERRORS validation errors, so the response stays small
+    however large the upload is. Rows for users the token may not write to are
+    rejected like invalid ones.
+    """
+    ranges, errors, pending = [], [], []
+    failed = 0
+
+    async def flush():
+        ids = await insert_bulk([row for _, row in pending])
+        for (i, _), row_id in zip(pending, ids):
+            last = ranges[-1] if ranges else None
+            if last and last["end_index"] == i - 1 and last["last_id"] == row_id - 1:
+                last["end_index"], last["last_id"] = i, row_id
+            else:
+                ranges.append({"start_index": i, "end_index": i, "first_id": row_id, "last_id": row_id})
+        pending.clear()
+
+    index = 0
+    streaming = "ndjson" in request.headers.get("content-type", "")
+    async for item in read_batch(request):
+        try:
+            d = model.model_validate(item)
+            detail = None if can_access(claims, d.user_id) else "Not allowed to log data for another user"
+        except ValidationError as e:
+            detail = e.errors(include_url=False, include_context=False)
+        if detail is None:
+            pending.append((index, to_row(d)))
+        else:
+            failed += 1
+            if len(errors) < INGEST_MAX_ERRORS:
+                errors.append({"index": index, "detail": detail})
+        index += 1
+        if streaming and len(pending) >= INGEST_CHUNK:
+            await flush()
+    await flush()
+    inserted = sum(r["end_index"] - r["start_index"] + 1 for r in ranges)
+    return {"inserted": inserted, "failed": failed, "inserted_ranges": ranges,
+            "errors": errors, "errors_truncated": failed > len(errors)}
+
+@app.post("/log/workout/batch")
+async def log_work_batch(request: Request, claims: dict = Depends(current_user)):
+    try:
+        return await ingest_batch(request, claims, WorkoutLog, lambda d: (d.user_id, d.exercise_id, d.weight, d.reps, d.date), adb.add_stats_bulk)
+    except HTTPException:
+        raise
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Malformed JSON in batch upload.")
+    except Exception:
+        raise HTTPException(status_code=500, detail="Failed to log workout batch.")
+
+@app.post("/log/nutrition/batch")
+async def log_nutri_batch(request: Request, claims: dict = Depends(current_user)):
+    try:
+        return await ingest_batch(request, claims, NutritionLog, lambda d: (d.user_id, d.calories, d.protein, d.date), adb.add_nutrition_bulk)
+    except HTTPException:
+        raise
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Malformed JSON in batch upload.")
+    except Exception:
+        raise HTTPException(status_code=500, detail="Failed to log nutrition batch.")
+
 @app.post("/exercises/add")
-def add_ex(d: ExerciseAction):
+async def add_ex(d: ExerciseAction, claims: dict = Depends(current_user)):
     try:
-        return db.add_user_exercise(d.user_id, d.exercise_id)
+        authorize(claims, d.user_id)
+        return await adb.add_user_exercise(d.user_id, d.exercise_id)
+    except HTTPException:
+        raise
     except Exception:
         raise HTTPException(status_code=500, detail="Failed to add exercise to user program.")
 
 @app.post("/exercises/remove")
-def rem_ex(d: ExerciseAction):
+async def rem_ex(d: ExerciseAction, claims: dict = Depends(current_user)):
     try:
-        return db.remove_user_exercise(d.user_id, d.exercise_id)
+        authorize(claims, d.user_id)
+        return await adb.remove_user_exercise(d.user_id, d.exercise_id)
+    except HTTPException:
+        raise
     except Exception:
         raise HTTPException(status_code=500, detail="Failed to remove exercise from user program.")
 
 # --- DYNAMIC AI COACH ---
+# Left as a sync route on purpose: the analysis is CPU-bound pandas work,
+# so FastAPI runs it in its threadpool instead of on the event loop.
 @app.post("/coach")
-def get_advice(data: CoachRequest):
+def get_advice(data: CoachRequest, claims: dict = Depends(current_user)):
     try:
-        advice = []
         stats_df = pd.DataFrame(data.stats) if data.stats else pd.DataFrame()
         nutri_df = pd.DataFrame(data.nutrition) if data.nutrition else pd.DataFrame()
-        goal = data.goal.lower()
-        weight = data.weight
-        age = data.age
-
-        # If there is no stats or nutrition data, return a friendly message
-        if stats_df.empty and nutri_df.empty:
-            return {
-                "report": [
-                    {
-                        "type": "info",
-                        "msg": "Not enough data yet. Log at least one workout and one meal to receive an in-depth AI analysis."
-                    }
-                ]
-            }
-
-        if weight is None or weight <= 0:
-            raise HTTPException(status_code=400, detail="Invalid weight value for analysis.")
-
-        # --- 1. BIOMETRIC & AGE ANALYSIS ---
-        if age < 25:
-            advice.append({"type": "info", "msg": "🧬 **Metabolic Profile:** At your age, your recovery capacity is peak. You can handle higher training volume (reps/sets) than older athletes."})
-        elif age > 45:
-            advice.append({"type": "warning", "msg": "🧬 **Recovery Profile:** Joint integrity and hormonal recovery take longer at 45+. Prioritize 8 hours of sleep and consider a 1:4 deload cycle (3 weeks on, 1 week light)."})
-
-        # --- 2. GLOBAL STRENGTH ASSESSMENT ---
-        if not stats_df.empty:
-            # Strength Standards (Multiplier of Bodyweight)
-            standards = {
-                "Bench Press": {"beg": 0.7, "int": 1.0, "adv": 1.5},
-                "Squat": {"beg": 1.0, "int": 1.5, "adv": 2.0},
-                "Deadlift": {"beg": 1.25, "int": 1.8, "adv": 2.5},
-                "Overhead Press": {"beg": 0.5, "int": 0.75, "adv": 1.0}
-            }
-
-            # Get latest PR for every unique exercise
-            latest_lifts = stats_df.sort_values('updated_at').groupby('name').last()
-
-            for name, row in latest_lifts.iterrows():
-                pr = row['pr']
-                ratio = pr / weight
-
-                # Check against standards if it's a major lift
-                if name in standards:
-                    std = standards[name]
-                    if ratio < std['beg']:
-                        level = "Novice"
-                        status = "info"
-                    elif ratio < std['int']:
-                        level = "Intermediate"
-                        status = "success"
-                    else:
-                        level = "Advanced/Elite"
-                        status = "strength"
-
-                    advice.append({"type": status, "msg": f"🏋️ **{name} Check:** Your {pr}kg lift is {round(ratio,2)}x BW ({level}). Focus on form and consistent loading."})
-                else:
-                    # For non-major lifts, just check the trend
-                    advice.append({"type": "info", "msg": f"💪 **{name}:** You are currently moving {pr}kg. Keep tracking to see your 4-week trend."})
-
-            # --- 3. PROGRESSION CHECK (DELTAS) ---
-            for name in stats_df['name'].unique():
-                ex_history = stats_df[stats_df['name'] == name]
-                if len(ex_history) >= 2:
-                    recent = ex_history.iloc[-1]['pr']
-                    prev = ex_history.iloc[-2]['pr']
-                    if recent > prev:
-                        advice.append({"type": "success", "msg": f"🔥 **PR Alert:** You increased your {name} by {round(recent-prev,1)}kg. This is effective 'Overload'!"})
-
-        # --- 4. NUTRITION & CALORIC JUDGMENT ---
-        if not nutri_df.empty:
-            avg_cal = nutri_df.tail(5)['total_calories'].mean()
-            avg_prot = nutri_df.tail(5)['total_protein'].mean()
-            prot_ratio = avg_prot / weight
-
-            # Caloric check based on goal
-            if goal == "bulk" and avg_cal < (weight * 34):
-                advice.append({"type": "warning", "msg": f"🍎 **Bulk Warning:** You're averaging {int(avg_cal)} kcal. For growth at {weight}kg, you need closer to {int(weight * 38)} kcal."})
-            elif goal == "cut" and avg_cal > (weight * 28):
-                advice.append({"type": "warning", "msg": f"📉 **Cut Warning:** Your calories ({int(avg_cal)}) are a bit high for fat loss. Aim for ~{int(weight * 24)} kcal."})
-
-            # Protein Floor
-            if prot_ratio < 1.6:
-                advice.append({"type": "plateau", "msg": f"🥩 **Protein Deficiency:** {round(prot_ratio,1)}g/kg is too low. To protect muscle, aim for {int(weight * 2.0)}g total protein."})
-            else:
-                advice.append({"type": "success", "msg": f"✅ **Protein Target Hit:** {round(prot_ratio,1)}g/kg is excellent for recovery."})
+        return {"report": build_report(stats_df, nutri_df, data.weight, data.age, data.goal)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception:
+        raise HTTPException(status_code=500, detail="Failed to generate coaching advice.")
 
-        return {"report": advice}
+async def strength_percentiles(user_id):
+    """The user's percentile per exercise within their bodyweight/age band (fresh on every call)."""
+    await adb.run(percentiles.sync)
+    ranks = percentiles.user_ranks(user_id)
+    names = await adb.get_names("exercises", ranks)
+    return sorted(({"exercise_id": ex_id, "name": names.get(ex_id), **rank} for ex_id, rank in ranks.items()),
+                  key=lambda p: p["name"] or "")
+
+@app.get("/coach/{user_id}", dependencies=[Depends(owner_or_admin)])
+async def get_user_advice(user_id: int):
+    """
+    Server-side report: pulls only the rows the coach needs instead of the full history.
+    Serves the batch-built report (maintenance.py coach-reports) while the user's data is unchanged.
+    Percentiles move with other users' lifts, so they are added outside the cached report.
+    """
+    try:
+        key = (user_id, await adb.get_data_version(user_id))
+        result = report_cache.get(key)
+        if result is None:
+            stored = await adb.get_coach_report(*key)
+            if stored is not None:
+                result = {"report": stored}
+            else:
+                inputs = await adb.get_coach_inputs(user_id, history=TREND_WINDOW)
+                if inputs is None:
+                    raise HTTPException(status_code=404, detail="User not found")
+                profile, stats_df, nutri_df, summary_df = inputs
+                report = await adb.run(build_report, stats_df, nutri_df, profile["weight"], profile["age"], profile["goal"], summary_df)
+                result = {"report": report}
+            report_cache.put(key, result)
+        return {**result, "percentiles": await strength_percentiles(user_id)}
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception:
         raise HTTPException(status_code=500, detail="Failed to generate coaching advice.")
 
+@app.get("/leaderboard/{exercise}")
+async def leaderboard(exercise: str, user_id: Optional[int] = None, weight: Optional[float] = Query(None, gt=0),
+                      age: Optional[int] = Query(None, gt=0), limit: int = Query(10, ge=1, le=100),
+                      claims: dict = Depends(current_user)):
+    """
+    Strongest latest lifts for an exercise (id or name).
+    - user_id: rank within that user's bodyweight/age band and include their own standing
+    - weight + age: rank within the band of that bodyweight and age
+    - neither: across all users
+    """
+    try:
+        if user_id is not None:
+            authorize(claims, user_id)
+        ex = await adb.find_exercise(exercise)
+        if ex is None:
+            raise HTTPException(status_code=404, detail="Exercise not found")
+        await adb.run(percentiles.sync)
+        band = None
+        if user_id is not None:
+            band = percentiles.band_for(user_id, ex["id"])
+            if band is None:
+                raise HTTPException(status_code=404, detail="No lift logged for this exercise")
+        elif weight is not None and age is not None:
+            band = band_of(weight, age)
+        rows, size = percentiles.top(ex["id"], band, limit)
+        names = await adb.get_names("users", [uid for _, uid, _ in rows])
+        result = {
+            "exercise_id": ex["id"], "exercise": ex["name"], "band": band_label(band) if band else None, "size": size,
+            "entries": [{"rank": i + 1, "user_id": uid, "username": names.get(uid), "pr": pr, "band": band_label(b)}
+                        for i, (pr, uid, b) in enumerate(rows)],
+        }
+        if user_id is not None:
+            result["you"] = percentiles.user_ranks(user_id).get(ex["id"])
+        return result
+    except HTTPException:
+        raise
+    except Exception:
+        raise HTTPException(status_code=500, detail="Failed to fetch leaderboard.")
+
+def float_list(values, digits=1):
+    """Rounded floats as a JSON-safe list (NaN becomes null)."""
+    values = np.round(np.asarray(values, dtype=float), digits)
+    return np.where(np.isnan(values), None, values).tolist()
+
 @app.post("/predict_1rm")
-def predict(d: OneRMRequest):
+async def predict(d: OneRMRequest):
     try:
-        if d.reps <= 0 or d.reps >= 37:
-            raise HTTPException(status_code=400, detail="Reps must be between 1 and 36 for 1RM prediction.")
-        one_rm = d.weight * (36 / (37 - d.reps)) if d.reps > 1 else d.weight
-        return {"one_rm": round(one_rm, 1)}
+        if d.reps <= 0 or d.reps > MAX_REPS:
+            raise HTTPException(status_code=400, detail=f"Reps must be between 1 and {MAX_REPS} for 1RM prediction.")
+        one_rm = round(float(estimate_1rm(d.weight, d.reps, d.formula)), 1)
+        return {"one_rm": one_rm, "zones": {zone: float(load) for zone, load in training_zones(one_rm).items()}}
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception:
         raise HTTPException(status_code=500, detail="Failed to calculate 1RM prediction.")
 
+def batch_1rm(weights, reps, formula, zones):
+    one_rm = estimate_1rm(weights, reps, formula)
+    result = {"one_rm": float_list(one_rm)}
+    if zones:
+        result["zones"] = {zone: float_list(loads) for zone, loads in training_zones(one_rm).items()}
+    return result
+
+@app.post("/predict_1rm/batch")
+async def predict_batch(d: OneRMBatchRequest):
+    """
+    Column-oriented 1RM estimates (and training zones) for arrays of lifts.
+    Rows with reps outside 1..MAX_REPS come back as null.
+    """
+    try:
+        if len(d.weights) != len(d.reps):
+            raise HTTPException(status_code=400, detail="weights and reps must have the same length.")
+        # Large column lists: skip FastAPI's per-item jsonable_encoder pass
+        return JSONResponse(await adb.run(batch_1rm, d.weights, d.reps, d.formula, d.zones))
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception:
+        raise HTTPException(status_code=500, detail="Failed to calculate 1RM predictions.")
+
+def history_1rm(stats_df, formula):
+    result = {column: stats_df[column].tolist() for column in stats_df.columns}
+    result["est_1rm"] = float_list(estimate_1rm(stats_df['pr'].to_numpy(), stats_df['reps'].to_numpy(), formula))
+    return result
+
+@app.get("/strength/bests/{user_id}", dependencies=[Depends(owner_or_admin)])
+async def personal_bests(user_id: int):
+    """Best estimated 1RM and heaviest weight per exercise (index lookups)."""
+    try:
+        return await adb.get_personal_bests(user_id, as_frame=False)
+    except Exception:
+        raise HTTPException(status_code=500, detail="Failed to fetch personal bests.")
+
+@app.get("/strength/summary/{user_id}", dependencies=[Depends(owner_or_admin)])
+async def exercise_summary(user_id: int):
+    """Latest/previous entry, count, bests and mean progression per exercise (running aggregates)."""
+    try:
+        return await adb.get_exercise_summary(user_id, as_frame=False)
+    except Exception:
+        raise HTTPException(status_code=500, detail="Failed to fetch exercise summary.")
+
+@app.get("/strength/history/{user_id}", dependencies=[Depends(owner_or_admin)])
+async def strength_history(user_id: int, formula: str = "brzycki", since: Optional[str] = None, until: Optional[str] = None):
+    """The user's workout history (column-oriented) with an estimated 1RM for every row."""
+    try:
+        stats_df = await adb.get_user_stats(user_id, since=since, until=until)
+        return JSONResponse(await adb.run(history_1rm, stats_df, formula))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception:
+        raise HTTPException(status_code=500, detail="Failed to calculate 1RM history.")
+
 # --- ADMIN PANEL ROUTES ---
-@app.get("/admin/users")
-def get_users():
+@app.get("/admin/users", dependencies=[Depends(require_admin)])
+async def get_users():
     try:
-        return db.get_all_users().to_dict(orient="records")
+        return await adb.get_all_users(as_frame=False)
     except Exception:
         raise HTTPException(status_code=500, detail="Failed to fetch users.")
 
-@app.post("/admin/promote/{user_id}")
-def promote(user_id: int):
+@app.get("/admin/pool", dependencies=[Depends(require_admin)])
+async def pool_metrics():
+    try:
+        return db.pool.metrics()
+    except Exception:
+        raise HTTPException(status_code=500, detail="Failed to fetch connection pool metrics.")
+
+@app.get("/admin/cache", dependencies=[Depends(require_admin)])
+async def cache_stats():
+    try:
+        return {"coach_reports": report_cache.stats(), "profiles": profile_cache.stats(), "percentiles": percentiles.stats(),
+                "catalog": catalog.stats()}
+    except Exception:
+        raise HTTPException(status_code=500, detail="Failed to fetch cache statistics.")
+
+@app.post("/admin/promote/{user_id}", dependencies=[Depends(require_admin)])
+async def promote(user_id: int):
     try:
-        return db.promote_user(user_id)
+        result = await adb.promote_user(user_id)
+        profile_cache.invalidate(user_id)
+        tokens.revoke_user(user_id)  # the role is in the token: sign in again to get it
+        return result
     except Exception:
         raise HTTPException(status_code=500, detail="Failed to promote user.")
 
-@app.delete("/admin/delete_user/{user_id}")
-def delete_user(user_id: int):
+@app.delete("/admin/delete_user/{user_id}", dependencies=[Depends(require_admin)])
+async def delete_user(user_id: int):
     try:
-        db.delete_user(user_id)
+        await adb.delete_user(user_id)
+        profile_cache.invalidate(user_id)
+        tokens.revoke_user(user_id)
         return {"status": "deleted"}
     except Exception:
         raise HTTPException(status_code=500, detail="Failed to delete user.")
 
-@app.put("/admin/update_user/{user_id}")
-def update_user_details(user_id: int, data: UserUpdate):
+@app.put("/admin/update_user/{user_id}", dependencies=[Depends(require_admin)])
+async def update_user_details(user_id: int, data: UserUpdate):
     try:
-        success = db.update_user_details(
+        before = await adb.get_user_profile(user_id)
+        success = await adb.update_user_details(
             user_id, data.username, data.age, data.height,
             data.weight, data.goal, data.frequency, data.is_admin
         )
         if not success:
             raise HTTPException(status_code=400, detail="Update failed")
+        profile_cache.invalidate(user_id)
+        if before is None or bool(before["is_admin"]) != bool(data.is_admin):
+            tokens.revoke_user(user_id)  # role change: tokens carry the old `adm` claim
         return {"status": "success"}
     except HTTPException:
         raise
     except Exception:
         raise HTTPException(status_code=500, detail="Failed to update user details.")
 
-@app.post("/admin/exercises/add")
-def admin_add_ex(ex: ExerciseCreate):
+@app.post("/admin/exercises/add", dependencies=[Depends(require_admin)])
+async def admin_add_ex(ex: ExerciseCreate):
     try:
-        db.add_master_exercise(ex.name, ex.muscle_group)
+        await adb.add_master_exercise(ex.name, ex.muscle_group)
         return {"status": "added"}
     except Exception:
         raise HTTPException(status_code=500, detail="Failed to add exercise.")
 
-@app.delete("/admin/table/{table_name}/{row_id}")
-def admin_delete(table_name: str, row_id: int):
+@app.delete("/admin/table/{table_name}/{row_id}", dependencies=[Depends(require_admin)])
+async def admin_delete(table_name: str, row_id: int):
     try:
-        db.delete_from_table(table_name, row_id)
+        await adb.delete_from_table(table_name, row_id)
+        if table_name == "users":
+            profile_cache.invalidate(row_id)
+            tokens.revoke_user(row_id)
         return {"status": "deleted"}
     except Exception:
         raise HTTPException(status_code=500, detail="Failed to delete record.")
 
-@app.put("/admin/logs/workout/{row_id}")
-def update_w_log(row_id: int, d: WorkoutUpdate):
+@app.put("/admin/logs/workout/{row_id}", dependencies=[Depends(require_admin)])
+async def update_w_log(row_id: int, d: WorkoutUpdate):
     try:
-        db.update_log("user_stats", row_id, d.weight, d.reps)
+        await adb.update_log("user_stats", row_id, d.weight, d.reps)
         return {"status": "updated"}
     except Exception:
         raise HTTPException(status_code=500, detail="Failed to update workout log.")
 
-@app.put("/admin/logs/nutrition/{row_id}")
-def update_n_log(row_id: int, d: NutritionUpdate):
+@app.put("/admin/logs/nutrition/{row_id}", dependencies=[Depends(require_admin)])
+async def update_n_log(row_id: int, d: NutritionUpdate):
     try:
-        db.update_log("user_nutrition", row_id, d.calories, d.protein)
+        await adb.update_log("user_nutrition", row_id, d.calories, d.protein)
         return {"status": "updated"}
     except Exception:
         raise HTTPException(status_code=500, detail="Failed to update nutrition log.")
\ No newline at end of file
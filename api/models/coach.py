@@ -12,6 +12,13 @@ class CoachRequest(BaseModel):
 class OneRMRequest(BaseModel):
     weight: float
     reps: int
+    formula: str = "brzycki"
+
+class OneRMBatchRequest(BaseModel):
+    weights: List[float]
+    reps: List[int]
+    formula: str = "brzycki"
+    zones: bool = True
 
 class ExerciseCreate(BaseModel):
     name: str
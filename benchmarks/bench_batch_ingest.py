@@ -0,0 +1,52 @@
+"""
+Rows per second: single-row /log/workout vs the batch endpoints.
+
+    python -m benchmarks.bench_batch_ingest [--single 1000 --batch 100000]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import requests
+
+def workout(i):
+    return {"user_id": i % 100 + 1, "exercise_id": i % 12 + 1, "weight": 60.0 + i % 90, "reps": 5, "date": f"2025-{i % 12 + 1:02d}-{i % 28 + 1:02d}"}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--single", type=int, default=1000)
+    parser.add_argument("--batch", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DB_PATH"] = os.path.join(tmp, "bench.db")
+        os.environ["CSV_DIR"] = os.path.join(tmp, "csv")
+        from api.coach_api import app, db
+        from benchmarks.common import serve, sign_in
+
+        with serve(app) as url, requests.Session() as session:
+            sign_in(session)
+            start = time.perf_counter()
+            for i in range(args.single):
+                session.post(f"{url}/log/workout", json=workout(i)).raise_for_status()
+            single = args.single / (time.perf_counter() - start)
+            print(f"single-row POST /log/workout      : {single:10.0f} rows/s")
+
+            rows = [workout(i) for i in range(args.batch)]
+            start = time.perf_counter()
+            res = session.post(f"{url}/log/workout/batch", json=rows)
+            res.raise_for_status()
+            batch = args.batch / (time.perf_counter() - start)
+            print(f"JSON array POST /log/workout/batch: {batch:10.0f} rows/s ({batch / single:.0f}x)")
+
+            body = "\n".join(json.dumps(r) for r in rows).encode()
+            start = time.perf_counter()
+            res = session.post(f"{url}/log/workout/batch", data=body, headers={"Content-Type": "application/x-ndjson"})
+            res.raise_for_status()
+            ndjson = args.batch / (time.perf_counter() - start)
+            print(f"NDJSON POST /log/workout/batch    : {ndjson:10.0f} rows/s ({ndjson / single:.0f}x)")
+        db.mirror.close()
+
+if __name__ == "__main__":
+    main()
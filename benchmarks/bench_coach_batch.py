@@ -0,0 +1,78 @@
+"""
+Batch coach reports: CoachReportJob throughput over 1/2/4/8 worker processes.
+
+    python -m benchmarks.bench_coach_batch [--users 5000] [--stats-per-user 200] [--workers 1 2 4 8]
+
+Seeds a scratch database, then for every worker count rebuilds all reports
+(force=True, worker start-up included) and reports users/s. Afterwards it
+checks that stored reports match on-demand build_report output, that a
+second run finds nothing to do, and that touching some users only rebuilds
+those (resumability / incremental nightly runs).
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from utils.coach import build_report, TREND_WINDOW
+from utils.database import DatabaseManager
+from utils.report_job import CoachReportJob
+
+def seed(db, users, stats_per_user, days):
+    rng = random.Random(7)
+    with db.get_connection() as conn:
+        conn.executemany("INSERT INTO users (username, password, age, height, weight, goal, frequency) VALUES (?, '-', ?, ?, ?, ?, 3)",
+                         ((f"user{i}", rng.randint(18, 60), rng.randint(155, 200), rng.randint(55, 120), rng.choice(["bulk", "cut", "maintain"]))
+                          for i in range(users)))
+        conn.executemany("INSERT INTO exercises (name, muscle_group) VALUES (?, 'General')",
+                         [("Bench Press",), ("Squat",), ("Deadlift",), ("Overhead Press",)] + [(f"Accessory {i}",) for i in range(8)])
+        conn.commit()
+    db.add_stats_bulk((u, rng.randint(1, 12), 40.0 + rng.randint(0, 120), rng.randint(1, 12),
+                       f"20{20 + i // 100:02d}-{i // 9 % 12 + 1:02d}-{i % 28 + 1:02d}")
+                      for u in range(1, users + 1) for i in range(stats_per_user))
+    db.add_nutrition_bulk((u, rng.randint(1800, 3500), rng.randint(80, 220), f"2024-{d // 28 % 12 + 1:02d}-{d % 28 + 1:02d}")
+                          for u in range(1, users + 1) for d in range(days))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--stats-per-user", type=int, default=200)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--chunk-size", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "bench.db"), csv_dir=None)
+        start = time.perf_counter()
+        seed(db, args.users, args.stats_per_user, args.days)
+        print(f"{args.users:,} users x {args.stats_per_user} sets seeded in {time.perf_counter() - start:.1f}s "
+              f"({os.cpu_count()} CPU(s) available)")
+
+        quiet = lambda msg: None
+        baseline = None
+        for workers in args.workers:
+            start = time.perf_counter()
+            summary = CoachReportJob(db, workers=workers, chunk_size=args.chunk_size, progress=quiet).run(force=True)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"{workers} worker(s): {elapsed:7.2f} s  {summary['written'] / elapsed:8.0f} users/s  "
+                  f"speed-up {baseline / elapsed:4.2f}x  ({summary['failed']} failed)")
+
+        sample = random.Random(1).sample(range(1, args.users + 1), min(50, args.users))
+        matches = 0
+        for user_id in sample:
+            profile, stats_df, nutri_df, summary_df = db.get_coach_inputs(user_id, history=TREND_WINDOW)
+            report = build_report(stats_df, nutri_df, profile["weight"], profile["age"], profile["goal"], summary_df)
+            matches += db.get_coach_report(user_id, db.get_data_version(user_id)) == report
+        print(f"stored reports matching on-demand build_report: {matches}/{len(sample)}")
+
+        job = CoachReportJob(db, workers=args.workers[0], chunk_size=args.chunk_size, progress=quiet)
+        print("pending after a full run:", job.count_pending())
+        for user_id in sample[:10]:
+            db.update_stat(user_id, 1, 100.0, 5, "2030-01-01")
+        summary = job.run()
+        print(f"after logging for 10 users: rebuilt {summary['written']} report(s)")
+
+if __name__ == "__main__":
+    main()
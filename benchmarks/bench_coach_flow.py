@@ -0,0 +1,73 @@
+"""
+Client-assembled coach report vs the server-side GET /coach/{user_id}.
+
+    python -m benchmarks.bench_coach_flow [--stats 5000 --days 1000]
+
+The old flow fetches /data/stats and /data/nutrition and POSTs both back to
+/coach; the new flow is a single GET. Reports bytes on the wire and
+end-to-end latency, and checks that both flows produce the same report.
+"""
+import argparse
+import os
+import tempfile
+import time
+import requests
+
+def seed(db, stats, days):
+    db.add_user("bench", "bench", 30, 180, 80, "bulk", 4)
+    with db.get_connection() as conn:
+        conn.executemany("INSERT INTO exercises (name, muscle_group) VALUES (?, 'General')",
+                         [("Bench Press",), ("Squat",), ("Deadlift",), ("Overhead Press",)] + [(f"Accessory {i}",) for i in range(16)])
+        conn.executemany(
+            "INSERT INTO user_stats (user_id, exercise_id, pr, reps, updated_at) VALUES (1, ?, ?, ?, ?)",
+            ((i % 20 + 1, 40.0 + (i * 7) % 120, 5 + i % 6, f"{2015 + i // 4000}-{i // 334 % 12 + 1:02d}-{i % 28 + 1:02d} {i % 24:02d}:00") for i in range(stats)),
+        )
+        conn.executemany(
+            "INSERT INTO user_nutrition (user_id, calories, protein, date) VALUES (1, ?, ?, date('2020-01-01', ? || ' days'))",
+            ((2200 + i % 900, 120 + i % 80, i) for i in range(days)),
+        )
+
+def old_flow(session, url):
+    sent = received = 0
+    stats = session.get(f"{url}/data/stats/1")
+    nutrition = session.get(f"{url}/data/nutrition/1")
+    received += len(stats.content) + len(nutrition.content)
+    payload = {"username": "bench", "weight": 80.0, "age": 30, "goal": "bulk", "stats": stats.json(), "nutrition": nutrition.json()}
+    res = session.post(f"{url}/coach", json=payload)
+    sent += len(res.request.body)
+    received += len(res.content)
+    return res.json(), sent, received
+
+def new_flow(session, url):
+    res = session.get(f"{url}/coach/1")
+    return res.json(), 0, len(res.content)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stats", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DB_PATH"] = os.path.join(tmp, "bench.db")
+        os.environ["CSV_DIR"] = os.path.join(tmp, "csv")
+        from api.coach_api import app, db
+        from benchmarks.common import serve, sign_in
+        seed(db, args.stats, args.days)
+
+        with serve(app) as url, requests.Session() as session:
+            sign_in(session)
+            reports = {}
+            for label, flow in (("client-assembled", old_flow), ("GET /coach/{id}", new_flow)):
+                start = time.perf_counter()
+                for _ in range(args.repeat):
+                    report, sent, received = flow(session, url)
+                elapsed = (time.perf_counter() - start) / args.repeat * 1000
+                reports[label] = report
+                print(f"{label:>17} | {elapsed:8.1f} ms | sent {sent / 1024:8.1f} KiB | received {received / 1024:8.1f} KiB")
+            print("identical reports:", reports["client-assembled"]["report"] == reports["GET /coach/{id}"]["report"])
+        db.mirror.close()
+
+if __name__ == "__main__":
+    main()
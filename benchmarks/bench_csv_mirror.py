@@ -0,0 +1,58 @@
+"""
+Per-write cost of the CSV mirror as user_stats grows.
+
+    python -m benchmarks.bench_csv_mirror [--rows 1000000]
+
+Compares the incremental mirror against the old behaviour of re-reading the
+whole table with pandas and rewriting the CSV after every write.
+"""
+import argparse
+import os
+import tempfile
+import time
+import pandas as pd
+from utils.database import DatabaseManager
+
+def fill_stats(db, n):
+    with db.get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO user_stats (user_id, exercise_id, pr, reps, updated_at) VALUES (?, ?, ?, ?, ?)",
+            ((i % 500 + 1, i % 40 + 1, 60.0 + i % 90, 5, f"2024-01-{i % 28 + 1:02d}") for i in range(n)),
+        )
+        conn.commit()
+
+def time_writes(fn, writes):
+    start = time.perf_counter()
+    for _ in range(writes):
+        fn()
+    return (time.perf_counter() - start) / writes * 1000
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--writes", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_dir = os.path.join(tmp, "csv")
+        db = DatabaseManager(os.path.join(tmp, "bench.db"), csv_dir=csv_dir, csv_flush_interval=0)
+        total = 0
+        for size in (10_000, 100_000, args.rows):
+            fill_stats(db, size - total)
+            total = size
+            db.mirror.rebuild(["user_stats"])
+
+            write = lambda: db.update_stat(1, 1, 100.0, 5, "2024-02-01")
+            incremental = time_writes(write, args.writes)
+
+            def full_rewrite():
+                with db.get_connection() as conn:
+                    conn.execute("INSERT INTO user_stats (user_id, exercise_id, pr, reps, updated_at) VALUES (1, 1, 100.0, 5, '2024-02-01')")
+                    conn.commit()
+                    pd.read_sql("SELECT * FROM user_stats", conn).to_csv(os.path.join(csv_dir, "full.csv"), index=False)
+            full = time_writes(full_rewrite, 3)
+
+            print(f"{size:>9} rows | incremental: {incremental:7.3f} ms/write | full rewrite: {full:9.1f} ms/write")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+First-render latency: sequential fan-out vs GET /dashboard/{user_id}.
+
+    python -m benchmarks.bench_dashboard [--stats 2000] [--days 365] [--repeat 100]
+
+Seeds one user on a scratch database, serves the API in-process and times
+(over one keep-alive session):
+- the old fan-out: /data/nutrition, /data/stats, /exercises/user, /exercises/all
+- /dashboard with every field
+- /dashboard with the fields main.py asks for
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.mean(samples), statistics.quantiles(samples, n=20)[18]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stats", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ["DB_PATH"] = os.path.join(tmp.name, "bench.db")
+    os.environ["CSV_DIR"] = os.path.join(tmp.name, "csv")
+
+    import requests
+    from api.coach_api import app, db
+    from benchmarks.common import serve, sign_in
+
+    db.add_user("bench", "bench-pass", 30, 180, 80, "bulk", 3)
+    with db.get_connection() as conn:
+        conn.executemany("INSERT INTO exercises (name, muscle_group) VALUES (?, 'General')", ((f"Lift {i}",) for i in range(60)))
+        conn.executemany("INSERT OR IGNORE INTO user_exercises (user_id, exercise_id) VALUES (1, ?)", ((i,) for i in range(1, 9)))
+    db.add_stats_bulk([(1, i % 8 + 1, 60.0 + i % 50, 5, f"20{20 + i // 336:02d}-{i // 28 % 12 + 1:02d}-{i % 28 + 1:02d}")
+                       for i in range(args.stats)])
+    db.add_nutrition_bulk([(1, 2500 + d % 300, 150 + d % 40, f"2024-{d // 28 % 12 + 1:02d}-{d % 28 + 1:02d}")
+                           for d in range(args.days)])
+
+    with serve(app) as url:
+        http = sign_in(requests.Session())
+
+        def fan_out():
+            for path in ("/data/nutrition/1", "/data/stats/1", "/exercises/user/1", "/exercises/all"):
+                http.get(url + path).json()
+
+        cases = [
+            ("fan-out (4 requests)", fan_out),
+            ("dashboard, all fields", lambda: http.get(f"{url}/dashboard/1").json()),
+            ("dashboard, main.py fields", lambda: http.get(f"{url}/dashboard/1", params={
+                "fields": "exercises,metrics,nutrition_series,stats_series"}).json()),
+        ]
+        for label, fn in cases:
+            fn()
+            mean_ms, p95_ms = timed(fn, args.repeat)
+            print(f"{label:<26} mean {mean_ms:7.2f} ms   p95 {p95_ms:7.2f} ms")
+
+    db.mirror.close()
+    tmp.cleanup()
+
+if __name__ == "__main__":
+    main()
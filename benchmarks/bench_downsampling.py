@@ -0,0 +1,66 @@
+"""
+Chart payload and latency for multi-year histories at each resolution.
+
+    python -m benchmarks.bench_downsampling [--years 5] [--exercises 8] [--points 400]
+
+Seeds one user with a daily log per exercise and a daily nutrition total for
+`--years` years, then times GET /analytics/{stats,nutrition}/1 at every
+resolution (raw, week, month, lttb) and reports points returned and JSON
+payload size. Finishes with the raw cost of lttb_indices on 1M points.
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--exercises", type=int, default=8)
+    parser.add_argument("--points", type=int, default=400)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ["DB_PATH"] = os.path.join(tmp.name, "bench.db")
+    os.environ["CSV_DIR"] = os.path.join(tmp.name, "csv")
+
+    import pandas as pd
+    import requests
+    from api.coach_api import app, db
+    from benchmarks.common import serve, sign_in
+    from utils.analysis import lttb_indices
+
+    days = pd.date_range("2020-01-01", periods=365 * args.years).strftime("%Y-%m-%d")
+    db.add_user("bench", "bench-pass", 30, 180, 80, "bulk", 3)
+    with db.get_connection() as conn:
+        conn.executemany("INSERT INTO exercises (name, muscle_group) VALUES (?, 'General')", ((f"Lift {i}",) for i in range(args.exercises)))
+    db.add_stats_bulk([(1, e + 1, round(60 + d * 0.05 + (d * 7 + e) % 11, 1), 5, day)
+                       for d, day in enumerate(days) for e in range(args.exercises)])
+    db.add_nutrition_bulk([(1, 2400 + (d * 37) % 500, 140 + (d * 13) % 60, day) for d, day in enumerate(days)])
+
+    with serve(app) as url:
+        http = sign_in(requests.Session())
+        for series in ("stats", "nutrition"):
+            for resolution in ("raw", "week", "month", "lttb"):
+                params = {"resolution": resolution, "points": args.points}
+                res = http.get(f"{url}/analytics/{series}/1", params=params)
+                start = time.perf_counter()
+                for _ in range(args.repeat):
+                    http.get(f"{url}/analytics/{series}/1", params=params).content
+                ms = (time.perf_counter() - start) / args.repeat * 1000
+                points = len(next(iter(res.json().values())))
+                print(f"{series:<9} {resolution:<5} | {points:7,d} points | {len(res.content) / 1024:8.1f} KiB | {ms:7.1f} ms")
+
+    rng = np.random.default_rng(0)
+    x, y = np.arange(1_000_000, dtype=float), rng.random(1_000_000).cumsum()
+    start = time.perf_counter()
+    lttb_indices(x, y, args.points)
+    print(f"lttb_indices 1M -> {args.points}: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    db.mirror.close()
+    tmp.cleanup()
+
+if __name__ == "__main__":
+    main()
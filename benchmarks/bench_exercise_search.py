@@ -0,0 +1,86 @@
+"""
+Exercise catalog search: ExerciseCatalog against the previous approaches.
+
+    python -m benchmarks.bench_exercise_search [--exercises 50000] [--repeat 200]
+
+Seeds `--exercises` synthetic exercises (modifier + equipment + movement,
+spread over muscle groups) on a scratch database and times, per query:
+- ExerciseCatalog.search (in-memory prefix/trigram index, top 20)
+- substring filtering of the full list (what the Program tab did with /exercises/all)
+- SQL LIKE '%q%' over the exercises table
+plus the catalog load, the version check done on every request, and a few
+ranking checks (exact name first, muscle-group and typo queries).
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from utils.catalog import ExerciseCatalog
+from utils.database import DatabaseManager
+
+MOVEMENTS = ["Bench Press", "Squat", "Deadlift", "Overhead Press", "Row", "Curl", "Extension", "Fly", "Lunge",
+             "Pulldown", "Pull Up", "Dip", "Raise", "Shrug", "Hip Thrust", "Calf Raise", "Crunch", "Push Up"]
+EQUIPMENT = ["Barbell", "Dumbbell", "Cable", "Machine", "Kettlebell", "Band", "Smith Machine", "Bodyweight"]
+MODIFIERS = ["Incline", "Decline", "Seated", "Standing", "Single Arm", "Close Grip", "Wide Grip", "Paused",
+             "Tempo", "Deficit", "Sumo", "Front", "Reverse", "Lying", "Kneeling", "Alternating"]
+GROUPS = ["Chest", "Back", "Legs", "Shoulders", "Arms", "Core", "Glutes", "Calves"]
+QUERIES = ["bench press", "squat", "b", "incline db", "dumbbell curl", "legs", "xtensio", "bnech pres", "zzzz"]
+
+def per_call_us(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+def seed(db, count):
+    rng = random.Random(3)
+    names = [m for m in MOVEMENTS]
+    while len(names) < count:
+        parts = [rng.choice(MODIFIERS), rng.choice(EQUIPMENT), rng.choice(MOVEMENTS)]
+        if rng.random() < 0.5:
+            parts.insert(0, rng.choice(MODIFIERS))
+        names.append(f"{' '.join(parts)} {len(names)}")
+    with db.get_connection() as conn:
+        conn.executemany("INSERT INTO exercises (name, muscle_group) VALUES (?, ?)",
+                         ((name, rng.choice(GROUPS)) for name in names))
+        conn.commit()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--exercises", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "bench.db"), csv_dir=None)
+        seed(db, args.exercises)
+        catalog = ExerciseCatalog(db)
+        start = time.perf_counter()
+        catalog.sync()
+        print(f"catalog load ({args.exercises:,} exercises): {(time.perf_counter() - start) * 1000:8.1f} ms   {catalog.stats()}")
+        print(f"sync with no changes (per request)   : {per_call_us(catalog.sync, 2000):8.1f} us")
+
+        rows = catalog.all()
+        print(f"\n{'query':<14}{'catalog':>12}{'list filter':>14}{'SQL LIKE':>12}   top result")
+        for q in QUERIES:
+            indexed = per_call_us(lambda: catalog.search(q, 20), args.repeat)
+            scan = per_call_us(lambda: [ex for ex in rows if q in ex["name"].lower()], 20)
+            with db.get_connection() as conn:
+                like = per_call_us(lambda: conn.execute("SELECT * FROM exercises WHERE name LIKE ? LIMIT 20", (f"%{q}%",)).fetchall(), 20)
+            top = catalog.search(q, 1)
+            print(f"{q:<14}{indexed:>10.1f}us{scan / 1000:>12.2f}ms{like / 1000:>10.2f}ms   "
+                  f"{top[0]['name'] + ' (' + top[0]['muscle_group'] + ')' if top else '-'}")
+
+        checks = {
+            "exact name first": catalog.search("Squat", 5)[0]["name"] == "Squat",
+            "muscle group query": all(ex["muscle_group"] == "Legs" or "legs" in ex["name"].lower() for ex in catalog.search("legs", 20)),
+            "typo finds bench press": any("Bench Press" in ex["name"] for ex in catalog.search("bnech pres", 5)),
+            "no match is empty": catalog.search("zzzz", 20) == [],
+        }
+        db.add_master_exercise("Zercher Squat", "Legs")
+        checks["new exercise visible after sync"] = catalog.sync() and catalog.search("zercher", 1)[0]["name"] == "Zercher Squat"
+        print("\n" + "\n".join(f"{name}: {ok}" for name, ok in checks.items()))
+
+if __name__ == "__main__":
+    main()
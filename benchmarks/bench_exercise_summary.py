@@ -0,0 +1,91 @@
+"""
+Per-exercise running aggregates: user_exercise_summary vs recomputing from history.
+
+    python -m benchmarks.bench_exercise_summary [--rows 1000000] [--users 50]
+
+For one user of a `--rows`-row user_stats table:
+- per-exercise latest/previous PR, count, best and mean delta: get_exercise_summary
+  against the same values aggregated from the user's whole history
+- the coach inputs: get_coach_inputs (summary keys + index ranges) against the
+  window-function query over the full history it replaces
+- write cost: update_stat (O(1) insert trigger), update_log and delete_from_table
+  (recompute of one key)
+and finally checks the summary against a full recompute.
+"""
+import argparse
+import os
+import tempfile
+import time
+from utils.database import DatabaseManager
+
+LEGACY_COACH_STATS = """
+    WITH seq AS (
+        SELECT us.id, e.name, us.pr, us.reps, us.updated_at,
+               ROW_NUMBER() OVER (ORDER BY us.updated_at, us.id) AS pos,
+               ROW_NUMBER() OVER (PARTITION BY e.name ORDER BY us.updated_at DESC, us.id DESC) AS recent
+        FROM user_stats us JOIN exercises e ON us.exercise_id = e.id
+        WHERE us.user_id = ?
+    ), firsts AS (
+        SELECT name, MIN(pos) AS first_pos FROM seq GROUP BY name
+    )
+    SELECT s.id, s.name, s.pr, s.reps, s.updated_at
+    FROM seq s JOIN firsts f ON f.name = s.name
+    WHERE s.recent <= ?
+    ORDER BY f.first_pos, s.pos
+"""
+
+def history_summary(db, user_id):
+    """The aggregates as computed before: full history, then a pandas pass."""
+    df = db.get_user_stats(user_id)
+    grouped = df.groupby("name", sort=False)["pr"]
+    out = grouped.agg(entry_count="count", latest_pr="last", best_pr="max")
+    out["previous_pr"] = df.loc[grouped.nth(-2).index].set_index("name")["pr"]
+    out["mean_delta"] = grouped.diff().groupby(df["name"], sort=False).mean()
+    return out
+
+def per_call_ms(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "bench.db"), csv_dir=None)
+        db.add_user("bench", "bench", 30, 180, 80, "bulk", 4)
+        with db.get_connection() as conn:
+            conn.executemany("INSERT INTO exercises (name, muscle_group) VALUES (?, 'General')", ((f"Lift {i}",) for i in range(12)))
+        start = time.perf_counter()
+        db.add_stats_bulk([(i % args.users + 1, i % 12 + 1, 40.0 + (i * 7) % 160, i % 12 + 1, f"20{10 + i // 100_000:02d}-{i % 12 + 1:02d}-{i % 28 + 1:02d}")
+                           for i in range(args.rows)])
+        print(f"{args.rows:,} rows, {args.rows // args.users:,} for the measured user (bulk load {time.perf_counter() - start:.1f}s)")
+
+        summary = db.get_exercise_summary(1).set_index("name")
+        expected = history_summary(db, 1)
+        assert summary["entry_count"].tolist() == expected["entry_count"].tolist()
+        assert summary["latest_pr"].tolist() == expected["latest_pr"].tolist()
+        assert summary["previous_pr"].tolist() == expected["previous_pr"].tolist()
+        assert (summary["mean_delta"] - expected["mean_delta"]).abs().max() < 1e-9
+
+        print(f"summary, running aggregates : {per_call_ms(lambda: db.get_exercise_summary(1), args.repeat):9.3f} ms")
+        print(f"summary, from history       : {per_call_ms(lambda: history_summary(db, 1), max(args.repeat // 4, 1)):9.3f} ms")
+        assert db.get_coach_inputs(1, history=8)[1].drop(columns="user_id").equals(db._read(LEGACY_COACH_STATS, (1, 8)))
+        print(f"coach inputs, summary keys  : {per_call_ms(lambda: db.get_coach_inputs(1, history=8), args.repeat):9.3f} ms")
+        print(f"coach inputs, window scan   : {per_call_ms(lambda: db._read(LEGACY_COACH_STATS, (1, 8)), args.repeat):9.3f} ms")
+
+        ids = []
+        print(f"update_stat (insert trigger): {per_call_ms(lambda: ids.append(db.update_stat(1, 3, 150.0, 5, '2030-01-01')['id']), args.repeat):9.3f} ms")
+        print(f"update_log (key recompute)  : {per_call_ms(lambda: db.update_log('user_stats', ids[0], 155.0, 4), args.repeat):9.3f} ms")
+        print(f"delete (key recompute)      : {per_call_ms(lambda: db.delete_from_table('user_stats', ids.pop()), args.repeat):9.3f} ms")
+
+        mismatches = db.check_exercise_summary()
+        print("summary consistent:", mismatches.empty)
+
+if __name__ == "__main__":
+    main()
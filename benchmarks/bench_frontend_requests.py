@@ -0,0 +1,81 @@
+"""
+API requests per Streamlit interaction.
+
+    python -m benchmarks.bench_frontend_requests [--app main.py] [--interactions 10]
+
+Serves the API in-process on a scratch database with a request-counting
+middleware, logs a seeded user into the Streamlit app (streamlit.testing
+AppTest) and reports how many API calls the first render, each plain widget
+interaction, and each write interaction (saving a nutrition log) trigger.
+Point --app at an older copy of main.py to compare.
+"""
+import argparse
+import os
+import tempfile
+import time
+from collections import Counter
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--app", default="main.py")
+    parser.add_argument("--interactions", type=int, default=10)
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ["DB_PATH"] = os.path.join(tmp.name, "bench.db")
+    os.environ["CSV_DIR"] = os.path.join(tmp.name, "csv")
+    os.environ["API_URL"] = f"http://127.0.0.1:{args.port}"
+    os.environ.setdefault("NEWS_URL", "http://127.0.0.1:9/")
+
+    import requests
+    from streamlit.testing.v1 import AppTest
+    from api.coach_api import app, db
+    from benchmarks.common import serve, sign_in
+
+    counts = Counter()
+
+    @app.middleware("http")
+    async def count_requests(request, call_next):
+        counts[request.url.path] += 1
+        return await call_next(request)
+
+    with serve(app, port=args.port) as url:
+        requests.post(f"{url}/auth/register", json={"username": "bench", "password": "bench-pass", "age": 30, "height": 180,
+                                                    "weight": 80, "goal": "bulk", "frequency": 3})
+        login = requests.post(f"{url}/auth/login", json={"username": "bench", "password": "bench-pass"}).json()
+        admin = sign_in(requests.Session())
+        for i in range(3):
+            admin.post(f"{url}/admin/exercises/add", json={"name": f"Bench Lift {i}", "muscle_group": "Full Body"})
+        for ex in requests.get(f"{url}/exercises/all").json()[:3]:
+            requests.post(f"{url}/exercises/add", json={"user_id": login["id"], "exercise_id": ex["id"]},
+                          headers={"Authorization": f"Bearer {login['token']}"})
+
+        at = AppTest.from_file(os.path.abspath(args.app), default_timeout=60)
+        at.session_state["token"] = login.pop("token", None)
+        at.session_state["user"] = login
+
+        def interact(action):
+            counts.clear()
+            start = time.perf_counter()
+            action()
+            at.run()
+            return sum(counts.values()), (time.perf_counter() - start) * 1000, dict(counts)
+
+        first, first_ms, first_paths = interact(lambda: None)
+        print(f"first render      : {first:3d} requests {first_ms:8.1f} ms  {first_paths}")
+
+        total = total_ms = 0
+        for i in range(args.interactions):
+            n, ms, paths = interact(lambda: at.sidebar.number_input[0].set_value(2000 + i))
+            total, total_ms = total + n, total_ms + ms
+        print(f"widget interaction: {total / args.interactions:5.1f} requests {total_ms / args.interactions:8.1f} ms  (last: {paths})")
+
+        n, ms, paths = interact(lambda: at.sidebar.button[0].click())
+        print(f"save nutrition log: {n:3d} requests {ms:8.1f} ms  {paths}")
+
+    db.mirror.close()
+    tmp.cleanup()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Bulk importer throughput and memory on a generated history file.
+
+    python -m benchmarks.bench_importer [--rows 10000000]
+
+Writes a CSV of workout sets keyed by username and exercise name, imports it
+with BulkImporter and reports rows/s and peak RSS. Python memory is bounded by
+--chunk-size; RSS also counts memory-mapped database pages, which the pool's
+mmap_size pragma caps at 256 MB.
+"""
+import argparse
+import os
+import resource
+import tempfile
+import time
+from utils.database import DatabaseManager
+from utils.importer import BulkImporter
+
+def write_history(path, rows, users, exercises):
+    with open(path, "w") as f:
+        f.write("username,exercise,weight,reps,date\n")
+        for i in range(rows):
+            f.write(f"user{i % users},Exercise {i % exercises},{40 + i % 150},{1 + i % 12},{2010 + i % 15}-{i % 12 + 1:02d}-{i % 28 + 1:02d}\n")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--exercises", type=int, default=200)
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "bench.db"), csv_dir=None)
+        with db.get_connection() as conn:
+            conn.executemany("INSERT INTO users (username, password) VALUES (?, 'x$y')", ((f"user{i}",) for i in range(args.users)))
+            conn.executemany("INSERT INTO exercises (name, muscle_group) VALUES (?, 'General')", ((f"Exercise {i}",) for i in range(args.exercises)))
+        path = os.path.join(tmp, "history.csv")
+        write_history(path, args.rows, args.users, args.exercises)
+
+        start = time.perf_counter()
+        summary = BulkImporter(db, chunk_size=args.chunk_size, progress=lambda msg: None).run("user_stats", path)
+        elapsed = time.perf_counter() - start
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"{summary['inserted']:,} rows in {elapsed:.1f}s -> {summary['inserted'] / elapsed:,.0f} rows/s (incl. index rebuild), peak RSS {peak_mb:.0f} MB")
+
+if __name__ == "__main__":
+    main()
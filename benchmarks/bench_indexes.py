@@ -0,0 +1,63 @@
+"""
+Per-user read latency as total history grows.
+
+    python -m benchmarks.bench_indexes [--sizes 100000 1000000 3000000]
+
+Every user has the same history length (ROWS_PER_USER), so only the total
+table size changes. Times get_user_stats and get_daily_nutrition_summary for
+random users with the migration indexes, and the same query forced to scan
+(NOT INDEXED).
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from utils.database import DatabaseManager
+
+ROWS_PER_USER = 100
+
+def fill(db, start, stop):
+    with db.get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO user_stats (user_id, exercise_id, pr, reps, updated_at) VALUES (?, ?, ?, ?, ?)",
+            ((i // ROWS_PER_USER + 1, i % 12 + 1, 60.0 + i % 90, 5, f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}") for i in range(start, stop)),
+        )
+        conn.executemany(
+            "INSERT INTO user_nutrition (user_id, calories, protein, date) VALUES (?, ?, ?, ?)",
+            ((i // ROWS_PER_USER + 1, 2500, 150, f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}") for i in range(start, stop)),
+        )
+
+def avg_ms(fn, total, samples=200):
+    users = [random.randint(1, total // ROWS_PER_USER) for _ in range(samples)]
+    start = time.perf_counter()
+    for u in users:
+        fn(u)
+    return (time.perf_counter() - start) / samples * 1000
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000, 3_000_000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "bench.db"), csv_dir=None)
+        with db.get_connection() as conn:
+            conn.executemany("INSERT INTO exercises (name, muscle_group) VALUES (?, 'General')", ((f"Exercise {i}",) for i in range(12)))
+        total = 0
+        for size in sorted(args.sizes):
+            fill(db, total, size)
+            total = size
+
+            def scan(user_id):
+                with db.get_connection() as conn:
+                    conn.execute("SELECT e.name, us.pr, us.reps, us.updated_at FROM user_stats us NOT INDEXED JOIN exercises e ON us.exercise_id = e.id "
+                                 "WHERE us.user_id = ? ORDER BY us.updated_at ASC", (user_id,)).fetchall()
+
+            stats = avg_ms(db.get_user_stats, total)
+            nutrition = avg_ms(db.get_daily_nutrition_summary, total)
+            scanned = avg_ms(scan, total, samples=10)
+            print(f"{size:>9} rows | get_user_stats {stats:6.2f} ms | get_daily_nutrition_summary {nutrition:6.2f} ms | full scan {scanned:8.2f} ms")
+
+if __name__ == "__main__":
+    main()
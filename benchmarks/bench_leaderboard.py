@@ -0,0 +1,95 @@
+"""
+Strength percentile index: full refresh, incremental sync and lookups.
+
+    python -m benchmarks.bench_leaderboard [--users 1000000] [--exercises 4] [--changes 1000]
+
+Seeds `--users` users (random bodyweight/age, one latest lift each) on a
+scratch database and times:
+- PercentileIndex.build() over all of them (full refresh)
+- user_ranks / banded top-10 / global top-10 lookups
+- sync() after `--changes` update_stat writes plus bodyweight changes that
+  move users to another band, against rebuilding from scratch
+- 8 concurrent first sync() calls on a fresh index (they must share one build)
+and checks sampled percentiles against a brute-force count.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from utils.database import DatabaseManager
+from utils.leaderboard import PercentileIndex, band_of
+
+def per_call_us(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+def brute_force(lifts, user_id, exercise_id):
+    """Percentile of the user's latest lift by scanning every lift of the band."""
+    me = next(row for row in lifts if row[0] == user_id and row[3] == exercise_id)
+    band = band_of(me[1], me[2])
+    values = np.array([pr for _, w, a, ex, pr in lifts if ex == exercise_id and band_of(w, a) == band])
+    return round(100 * ((values < me[4]).sum() + (values == me[4]).sum() / 2) / len(values), 1)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--exercises", type=int, default=4)
+    parser.add_argument("--changes", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=10000)
+    args = parser.parse_args()
+    rng = random.Random(5)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "bench.db"), csv_dir=None)
+        start = time.perf_counter()
+        with db.get_connection() as conn:
+            conn.executemany("INSERT INTO users (username, password, age, height, weight, goal, frequency) VALUES (?, '-', ?, 175, ?, 'bulk', 3)",
+                             ((f"user{i}", rng.randint(18, 70), round(rng.uniform(50, 130), 1)) for i in range(args.users)))
+            conn.executemany("INSERT INTO exercises (name, muscle_group) VALUES (?, 'General')", ((f"Lift {i}",) for i in range(args.exercises)))
+            conn.commit()
+        db.add_stats_bulk((u, u % args.exercises + 1, float(rng.randint(40, 250)), 5, "2024-01-01") for u in range(1, args.users + 1))
+        print(f"{args.users:,} users seeded in {time.perf_counter() - start:.1f}s")
+
+        index = PercentileIndex(db)
+        start = time.perf_counter()
+        index.build()
+        build_s = time.perf_counter() - start
+        print(f"full refresh (build)     : {build_s:8.2f} s   {index.stats()}")
+
+        sample = rng.sample(range(1, args.users + 1), 200)
+        ex_id = sample[0] % args.exercises + 1
+        band = index.band_for(sample[0], ex_id)
+        print(f"user_ranks               : {per_call_us(lambda: index.user_ranks(rng.choice(sample)), args.repeat):8.1f} us")
+        print(f"top 10, one band         : {per_call_us(lambda: index.top(ex_id, band), args.repeat):8.1f} us")
+        print(f"top 10, all bands        : {per_call_us(lambda: index.top(ex_id), args.repeat):8.1f} us")
+
+        changed = rng.sample(range(1, args.users + 1), args.changes)
+        for user_id in changed:
+            db.update_stat(user_id, user_id % args.exercises + 1, float(rng.randint(40, 250)), 5, "2024-02-01")
+        with db.get_connection() as conn:
+            conn.executemany("UPDATE users SET weight = weight + 25 WHERE id = ?", ((u,) for u in changed[:args.changes // 10]))
+            conn.commit()
+        start = time.perf_counter()
+        synced = index.sync()
+        sync_ms = (time.perf_counter() - start) * 1000
+        print(f"sync after {args.changes} writes  : {sync_ms:8.1f} ms  ({synced} users re-read, {build_s * 1000 / sync_ms:,.0f}x faster than a rebuild)")
+        print(f"sync with no changes     : {per_call_us(index.sync, 1000):8.1f} us")
+
+        lifts = list(db.iter_latest_lifts())
+        checked = [changed[0], changed[-1]] + sample[:3]
+        ok = all(index.user_ranks(u)[u % args.exercises + 1]["percentile"] == brute_force(lifts, u, u % args.exercises + 1) for u in checked)
+        print(f"percentiles match a brute-force count ({len(checked)} users): {ok}")
+
+        fresh = PercentileIndex(db)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(8) as pool:
+            list(pool.map(lambda _: fresh.sync(), range(8)))
+        print(f"8 concurrent first syncs : {time.perf_counter() - start:8.2f} s   ({fresh.builds} build)")
+
+if __name__ == "__main__":
+    main()
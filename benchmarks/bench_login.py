@@ -0,0 +1,53 @@
+"""
+Login throughput at several scrypt cost settings.
+
+    python -m benchmarks.bench_login [--logins 200] [--workers N]
+
+For each cost (N = 2^12 .. 2^15, r=8, p=1) measures the latency of a single
+verify_password call and the sustained verifications per second when run
+inline versus spread over a process pool, which is how /auth/login runs them.
+The legacy salted SHA-256 check is included as the floor.
+"""
+import argparse
+import hashlib
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from utils.auth import hash_password, verify_password
+
+def legacy_hash(password):
+    salt = os.urandom(16).hex()
+    return f"{salt}${hashlib.sha256(f'{salt}{password}'.encode()).hexdigest()}"
+
+def throughput(stored, logins, pool=None):
+    start = time.perf_counter()
+    if pool is None:
+        ok = all(verify_password(stored, "hunter22") for _ in range(logins))
+    else:
+        ok = all(pool.map(verify_password, [stored] * logins, ["hunter22"] * logins, chunksize=4))
+    assert ok
+    return logins / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    cases = [("sha256 (legacy)", legacy_hash("hunter22"))]
+    cases += [(f"scrypt N=2^{e}", hash_password("hunter22", n=2 ** e)) for e in (12, 13, 14, 15)]
+
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        pool.map(verify_password, [cases[0][1]] * args.workers, ["warm"] * args.workers)
+        for label, stored in cases:
+            start = time.perf_counter()
+            verify_password(stored, "hunter22")
+            single_ms = (time.perf_counter() - start) * 1000
+            inline = throughput(stored, args.logins)
+            pooled = throughput(stored, args.logins, pool)
+            print(f"{label:<16} | {single_ms:8.2f} ms/verify | inline {inline:10,.0f}/s | "
+                  f"pool x{args.workers} {pooled:10,.0f}/s")
+
+if __name__ == "__main__":
+    main()
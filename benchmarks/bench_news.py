@@ -0,0 +1,83 @@
+"""
+Sidebar news cost: uncached scrape per rerun vs the cached news service.
+
+    python -m benchmarks.bench_news [--reruns 200] [--latency-ms 150]
+
+Serves a large article page from a local HTTP stand-in (with ETag support and
+an artificial response delay) and compares:
+- the old path: GET + full BeautifulSoup parse on every rerun
+- FitnessScraper.get_latest_articles() once the cache is warm
+- a conditional refresh that the stand-in answers with 304
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+from bs4 import BeautifulSoup
+from utils.scraper import FitnessScraper
+
+PAGE = ("<html><body>" + "".join(
+    f"<div class='card'><p>{'lorem ipsum ' * 40}</p><h3>Workout routine number {i}</h3><a href='/a/{i}'>more</a></div>"
+    for i in range(400)) + "</body></html>").encode()
+ETAG = '"news-v1"'
+
+class StandIn(BaseHTTPRequestHandler):
+    latency = 0.0
+    counts = {200: 0, 304: 0}
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        if self.headers.get("If-None-Match") == ETAG:
+            self.counts[304] += 1
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.counts[200] += 1
+        self.send_response(200)
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(PAGE)))
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, *args):
+        pass
+
+def legacy_articles(url):
+    res = requests.get(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=5)
+    soup = BeautifulSoup(res.text, 'html.parser')
+    return [a.get_text().strip() for a in soup.find_all('h3', limit=5) if len(a.get_text()) > 5]
+
+def per_call_ms(fn, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1000
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reruns", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=150)
+    args = parser.parse_args()
+
+    StandIn.latency = args.latency_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_ms = per_call_ms(lambda: legacy_articles(url), min(args.reruns, 20))
+        scraper = FitnessScraper(url, cache_path=os.path.join(tmp, "news.json"))
+        assert scraper.refresh() == legacy_articles(url)
+        cached_ms = per_call_ms(scraper.get_latest_articles, args.reruns)
+        conditional_ms = per_call_ms(scraper.refresh, 5)
+
+    server.shutdown()
+    print(f"uncached scrape per rerun : {legacy_ms:10.3f} ms")
+    print(f"cached service per rerun  : {cached_ms:10.4f} ms")
+    print(f"conditional refresh (304) : {conditional_ms:10.3f} ms  (responses: {StandIn.counts})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+1RM estimation at 1M rows: NumPy pass vs per-row Python, and the API paths.
+
+    python -m benchmarks.bench_one_rm [--rows 1000000]
+
+- utils.strength.estimate_1rm for every formula vs a per-row Python loop
+  (the old /predict_1rm arithmetic) for Brzycki
+- training_zones for all rows
+- POST /predict_1rm/batch and GET /strength/history/{user_id} end to end
+  (in-process server, scratch database)
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ["DB_PATH"] = os.path.join(tmp.name, "bench.db")
+    os.environ["CSV_DIR"] = os.path.join(tmp.name, "csv")
+
+    import requests
+    from api.coach_api import app, db
+    from benchmarks.common import serve, sign_in
+    from utils.strength import FORMULAS, estimate_1rm, training_zones
+
+    rng = np.random.default_rng(0)
+    weights = np.round(rng.uniform(20, 250, args.rows), 1)
+    reps = rng.integers(1, 16, args.rows)
+
+    w_list, r_list = weights.tolist(), reps.tolist()
+    loop, loop_ms = timed(lambda: [w * (36 / (37 - r)) if r > 1 else w for w, r in zip(w_list, r_list)])
+    print(f"python loop (brzycki)   {loop_ms:9.1f} ms")
+    for name in FORMULAS:
+        est, ms = timed(lambda: estimate_1rm(weights, reps, name))
+        print(f"numpy {name:<17} {ms:9.1f} ms")
+        if name == "brzycki":
+            assert np.allclose(est, loop)
+    _, ms = timed(lambda: training_zones(est))
+    print(f"training_zones          {ms:9.1f} ms")
+
+    db.add_user("bench", "bench-pass", 30, 180, 80, "bulk", 3)
+    with db.get_connection() as conn:
+        conn.executemany("INSERT INTO exercises (name, muscle_group) VALUES (?, 'General')", ((f"Lift {i}",) for i in range(8)))
+    db.add_stats_bulk([(1, i % 8 + 1, w, r, f"20{20 + i // 100000 % 10}-{i // 28 % 12 + 1:02d}-{i % 28 + 1:02d}")
+                       for i, (w, r) in enumerate(zip(w_list, r_list))])
+
+    with serve(app) as url:
+        http = sign_in(requests.Session())
+        res, ms = timed(lambda: http.post(f"{url}/predict_1rm/batch", json={"weights": w_list, "reps": r_list}))
+        print(f"POST /predict_1rm/batch {ms:9.1f} ms  ({len(res.content) / 2**20:.1f} MiB response)")
+        res, ms = timed(lambda: http.get(f"{url}/strength/history/1"))
+        print(f"GET /strength/history   {ms:9.1f} ms  ({len(res.json()['est_1rm']):,} rows)")
+
+    db.mirror.close()
+    tmp.cleanup()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Best-lift lookups: indexed derived columns vs scanning the history.
+
+    python -m benchmarks.bench_personal_bests [--rows 1000000] [--users 50] [--catalog 50000]
+
+Compares, for one user of a `--rows`-row user_stats table and a `--catalog`-row
+exercises table:
+- get_personal_bests (the user's user_exercise_summary rows) against the same
+  answer computed by aggregating the user's whole history, and by probing
+  every catalog exercise (the previous query)
+- the PR check done by update_stat against a MAX over a full scan
+"""
+import argparse
+import os
+import tempfile
+import time
+from utils.database import DatabaseManager
+
+SCAN_BESTS = """
+    SELECT e.id AS exercise_id, e.name,
+           MAX(CASE WHEN us.reps = 1 THEN us.pr WHEN us.reps BETWEEN 2 AND 36 THEN us.pr * (36.0 / (37 - us.reps)) END) AS best_1rm,
+           MAX(us.pr) AS best_pr
+    FROM user_stats us NOT INDEXED JOIN exercises e ON us.exercise_id = e.id
+    WHERE us.user_id = ? GROUP BY e.id ORDER BY e.name
+"""
+
+# The previous get_personal_bests: an EXISTS and three subqueries per catalog row
+CATALOG_BESTS = """
+    SELECT e.id AS exercise_id, e.name,
+           (SELECT CAST(MAX(est_1rm) AS REAL) FROM user_stats s WHERE s.user_id = ? AND s.exercise_id = e.id) AS best_1rm,
+           (SELECT updated_at FROM user_stats s WHERE s.user_id = ? AND s.exercise_id = e.id
+            ORDER BY est_1rm DESC LIMIT 1) AS best_1rm_date,
+           (SELECT MAX(pr) FROM user_stats s WHERE s.user_id = ? AND s.exercise_id = e.id) AS best_pr
+    FROM exercises e
+    WHERE EXISTS (SELECT 1 FROM user_stats s WHERE s.user_id = ? AND s.exercise_id = e.id)
+    ORDER BY e.name
+"""
+
+def per_call_ms(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--catalog", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "bench.db"), csv_dir=None)
+        with db.get_connection() as conn:
+            conn.executemany("INSERT INTO exercises (name, muscle_group) VALUES (?, 'General')", ((f"Lift {i}",) for i in range(max(args.catalog, 12))))
+        db.add_stats_bulk([(i % args.users + 1, i % 12 + 1, 40.0 + (i * 7) % 160, i % 12 + 1, f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}")
+                           for i in range(args.rows)])
+
+        indexed = db.get_personal_bests(1, as_frame=False)
+        scanned = db._read(SCAN_BESTS, (1,), as_frame=False)
+        assert [(r["name"], round(r["best_1rm"], 6), r["best_pr"]) for r in indexed] == \
+               [(r["name"], round(r["best_1rm"], 6), r["best_pr"]) for r in scanned]
+        assert indexed == db._read(CATALOG_BESTS, (1,) * 4, as_frame=False)
+
+        print(f"{args.rows:,} rows, {args.rows // args.users:,} for the measured user, {max(args.catalog, 12):,} exercises")
+        print(f"personal bests, summary : {per_call_ms(lambda: db.get_personal_bests(1, as_frame=False), args.repeat):8.3f} ms")
+        print(f"personal bests, catalog : {per_call_ms(lambda: db._read(CATALOG_BESTS, (1,) * 4, as_frame=False), args.repeat):8.3f} ms")
+        print(f"personal bests, scan    : {per_call_ms(lambda: db._read(SCAN_BESTS, (1,), as_frame=False), args.repeat):8.3f} ms")
+
+        def pr_check(hint):
+            with db.get_connection() as conn:
+                conn.execute(f"SELECT MAX(est_1rm) FROM user_stats {hint} WHERE user_id = 1 AND exercise_id = 3").fetchone()
+        print(f"PR check, indexed       : {per_call_ms(lambda: pr_check(''), args.repeat):8.3f} ms")
+        print(f"PR check, scan          : {per_call_ms(lambda: pr_check('NOT INDEXED'), args.repeat):8.3f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Per-request cost of the DataFrame path vs plain rows on the read endpoints.
+
+    python -m benchmarks.bench_row_mapping
+
+For result sets of several sizes, measures mean latency and peak Python
+allocation (tracemalloc) of get_user_stats(...).to_dict(orient="records")
+against get_user_stats(..., as_frame=False).
+"""
+import os
+import tempfile
+import time
+import tracemalloc
+from utils.database import DatabaseManager
+
+def measure(fn, repeat=200):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = (time.perf_counter() - start) / repeat * 1000
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "bench.db"), csv_dir=None)
+        with db.get_connection() as conn:
+            conn.executemany("INSERT INTO exercises (name, muscle_group) VALUES (?, 'General')", ((f"Exercise {i}",) for i in range(12)))
+            for user_id, rows in enumerate((10, 100, 1000, 10000), start=1):
+                conn.executemany(
+                    "INSERT INTO user_stats (user_id, exercise_id, pr, reps, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    ((user_id, i % 12 + 1, 60.0 + i % 90, 5, f"2024-01-{i % 28 + 1:02d}") for i in range(rows)),
+                )
+
+        for user_id, rows in enumerate((10, 100, 1000, 10000), start=1):
+            frame_ms, frame_kb = measure(lambda: db.get_user_stats(user_id).to_dict(orient="records"))
+            rows_ms, rows_kb = measure(lambda: db.get_user_stats(user_id, as_frame=False))
+            print(f"{rows:>6} rows | DataFrame {frame_ms:7.3f} ms {frame_kb:9.1f} KiB | "
+                  f"plain rows {rows_ms:7.3f} ms {rows_kb:9.1f} KiB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+import threading
+import time
+from contextlib import contextmanager
+import uvicorn
+
+@contextmanager
+def serve(app, port=8765):
+    """Runs `app` on a local uvicorn server in a background thread; yields its base URL."""
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join()
+
+def sign_in(session, user_id=1, is_admin=1):
+    """Adds a bearer token from the in-process API to `session` (admin by default, so any user_id is allowed)."""
+    from api.coach_api import tokens
+    session.headers["Authorization"] = f"Bearer {tokens.issue(user_id, is_admin)}"
+    return session
@@ -0,0 +1,75 @@
+"""
+Concurrent load test for the write and read hot paths.
+
+Start the API against a scratch database first, e.g.
+
+    DB_PATH=/tmp/load.db CSV_DIR=/tmp/load_csv/ uvicorn api.coach_api:app --port 8000
+
+then run (as an admin account, so one token may touch every user)
+
+    python -m benchmarks.load_test_api --username admin --password ... --clients 32 --requests 2000
+
+Half of the requests POST /log/workout, half GET /data/stats/{user_id}.
+Prints throughput, latency percentiles and the server's pool metrics.
+"""
+import argparse
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+def worker(url, n, users, session):
+    latencies, errors = [], 0
+    for i in range(n):
+        user_id = random.randint(1, users)
+        start = time.perf_counter()
+        try:
+            if i % 2:
+                res = session.get(f"{url}/data/stats/{user_id}", timeout=30)
+            else:
+                res = session.post(f"{url}/log/workout", json={
+                    "user_id": user_id, "exercise_id": random.randint(1, 12),
+                    "weight": 100.0, "reps": 5, "date": "2026-01-01",
+                }, timeout=30)
+            if res.status_code != 200:
+                errors += 1
+        except requests.RequestException:
+            errors += 1
+        latencies.append(time.perf_counter() - start)
+    return latencies, errors
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--username", required=True, help="Admin account to sign in with")
+    parser.add_argument("--password", required=True)
+    args = parser.parse_args()
+
+    login = requests.post(f"{args.url}/auth/login", json={"username": args.username, "password": args.password}, timeout=30)
+    login.raise_for_status()
+    headers = {"Authorization": f"Bearer {login.json()['token']}"}
+    per_client = args.requests // args.clients
+    sessions = [requests.Session() for _ in range(args.clients)]
+    for session in sessions:
+        session.headers.update(headers)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        results = list(pool.map(lambda s: worker(args.url, per_client, args.users, s), sessions))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(l for lat, _ in results for l in lat)
+    errors = sum(e for _, e in results)
+    print(f"{len(latencies)} requests in {elapsed:.2f}s -> {len(latencies) / elapsed:.0f} req/s, {errors} errors")
+    print(f"p50 {statistics.median(latencies) * 1000:.1f} ms | p95 {latencies[int(len(latencies) * 0.95)] * 1000:.1f} ms | "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms")
+    try:
+        print("pool:", requests.get(f"{args.url}/admin/pool", headers=headers, timeout=5).json())
+    except requests.RequestException:
+        pass
+
+if __name__ == "__main__":
+    main()
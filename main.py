@@ -2,14 +2,90 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import requests
+import os
+from requests.adapters import HTTPAdapter
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from datetime import datetime
 from utils.scraper import FitnessScraper
+from utils.strength import FORMULAS
 
-API_URL = "http://127.0.0.1:8000"
-scraper = FitnessScraper()
+API_URL = os.getenv("API_URL", "http://127.0.0.1:8000")
+LOG_PAGE_SIZE = 50
+# Points per exercise line / nutrition trace the server sends; more than a chart can show adds only payload
+CHART_POINTS = 400
+# Exercises listed at once in the Program tab's "Add Exercises" search
+SEARCH_RESULTS = 25
+
+@st.cache_resource
+def get_news_service():
+    """One news service per server process; it refreshes in the background."""
+    return FitnessScraper().start()
+
+scraper = get_news_service()
+
+@st.cache_resource
+def get_api_session():
+    """One keep-alive connection pool to the API, shared by every rerun and session."""
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+    return session
+
+api_session = get_api_session()
+
+@st.cache_data(ttl=300, max_entries=512, show_spinner=False)
+def fetch_cached(url, data_version, params=None, token=None):
+    """
+    Memoized GET; data_version only takes part in the cache key. The token is part
+    of the key too, so one session is never served another's authorized response.
+    Failures raise, so they are never cached.
+    """
+    resp = api_session.get(url, params=params, timeout=10, headers={"Authorization": f"Bearer {token}"})
+    resp.raise_for_status()
+    return resp.json()
+
+# Server-side version counters (returned by /me) that cached_json keys each scope on
+VERSION_FIELDS = {"user": "data_version", "catalog": "catalog_version"}
+
+def data_version(scope):
+    return (st.session_state.user or {}).get(VERSION_FIELDS[scope])
+
+def refresh_profile():
+    """Reloads the profile and the data/catalog versions from /me. Returns the response (None if unreachable)."""
+    try:
+        res = api_session.get(f"{API_URL}/me", headers=auth_headers(), timeout=5)
+    except requests.exceptions.RequestException:
+        return None
+    if res.status_code == 200:
+        st.session_state.user = res.json()
+    return res
+
+def invalidate():
+    """
+    Call after a write when the run goes on without st.rerun(): re-reads the
+    server's versions from /me, so the rest of this run fetches fresh data.
+    A rerun needs no call - the /me at the top of every run re-reads them.
+    """
+    refresh_profile()
+
+def cached_json(url: str, friendly_name: str, scope: str, params=None):
+    """
+    Like safe_request_json(api_session.get, ...) but memoized per URL, params
+    and the server's version of `scope` ("user": the logged-in user's
+    user_data_version, "catalog": the exercise catalog's catalog_version)
+    """
+    try:
+        return fetch_cached(url, data_version(scope), params, st.session_state.token)
+    except requests.exceptions.ConnectionError:
+        st.error("🔌 Unable to connect to the FitAI Server. Please check if the backend is running.")
+    except requests.exceptions.HTTPError as e:
+        st.warning(f"⚠️ Could not load {friendly_name} (server returned {e.response.status_code}).")
+    except ValueError:
+        st.error("⚠️ Received invalid data from the FitAI Server.")
+    except Exception:
+        st.error("⚠️ An unexpected error occurred while contacting the FitAI Server.")
+    return None
 
 
 def safe_request_json(method, url: str, friendly_name: str = "data", **kwargs):
@@ -18,7 +94,9 @@ def safe_request_json(method, url: str, friendly_name: str = "data", **kwargs):
     - Catches connection errors and shows a clear message
     - Checks status_code before .json()
     - Catches JSON decode errors
+    - Sends the session's token unless other headers are given
     """
+    kwargs.setdefault("headers", auth_headers())
     try:
         resp = method(url, **kwargs)
     except requests.exceptions.ConnectionError:
@@ -42,6 +120,11 @@ st.set_page_config(page_title="FitAI Ultimate", page_icon="💪", layout="wide")
 
 if "user" not in st.session_state:
     st.session_state.user = None
+if "token" not in st.session_state:
+    st.session_state.token = None
+
+def auth_headers():
+    return {"Authorization": f"Bearer {st.session_state.token}"}
 
 # --- AUTHENTICATION ---
 if st.session_state.user is None:
@@ -59,7 +142,7 @@ if st.session_state.user is None:
                 p = st.text_input("🔒 Password", type="password", placeholder="Enter your password")
                 if st.button("🚀 Login", type="primary", use_container_width=True):
                     try:
-                        res = requests.post(f"{API_URL}/auth/login", json={"username": u, "password": p})
+                        res = api_session.post(f"{API_URL}/auth/login", json={"username": u, "password": p})
                     except requests.exceptions.ConnectionError:
                         st.error("🔌 Unable to connect to the FitAI Server. Please check if the backend is running.")
                     except Exception:
@@ -67,7 +150,9 @@ if st.session_state.user is None:
                     else:
                         if res.status_code == 200:
                             try:
-                                st.session_state.user = res.json()
+                                login_data = res.json()
+                                st.session_state.token = login_data.pop("token", None)
+                                st.session_state.user = login_data
                                 st.rerun()
                             except ValueError:
                                 st.error("⚠️ Received invalid login data from the server.")
@@ -92,7 +177,7 @@ if st.session_state.user is None:
         if st.button("✨ Create Account", type="primary", use_container_width=True):
             payload = {"username":ru, "password":rp, "age":age, "height":height, "weight":weight, "goal":goal, "frequency":freq}
             try:
-                res = requests.post(f"{API_URL}/auth/register", json=payload)
+                res = api_session.post(f"{API_URL}/auth/register", json=payload)
             except requests.exceptions.ConnectionError:
                 st.error("🔌 Unable to connect to the FitAI Server. Please check if the backend is running.")
             except Exception:
@@ -104,6 +189,14 @@ if st.session_state.user is None:
                     st.warning(f"⚠️ Registration failed (server returned {res.status_code}). Please try again later.")
     st.stop()
 
+# Refresh the profile through the token session (cached server-side), so admin
+# edits show up without logging in again; an expired token logs the user out
+me_res = refresh_profile()
+if me_res is not None and me_res.status_code == 401:
+    st.session_state.user = None
+    st.session_state.token = None
+    st.rerun()
+
 user = st.session_state.user
 u_id = user['id']
 
@@ -134,8 +227,9 @@ with st.sidebar:
         prot = st.number_input("🥩 Protein (g)", 0, 500, 140, help="Daily protein intake")
         if st.button("💾 Save Daily Log", type="primary", use_container_width=True):
             try:
-                res = requests.post(
+                res = api_session.post(
                     f"{API_URL}/log/nutrition",
+                    headers=auth_headers(),
                     json={
                         "user_id": u_id,
                         "calories": cal,
@@ -149,6 +243,7 @@ with st.sidebar:
                 st.error("⚠️ An unexpected error occurred while contacting the FitAI Server.")
             else:
                 if res.status_code == 200:
+                    invalidate()
                     st.toast("✅ Saved & Mirrored to CSV")
                 else:
                     st.warning(f"⚠️ Failed to save nutrition log (server returned {res.status_code}).")
@@ -156,14 +251,18 @@ with st.sidebar:
     st.divider()
     
     st.caption("📰 Latest Fitness News")
-    with st.spinner("Fetching news..."):
-        for h in scraper.get_latest_articles(): 
-            st.caption(f"📍 {h}")
+    for h in scraper.get_latest_articles(): 
+        st.caption(f"📍 {h}")
     
     st.divider()
     
     if st.button("🚪 Logout", use_container_width=True):
+        try:
+            api_session.post(f"{API_URL}/auth/logout", headers=auth_headers(), timeout=5)
+        except requests.exceptions.RequestException:
+            pass
         st.session_state.user = None
+        st.session_state.token = None
         st.rerun()
 
 # --- TABS ---
@@ -171,35 +270,40 @@ titles = ["📋 Program", "📈 Analytics", "🤖 AI Coach", "🧮 Calculators"]
 if user['is_admin']: titles.append("🛠 Admin Panel")
 tabs = st.tabs(titles)
 
+# Program + analytics data in one round trip; the shared exercise catalog is cached separately
+dash = cached_json(f"{API_URL}/dashboard/{u_id}", "dashboard", "user",
+                   params={"fields": "exercises,metrics,nutrition_series,stats_series", "points": CHART_POINTS}) or {}
+
 # TAB 0: PROGRAM
 with tabs[0]:
     st.header("🏋️ Training Routine")
     st.caption("Log your workouts and track your progress")
     
-    my_ex = safe_request_json(requests.get, f"{API_URL}/exercises/user/{u_id}", "user exercises") or []
-    all_ex_list = safe_request_json(requests.get, f"{API_URL}/exercises/all", "exercise list") or []
+    my_ex = dash.get("exercises") or []
     my_ex_ids = {e['id'] for e in my_ex}
     
     with st.expander("🔍 Add Exercises to Your Program"):
         with st.container(border=True):
-            search = st.text_input("🔎 Search exercises...", placeholder="Type to filter exercises")
+            search = st.text_input("🔎 Search exercises...", placeholder="Type a name or muscle group")
             
-            # Get all exercises that can be added (not already in user's program)
-            available_exercises = [ex for ex in all_ex_list if ex['id'] not in my_ex_ids]
+            # Ranked server-side search; ask for extra rows to make up for the ones already in the program
+            matches = cached_json(f"{API_URL}/exercises/search", "exercise search", "catalog",
+                                  params={"q": search, "limit": min(100, SEARCH_RESULTS + len(my_ex_ids))}) or []
             
-            # Filter by search term if provided
-            if search:
-                available_exercises = [ex for ex in available_exercises if search.lower() in ex['name'].lower()]
+            # Only exercises that can be added (not already in user's program)
+            available_exercises = [ex for ex in matches if ex['id'] not in my_ex_ids][:SEARCH_RESULTS]
             
             if available_exercises:
-                st.caption(f"📋 Showing {len(available_exercises)} available exercise(s)")
+                st.caption(f"📋 Showing {len(available_exercises)} available exercise(s)"
+                           + ("" if search else " - type to search the full catalog"))
                 for ex in available_exercises:
                     col1, col2 = st.columns([3, 1])
                     col1.write(f"**{ex['name']}**")
                     if col2.button("➕ Add", key=f"a_{ex['id']}", use_container_width=True):
                         try:
-                            res = requests.post(
+                            res = api_session.post(
                                 f"{API_URL}/exercises/add",
+                                headers=auth_headers(),
                                 json={"user_id": u_id, "exercise_id": ex['id']},
                             )
                         except requests.exceptions.ConnectionError:
@@ -232,8 +336,9 @@ with tabs[0]:
                 col2.caption("Reps")
                 if col3.button("📝 Log Workout", key=f"l_{ex['id']}", type="primary", use_container_width=True):
                     try:
-                        res = requests.post(
+                        res = api_session.post(
                             f"{API_URL}/log/workout",
+                            headers=auth_headers(),
                             json={
                                 "user_id": u_id,
                                 "exercise_id": ex['id'],
@@ -248,13 +353,19 @@ with tabs[0]:
                         st.error("⚠️ An unexpected error occurred while contacting the FitAI Server.")
                     else:
                         if res.status_code == 200:
-                            st.toast("🎉 PR Logged!")
+                            invalidate()
+                            logged = res.json() or {}
+                            if logged.get("is_pr") and logged.get("previous_best_1rm") is not None:
+                                st.toast(f"🏆 New personal best: {logged['est_1rm']:.1f} kg estimated 1RM!")
+                            else:
+                                st.toast("🎉 PR Logged!")
                         else:
                             st.warning(f"⚠️ Failed to log workout (server returned {res.status_code}).")
                 if col4.button("🗑️", key=f"d_{ex['id']}", help="Remove exercise"):
                     try:
-                        res = requests.post(
+                        res = api_session.post(
                             f"{API_URL}/exercises/remove",
+                            headers=auth_headers(),
                             json={"user_id": u_id, "exercise_id": ex['id']},
                         )
                     except requests.exceptions.ConnectionError:
@@ -275,16 +386,16 @@ with tabs[1]:
     st.caption("Track your fitness journey with detailed analytics")
     
     # 1. TOP LEVEL METRICS
-    nutri_data = safe_request_json(requests.get, f"{API_URL}/data/nutrition/{u_id}", "nutrition data") or []
-    stats_data = safe_request_json(requests.get, f"{API_URL}/data/stats/{u_id}", "stats data") or []
+    metrics = dash.get("metrics") or {}
+    ndf = pd.DataFrame(dash.get("nutrition_series") or {})
+    sdf = pd.DataFrame(dash.get("stats_series") or {})
     
     with st.container(border=True):
         m_col1, m_col2, m_col3, m_col4 = st.columns(4)
         
-        if nutri_data:
-            ndf = pd.DataFrame(nutri_data)
-            avg_cal = int(ndf['total_calories'].mean())
-            avg_prot = int(ndf['total_protein'].mean())
+        if metrics.get("avg_calories") is not None:
+            avg_cal = int(metrics["avg_calories"])
+            avg_prot = int(metrics["avg_protein"])
             m_col1.metric("🔥 Avg Daily Calories", f"{avg_cal} kcal", delta=None)
             m_col2.metric("🥩 Avg Daily Protein", f"{avg_prot} g", delta=None)
         else:
@@ -292,12 +403,7 @@ with tabs[1]:
             m_col2.metric("🥩 Avg Daily Protein", "N/A", delta=None)
         
         m_col3.metric("⚖️ Current Weight", f"{user['weight']} kg")
-        height_m = (user['height'] / 100) if user['height'] else 0
-        if height_m > 0:
-            bmi_val = np.round(user['weight'] / (height_m**2), 1)
-            bmi_display = str(bmi_val)
-        else:
-            bmi_display = "N/A"
+        bmi_display = str(metrics["bmi"]) if metrics.get("bmi") is not None else "N/A"
         m_col4.metric("📊 Body BMI", bmi_display)
 
     st.divider()
@@ -305,9 +411,8 @@ with tabs[1]:
     # 2. METABOLIC TRENDS (Nutrition)
     with st.container(border=True):
         st.subheader("🍎 Metabolic Consistency")
-        if nutri_data:
-            ndf = pd.DataFrame(nutri_data)
-            ndf['date'] = pd.to_datetime(ndf['date'])
+        if not ndf.empty:
+            ndf['date'] = pd.to_datetime(ndf['date'], format="ISO8601", errors="coerce")
             
             fig_nutri = make_subplots(specs=[[{"secondary_y": True}]])
             
@@ -347,9 +452,8 @@ with tabs[1]:
     # 3. STRENGTH PROGRESSION
     with st.container(border=True):
         st.subheader("⚡ Strength Progression")
-        if stats_data:
-            sdf = pd.DataFrame(stats_data)
-            sdf['updated_at'] = pd.to_datetime(sdf['updated_at'])
+        if not sdf.empty:
+            sdf['updated_at'] = pd.to_datetime(sdf['updated_at'], format="ISO8601", errors="coerce")
             
             # Cleaner Line Plot using Plotly Express
             fig_stats = px.line(
@@ -381,19 +485,8 @@ with tabs[2]:
     with st.container(border=True):
         if st.button("🚀 Generate Performance & Nutrition Report", type="primary", use_container_width=True):
             with st.spinner("🔍 Analyzing performance trends and metabolic logs..."):
-                s_data = safe_request_json(requests.get, f"{API_URL}/data/stats/{u_id}", "stats data") or []
-                n_data = safe_request_json(requests.get, f"{API_URL}/data/nutrition/{u_id}", "nutrition data") or []
-
-                payload = {
-                    "username": user['username'],
-                    "weight": float(user['weight']),
-                    "age": int(user['age']),
-                    "goal": str(user['goal']),
-                    "stats": s_data,
-                    "nutrition": n_data,
-                }
-
-                res = safe_request_json(requests.post, f"{API_URL}/coach", "coach report", json=payload) or {}
+                # The server reads only the rows it needs straight from the database
+                res = safe_request_json(api_session.get, f"{API_URL}/coach/{u_id}", "coach report") or {}
             
             st.divider()
             
@@ -414,8 +507,15 @@ with tabs[2]:
                             st.success(item['msg'], icon="✅")
                         else:
                             st.chat_message("assistant").write(item['msg'])
-                
-                st.balloons() 
+
+                if res.get('percentiles'):
+                    st.subheader("📊 Where You Stand")
+                    for p in res['percentiles']:
+                        band = p['band']
+                        st.progress(p['percentile'] / 100, text=f"**{p['name']}:** stronger than {p['percentile']}% of lifters "
+                                                                f"at {band['weight']}, age {band['age']} (#{p['rank']} of {p['size']})")
+
+                st.balloons()
 # TAB 3: CALCULATORS
 with tabs[3]:
     st.header("🧮 1RM Predictor")
@@ -426,13 +526,14 @@ with tabs[3]:
         cw, cr = st.columns(2)
         w_val = cw.number_input("⚖️ Weight (kg)", 1.0, 500.0, 100.0, help="Weight lifted")
         r_val = cr.number_input("🔢 Reps", 1, 20, 5, help="Number of reps completed")
+        formula = st.selectbox("📐 Formula", list(FORMULAS), format_func=str.title, help="1RM estimation formula")
         
         if st.button("🎯 Predict Max", type="primary", use_container_width=True):
             res = safe_request_json(
-                requests.post,
+                api_session.post,
                 f"{API_URL}/predict_1rm",
                 "1RM prediction",
-                json={"weight": w_val, "reps": r_val},
+                json={"weight": w_val, "reps": r_val, "formula": formula},
             ) or {}
 
             if "one_rm" in res:
@@ -440,7 +541,7 @@ with tabs[3]:
 
                 with st.container(border=True):
                     st.success(f"💪 **Estimated 1RM: {res['one_rm']} kg**")
-                    st.caption("Based on your lift of {:.1f} kg for {} reps".format(w_val, r_val))
+                    st.caption("Based on your lift of {:.1f} kg for {} reps ({} formula)".format(w_val, r_val, formula.title()))
 
                 if "zones" in res:
                     st.divider()
@@ -471,7 +572,7 @@ if user['is_admin']:
         if target_table == "Users":
             with st.container(border=True):
                 st.subheader("👥 User Management")
-                all_users = safe_request_json(requests.get, f"{API_URL}/admin/users", "user list") or []
+                all_users = safe_request_json(api_session.get, f"{API_URL}/admin/users", "user list") or []
                 if all_users:
                     st.dataframe(pd.DataFrame(all_users), use_container_width=True, hide_index=True)
                 else:
@@ -512,7 +613,7 @@ if user['is_admin']:
                             "is_admin": 1 if new_is_admin else 0
                         }
                         try:
-                            response = requests.put(f"{API_URL}/admin/update_user/{edit_user_id}", json=payload)
+                            response = api_session.put(f"{API_URL}/admin/update_user/{edit_user_id}", json=payload, headers=auth_headers())
                         except requests.exceptions.ConnectionError:
                             st.error("🔌 Unable to connect to the FitAI Server. Please check if the backend is running.")
                         except Exception:
@@ -535,7 +636,7 @@ if user['is_admin']:
                 
                 if st.button("⚠️ Permanently Delete User", type="primary", use_container_width=True):
                     try:
-                        response = requests.delete(f"{API_URL}/admin/delete_user/{delete_user_id}")
+                        response = api_session.delete(f"{API_URL}/admin/delete_user/{delete_user_id}", headers=auth_headers())
                     except requests.exceptions.ConnectionError:
                         st.error("🔌 Unable to connect to the FitAI Server. Please check if the backend is running.")
                     except Exception:
@@ -559,8 +660,9 @@ if user['is_admin']:
                         new_ex_muscle = st.text_input("🎯 Target Muscle Group", "Full Body", placeholder="e.g., Legs, Chest, Back")
                         if st.button("💾 Save Exercise", type="primary", use_container_width=True):
                             try:
-                                res = requests.post(
+                                res = api_session.post(
                                     f"{API_URL}/admin/exercises/add",
+                                    headers=auth_headers(),
                                     json={"name": new_ex_name, "muscle_group": new_ex_muscle},
                                 )
                             except requests.exceptions.ConnectionError:
@@ -579,7 +681,7 @@ if user['is_admin']:
             # View/Delete Exercises
             with st.container(border=True):
                 st.subheader("📊 Exercise Database")
-                ex_list = safe_request_json(requests.get, f"{API_URL}/exercises/all", "exercise list") or []
+                ex_list = cached_json(f"{API_URL}/exercises/all", "exercise list", "catalog") or []
                 if ex_list:
                     df_ex = pd.DataFrame(ex_list)
                     st.dataframe(df_ex, use_container_width=True, hide_index=True)
@@ -593,7 +695,7 @@ if user['is_admin']:
                 ex_del_id = st.number_input("Exercise ID to Delete", step=1, min_value=1)
                 if st.button("⚠️ Permanently Delete Exercise", type="primary", use_container_width=True):
                     try:
-                        res = requests.delete(f"{API_URL}/admin/table/exercises/{ex_del_id}")
+                        res = api_session.delete(f"{API_URL}/admin/table/exercises/{ex_del_id}", headers=auth_headers())
                     except requests.exceptions.ConnectionError:
                         st.error("🔌 Unable to connect to the FitAI Server. Please check if the backend is running.")
                     except Exception:
@@ -611,12 +713,32 @@ if user['is_admin']:
                 st.subheader("📝 Edit Workout History")
                 u_search = st.number_input("🔍 Filter by User ID", value=1, step=1, min_value=1)
                 
-                logs = safe_request_json(requests.get, f"{API_URL}/data/stats/{u_search}", "workout logs") or []
+                # Pages are fetched lazily and kept while the user's data version is unchanged,
+                # so workouts logged or edited since (by anyone) reload the list from page 1
+                logs_key = f"workout_logs_{u_search}"
+                version = (safe_request_json(api_session.get, f"{API_URL}/data/version/{u_search}", "data version") or {}).get("data_version")
+                cached = st.session_state.get(logs_key)
+                if cached is None or version is None or cached["version"] != version:
+                    page = safe_request_json(
+                        api_session.get, f"{API_URL}/data/stats/{u_search}", "workout logs", params={"limit": LOG_PAGE_SIZE}
+                    ) or []
+                    cached = st.session_state[logs_key] = {"version": version, "logs": page, "more": len(page) == LOG_PAGE_SIZE}
+                logs = cached["logs"]
                 
                 if logs:
                     df_logs = pd.DataFrame(logs)
                     st.dataframe(df_logs, use_container_width=True, hide_index=True)
                     
+                    if cached["more"]:
+                        if st.button("⬇️ Load More Logs", use_container_width=True):
+                            page = safe_request_json(
+                                api_session.get, f"{API_URL}/data/stats/{u_search}", "workout logs",
+                                params={"limit": LOG_PAGE_SIZE, "after_id": logs[-1]['id']},
+                            ) or []
+                            cached["logs"] = logs + page
+                            cached["more"] = len(page) == LOG_PAGE_SIZE
+                            st.rerun()
+                    
                     st.divider()
                     
                     with st.container(border=True):
@@ -628,8 +750,9 @@ if user['is_admin']:
                         
                         if st.button("💾 Update Log Entry", type="primary", use_container_width=True):
                             try:
-                                res = requests.put(
+                                res = api_session.put(
                                     f"{API_URL}/admin/logs/workout/{log_id}",
+                                    headers=auth_headers(),
                                     json={"weight": new_w, "reps": new_r},
                                 )
                             except requests.exceptions.ConnectionError:
@@ -654,7 +777,7 @@ if user['is_admin']:
                 u_search_nutri = st.number_input("🔍 Filter by User ID", value=u_id, step=1, min_value=1, key="nutri_search")
                 
                 try:
-                    response = requests.get(f"{API_URL}/data/nutrition/{u_search_nutri}")
+                    response = api_session.get(f"{API_URL}/data/nutrition/{u_search_nutri}", headers=auth_headers())
                 except requests.exceptions.ConnectionError:
                     st.error("🔌 Unable to connect to the FitAI Server. Please check if the backend is running.")
                     response = None
@@ -701,7 +824,7 @@ if user['is_admin']:
                             "date": str(date)
                         }
                         try:
-                            res = requests.post(f"{API_URL}/log/nutrition", json=log_data)
+                            res = api_session.post(f"{API_URL}/log/nutrition", json=log_data, headers=auth_headers())
                         except requests.exceptions.ConnectionError:
                             st.error("🔌 Unable to connect to the FitAI Server. Please check if the backend is running.")
                         except Exception:
@@ -0,0 +1,101 @@
+import argparse
+from utils.database import DatabaseManager, MIRRORED_TABLES
+from utils.csv_mirror import CsvMirror
+from utils.importer import BulkImporter, TABLE_COLUMNS
+from utils.report_job import CoachReportJob
+
+def rebuild_csv(args):
+    db = DatabaseManager(args.db, csv_dir=None)
+    tables = args.tables or MIRRORED_TABLES
+    CsvMirror(db.get_connection, args.csv_dir, interval=0).rebuild(tables)
+    print(f"Rebuilt CSV mirror for: {', '.join(tables)}")
+
+def rebuild_rollup(args):
+    db = DatabaseManager(args.db, csv_dir=None)
+    db.rebuild_nutrition_rollup()
+    print("Rebuilt user_nutrition_daily from user_nutrition")
+
+def check_rollup(args):
+    db = DatabaseManager(args.db, csv_dir=None)
+    mismatches = db.check_nutrition_rollup()
+    if mismatches.empty:
+        print("Nutrition rollup is consistent")
+    else:
+        print(mismatches.to_string(index=False))
+        print(f"{len(mismatches)} inconsistent day(s); run 'rebuild-rollup' to repair")
+        raise SystemExit(1)
+
+def rebuild_summary(args):
+    db = DatabaseManager(args.db, csv_dir=None)
+    db.rebuild_exercise_summary()
+    print("Rebuilt user_exercise_summary from user_stats")
+
+def check_summary(args):
+    db = DatabaseManager(args.db, csv_dir=None)
+    mismatches = db.check_exercise_summary()
+    if mismatches.empty:
+        print("Exercise summary is consistent")
+    else:
+        print(mismatches.to_string(index=False))
+        print(f"{len(mismatches)} inconsistent row(s); run 'rebuild-summary' to repair")
+        raise SystemExit(1)
+
+def coach_reports(args):
+    db = DatabaseManager(args.db, csv_dir=None)
+    summary = CoachReportJob(db, workers=args.workers, chunk_size=args.chunk_size).run(force=args.force)
+    for user_id, error in summary["errors"]:
+        print(f"User {user_id}: {error}")
+    print(f"Wrote {summary['written']} of {summary['pending']} coach reports "
+          f"({summary['failed']} failed, {summary['users_per_sec']:,.0f} users/s)")
+
+def import_file(args):
+    db = DatabaseManager(args.db, csv_dir=None)
+    importer = BulkImporter(db, chunk_size=args.chunk_size, create_missing_exercises=args.create_missing_exercises,
+                            defer_indexes=not args.no_defer_indexes, hash_workers=args.hash_workers)
+    summary = importer.run(args.table, args.path, restart=args.restart)
+    print(f"Imported {summary['inserted']} of {summary['read']} rows into {args.table} "
+          f"({summary['skipped']} skipped, {summary['rows_per_sec']:,.0f} rows/s)")
+
+def main():
+    parser = argparse.ArgumentParser(description="FitAI database maintenance tasks")
+    parser.add_argument("--db", default="data/fitai.db", help="Path to the SQLite database")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("rebuild-csv", help="Rewrite the CSV backups from scratch")
+    p.add_argument("--csv-dir", default="data/csv_backups/")
+    p.add_argument("tables", nargs="*", help=f"Tables to rebuild (default: {' '.join(MIRRORED_TABLES)})")
+    p.set_defaults(func=rebuild_csv)
+
+    p = sub.add_parser("rebuild-rollup", help="Recompute the daily nutrition rollup from raw logs")
+    p.set_defaults(func=rebuild_rollup)
+
+    p = sub.add_parser("check-rollup", help="Verify the daily nutrition rollup against raw logs")
+    p.set_defaults(func=check_rollup)
+
+    p = sub.add_parser("rebuild-summary", help="Recompute the per-exercise workout summary from raw logs")
+    p.set_defaults(func=rebuild_summary)
+
+    p = sub.add_parser("check-summary", help="Verify the per-exercise workout summary against raw logs")
+    p.set_defaults(func=check_summary)
+
+    p = sub.add_parser("coach-reports", help="Build every user's coach report (resumable; only stale reports by default)")
+    p.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    p.add_argument("--chunk-size", type=int, default=200, help="Users per worker task")
+    p.add_argument("--force", action="store_true", help="Rebuild current reports too")
+    p.set_defaults(func=coach_reports)
+
+    p = sub.add_parser("import", help="Bulk-load a CSV/JSONL file (resumable)")
+    p.add_argument("table", choices=sorted(TABLE_COLUMNS))
+    p.add_argument("path", help="Source .csv, .jsonl or .ndjson file")
+    p.add_argument("--chunk-size", type=int, default=50000, help="Rows per transaction")
+    p.add_argument("--create-missing-exercises", action="store_true", help="Add unknown exercise names to the catalog")
+    p.add_argument("--no-defer-indexes", action="store_true", help="Keep secondary indexes during the load")
+    p.add_argument("--restart", action="store_true", help="Ignore saved progress and start from the first row")
+    p.add_argument("--hash-workers", type=int, default=None, help="Processes hashing plaintext passwords (default: CPU count)")
+    p.set_defaults(func=import_file)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,93 @@
 import pandas as pd
 import numpy as np
 
+def parse_times(values):
+    """
+    Datetimes from ISO-8601 strings of any precision - the database mixes
+    '2026-01-20 14:56' and '2026-01-20' - with NaT for unparseable values.
+    """
+    return pd.to_datetime(values, format="ISO8601", errors="coerce")
+
+def trend_metrics(df, group="name", time="updated_at", weight="pr", reps="reps", window=8):
+    """
+    Per-exercise trend metrics in one grouped pass; df is neither copied nor modified.
+    Rows must be chronological within each group. Metrics cover the last `window`
+    entries of each group (all entries when window is None):
+    - sessions: entries in the window
+    - slope: least-squares weight change per week
+    - avg_delta: mean change between consecutive entries (NaN for a single entry)
+    - volume: total weight x reps
+    - consistency: share of the weeks spanned that have at least one entry (0-1)
+    Times may mix ISO-8601 precisions; rows whose time can't be parsed are left out.
+    Returns a DataFrame indexed by group, in order of first appearance.
+    """
+    columns = ["sessions", "slope", "avg_delta", "volume", "consistency"]
+    times = None if df.empty else parse_times(df[time])
+    if times is not None and times.isna().any():
+        df, times = df[times.notna()], times.dropna()
+    if df.empty:
+        return pd.DataFrame(columns=columns, index=pd.Index([], name=group))
+    codes, names = pd.factorize(df[group])
+    if window is None:
+        mask = np.ones(len(df), dtype=bool)
+    else:
+        mask = df.groupby(codes, sort=False).cumcount(ascending=False).to_numpy() < window
+    codes = codes[mask]
+    k = len(names)
+    days = times.to_numpy(dtype="datetime64[D]").astype(np.int64)[mask].astype(float)
+    w = df[weight].to_numpy(dtype=float)[mask]
+    r = df[reps].to_numpy(dtype=float)[mask]
+
+    # Least squares via per-group sums; days are centred per group for precision
+    n = np.bincount(codes, minlength=k).astype(float)
+    t = days - (np.bincount(codes, days, k) / n)[codes]
+    st, sy = np.bincount(codes, t, k), np.bincount(codes, w, k)
+    stt, sty = np.bincount(codes, t * t, k), np.bincount(codes, t * w, k)
+    denom = n * stt - st * st
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = np.where(denom > 0, (n * sty - st * sy) / denom * 7, np.nan)
+
+    # First/last entry of each group inside the window (positions are chronological)
+    positions = np.arange(len(codes))
+    first = np.full(k, len(codes))
+    np.minimum.at(first, codes, positions)
+    last = np.zeros(k, dtype=int)
+    np.maximum.at(last, codes, positions)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        avg_delta = np.where(n > 1, (w[last] - w[first]) / (n - 1), np.nan)
+
+    weeks = np.floor_divide(days + 3, 7).astype(np.int64)  # Monday-based weeks (day 0 is a Thursday)
+    weeks -= weeks.min()
+    # Distinct (group, week) pairs, encoded as one integer key
+    stride = weeks.max() + 1
+    active = np.bincount(np.unique(codes * stride + weeks) // stride, minlength=k)
+    span = weeks[last] - weeks[first] + 1
+
+    values = [n.astype(int), slope, avg_delta, np.bincount(codes, w * r, k), active / span]
+    return pd.DataFrame(dict(zip(columns, values)), index=pd.Index(names, name=group))
+
 def compute_progress(df):
     """Return basic stats like average weight and volume."""
     if df.empty:
         return None
-    df["volume"] = df["sets"] * df["reps"] * df["weight"]
-    avg_volume = df.groupby("exercise")["volume"].mean().round(2)
-    return avg_volume
+    volume = df["sets"] * df["reps"] * df["weight"]
+    return volume.groupby(df["exercise"]).mean().round(2).rename("volume")
 
 def recommend_next_workout(df):
-    """Suggest increasing or maintaining weights based on trends."""
+    """
+    Suggest increasing or maintaining weights based on trends.
+    - df: the workout log (exercise, weight), or DatabaseManager.get_exercise_summary
+      rows, whose mean_delta is the same average step without reading the history
+    """
     if df.empty:
         return "Start logging your first workout!"
-    last = df.groupby("exercise")["weight"].tail(1)
+    if "mean_delta" in df.columns:
+        trends = df.set_index("name")["mean_delta"].astype(float)
+    else:
+        # One grouped pass instead of re-filtering the frame per exercise
+        trends = df.groupby("exercise", sort=False)["weight"].diff().groupby(df["exercise"], sort=False).mean()
     recommendation = []
-    for ex, w in last.items():
-        trend = df[df["exercise"] == ex]["weight"].diff().mean()
+    for ex, trend in trends.items():
         if trend > 0:
             recommendation.append(f"✅ Keep increasing {ex} gradually (avg +{trend:.1f} kg)")
         elif trend < 0:
@@ -24,3 +95,78 @@ def recommend_next_workout(df):
         else:
             recommendation.append(f"➡️ Maintain your {ex} performance for now")
     return "\n".join(recommendation)
+
+# pandas offsets for the aggregated chart resolutions; periods are labelled by their first day
+RESAMPLE_RULES = {"week": "W-MON", "month": "MS"}
+CHART_RESOLUTIONS = ("raw", "week", "month", "lttb")
+
+def lttb_indices(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets: positions of the `threshold` points that best
+    preserve the visual shape of y(x). x must be ascending.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # threshold-2 buckets between the fixed first and last point
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    # Centroid of each bucket's successor (the last bucket looks at the final point)
+    starts = np.append(edges[1:-1], n - 1)
+    sizes = np.diff(np.append(starts, n))
+    next_x = np.add.reduceat(x, starts) / sizes
+    next_y = np.add.reduceat(y, starts) / sizes
+
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs((x[a] - next_x[i]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y[i] - y[a]))
+        a = lo + int(area.argmax())
+        selected[i + 1] = a
+    return selected
+
+def chart_series(df, time_col, value_cols, resolution="lttb", points=300, by=None, how="mean"):
+    """
+    Reduces a time series to what a chart can display. Does not modify df.
+    - resolution "week"/"month": value_cols aggregated with `how` per period (and per `by` group)
+    - resolution "lttb": at most `points` rows per group for each value column
+      (LTTB; the union over value_cols is kept)
+    - resolution "raw": df unchanged
+    Rows must be in ascending time order within each group. Rows whose time does
+    not parse are left out of the period aggregates; with "lttb" they make the
+    whole frame come back unreduced rather than misplaced.
+    """
+    if resolution not in CHART_RESOLUTIONS:
+        raise ValueError(f"Unknown resolution: {resolution}")
+    if resolution in RESAMPLE_RULES and df.empty:
+        return df[([by] if by else []) + [time_col] + list(value_cols)]  # the aggregate's columns
+    if df.empty or resolution == "raw":
+        return df
+
+    times = parse_times(df[time_col])
+    if resolution in RESAMPLE_RULES:
+        keys = ([by] if by else []) + [pd.Grouper(key=time_col, freq=RESAMPLE_RULES[resolution], label="left", closed="left")]
+        out = (df.assign(**{time_col: times})
+                 .groupby(keys, sort=False)[list(value_cols)].agg(how)
+                 .dropna(how="all")
+                 .reset_index())
+        out[time_col] = out[time_col].dt.strftime("%Y-%m-%d")
+        return out
+
+    if times.isna().any():
+        return df
+    x = times.to_numpy(dtype="datetime64[ns]").astype(np.int64)
+    positions = np.arange(len(df))
+    groups = pd.factorize(df[by])[0] if by else np.zeros(len(df), dtype=int)
+    keep = []
+    for g in np.unique(groups):
+        idx = positions[groups == g]
+        if len(idx) <= points:
+            keep.append(idx)
+            continue
+        for col in value_cols:
+            keep.append(idx[lttb_indices(x[idx], df[col].to_numpy(dtype=float)[idx], points)])
+    return df.iloc[np.unique(np.concatenate(keep))]
@@ -0,0 +1,34 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+class AsyncDatabaseManager:
+    """
+    Async facade over DatabaseManager.
+    - Every public DatabaseManager method is available as a coroutine
+      (`await adb.get_user_stats(user_id)`)
+    - Blocking SQLite/pandas work runs on a dedicated executor sized to the
+      connection pool, so threads never queue for a connection
+    """
+
+    def __init__(self, db, max_workers=None):
+        self.db = db
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or db.pool.size, thread_name_prefix="db")
+
+    async def run(self, fn, *args, **kwargs):
+        """Runs any blocking callable on the database executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+
+    def __getattr__(self, name):
+        attr = getattr(self.db, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def method(*args, **kwargs):
+            return await self.run(attr, *args, **kwargs)
+        return method
+
+    def close(self):
+        self.executor.shutdown(wait=True)
@@ -1,17 +1,46 @@
 import hashlib
+import hmac
+import os
+import re
 import secrets
 
-def hash_password(password: str) -> str:
-    """Creates a secure salt + hash for the password."""
-    salt = secrets.token_hex(8)
-    hash_obj = hashlib.sha256(f"{salt}{password}".encode())
-    return f"{salt}${hash_obj.hexdigest()}"
+# scrypt cost settings for new hashes; existing hashes keep the settings stored with them
+SCRYPT_N = int(os.getenv("FITAI_SCRYPT_N", 2 ** 14))
+SCRYPT_R = int(os.getenv("FITAI_SCRYPT_R", 8))
+SCRYPT_P = int(os.getenv("FITAI_SCRYPT_P", 1))
+
+# The two formats verify_password understands: scrypt$n$r$p$salt$hash and the legacy 16-hex salt$sha256
+_HASH_FORMATS = re.compile(r"scrypt\$\d+\$\d+\$\d+\$[0-9a-f]+\$[0-9a-f]{64}|[0-9a-f]{16}\$[0-9a-f]{64}")
+
+def _scrypt(password: str, salt: str, n: int, r: int, p: int) -> str:
+    return hashlib.scrypt(password.encode(), salt=salt.encode(), n=n, r=r, p=p,
+                          maxmem=256 * r * (n + p), dklen=32).hex()
+
+def hash_password(password: str, n: int = None, r: int = None, p: int = None) -> str:
+    """Creates a salted scrypt hash stored as scrypt$n$r$p$salt$hash."""
+    n, r, p = n or SCRYPT_N, r or SCRYPT_R, p or SCRYPT_P
+    salt = secrets.token_hex(16)
+    return f"scrypt${n}${r}${p}${salt}${_scrypt(password, salt, n, r, p)}"
 
 def verify_password(stored_password: str, provided_password: str) -> bool:
-    """Verifies a provided password against the salt$hash stored in DB."""
+    """Verifies a password against a scrypt hash or a legacy salt$sha256 hash, in constant time."""
     try:
-        salt, hashed = stored_password.split("$")
-        hash_obj = hashlib.sha256(f"{salt}{provided_password}".encode())
-        return hash_obj.hexdigest() == hashed
+        parts = stored_password.split("$")
+        if parts[0] == "scrypt":
+            _, n, r, p, salt, hashed = parts
+            candidate = _scrypt(provided_password, salt, int(n), int(r), int(p))
+        else:
+            salt, hashed = parts
+            candidate = hashlib.sha256(f"{salt}{provided_password}".encode()).hexdigest()
+        return hmac.compare_digest(candidate, hashed)
     except (ValueError, AttributeError):
-        return False
\ No newline at end of file
+        return False
+
+def is_password_hash(value) -> bool:
+    """True when `value` is a stored hash (scrypt or legacy), not a plaintext password."""
+    return isinstance(value, str) and _HASH_FORMATS.fullmatch(value) is not None
+
+def needs_rehash(stored_password: str) -> bool:
+    """True for legacy hashes and scrypt hashes made with other cost settings."""
+    parts = (stored_password or "").split("$")
+    return parts[0] != "scrypt" or parts[1:4] != [str(SCRYPT_N), str(SCRYPT_R), str(SCRYPT_P)]
@@ -0,0 +1,174 @@
+import re
+import threading
+from bisect import bisect_left
+from collections import Counter
+from heapq import merge
+
+# A word is a typo match for a query word when their trigram Jaccard similarity reaches
+# MIN_SIMILARITY, or when it is within this many edits (1 for words up to 5 characters)
+MIN_SIMILARITY = 0.3
+MAX_EDITS = 2
+
+def _words(text):
+    """Lowercased alphanumeric words of `text`."""
+    return re.findall(r"[a-z0-9]+", str(text or "").lower())
+
+def _trigrams(words):
+    """Distinct trigrams of space-padded words, so short words and word edges count too."""
+    return {f" {w} "[i:i + 3] for w in words for i in range(len(w))}
+
+def _edit_distance(a, b):
+    """Optimal string alignment distance: insertions, deletions, substitutions and adjacent swaps."""
+    prev2, prev = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        row = [i]
+        for j, cb in enumerate(b, 1):
+            cost = min(prev[j] + 1, row[j - 1] + 1, prev[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cost = min(cost, prev2[j - 2] + 1)
+            row.append(cost)
+        prev2, prev = prev, row
+    return prev[-1]
+
+class _Index:
+    """Immutable snapshot of the catalog: readers grab one reference and never see a half-built index."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        keyed = sorted((" ".join(_words(r["name"])), r["id"], r) for r in rows)
+        self.entries = [r for _, _, r in keyed]  # position -> row, in alphabetical order
+        self.names = [name for name, _, _ in keyed]  # position -> normalized name (sorted: a name prefix is one range)
+        self.name_words = []     # position -> name words
+        self.all_words = []      # position -> name + muscle group words
+        self.name_postings = {}  # word -> ascending positions of the entries with it in their name
+        self.all_postings = {}   # word -> ascending positions of the entries with it in name or muscle group
+        groups = {}  # muscle group -> words; there are few distinct ones
+        for pos, (name, _, row) in enumerate(keyed):
+            group = row.get("muscle_group")
+            if group not in groups:
+                groups[group] = _words(group)
+            words = name.split()
+            every = words + groups[group]
+            self.name_words.append(words)
+            self.all_words.append(every)
+            for word in dict.fromkeys(words):
+                self.name_postings.setdefault(word, []).append(pos)
+            for word in dict.fromkeys(every):
+                self.all_postings.setdefault(word, []).append(pos)
+        # Typo and substring matching runs on the distinct words, not on the entries
+        self.vocab = sorted(self.all_postings)
+        self.vocab_grams = {}   # trigram -> words containing it
+        self.gram_counts = {}   # word -> number of distinct trigrams
+        for word in self.vocab:
+            grams = _trigrams([word])
+            self.gram_counts[word] = len(grams)
+            for gram in grams:
+                self.vocab_grams.setdefault(gram, []).append(word)
+
+    def prefixed(self, term):
+        """Words starting with `term`."""
+        return set(self.vocab[bisect_left(self.vocab, term):bisect_left(self.vocab, term + "\uffff")])
+
+    def containing(self, term):
+        """Words containing `term` (3+ characters), via the rarest of its trigrams."""
+        if len(term) < 3:
+            return set()
+        candidates = min((self.vocab_grams.get(term[i:i + 3], []) for i in range(len(term) - 2)), key=len)
+        return {word for word in candidates if term in word}
+
+    def similar(self, term):
+        """Typo matches of `term` (3+ characters): words sharing a trigram with it, kept when similar enough."""
+        if len(term) < 3:
+            return set()
+        grams = _trigrams([term])
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.vocab_grams.get(gram, ()))
+        edits = 1 if len(term) <= 5 else MAX_EDITS
+        return {word for word, n in shared.items()
+                if n / (len(grams) + self.gram_counts[word] - n) >= MIN_SIMILARITY
+                or (abs(len(word) - len(term)) <= edits and _edit_distance(term, word) <= edits)}
+
+class ExerciseCatalog:
+    """
+    Process-wide in-memory copy of the exercises table with a ranked search.
+    - sync() reloads only when catalog_version moved: every insert, update or
+      delete on exercises bumps it (triggers), whichever process wrote it
+    - search() ranks exact/prefix name matches, then entries where every query
+      word starts a word of the name, then of the name or muscle group, then is
+      inside one, then is similar to one (typos, trigram similarity); alphabetical
+      within a tier
+    - Each tier stops as soon as `limit` is filled, so common queries never scan
+      the whole catalog
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._index = _Index([])
+        self._version = None
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    def sync(self):
+        """Reloads the catalog if it changed since the last load. Returns True when it did."""
+        version = self.db.get_catalog_version()
+        if version == self._version:
+            return False
+        with self._lock:
+            if version == self._version:
+                return False
+            self._index = _Index(self.db.get_exercises(as_frame=False))
+            self._version = version
+            self.builds += 1
+            return True
+
+    def all(self):
+        """Every exercise (list of dicts, table order). Callers must not mutate it."""
+        return self._index.rows
+
+    def search(self, query, limit=20):
+        """Up to `limit` exercises matching `query`, best match first. An empty query lists them alphabetically."""
+        index = self._index
+        terms = _words(query)
+        if not terms:
+            return index.entries[:limit]
+        found, seen = [], set()
+
+        def take(positions, matches=None):
+            for pos in positions:
+                if pos not in seen and (matches is None or matches(pos)):
+                    seen.add(pos)
+                    found.append(pos)
+                    if len(found) >= limit:
+                        return True
+            return False
+
+        def take_matching(alternatives, postings, words_of):
+            # Entries where every term matches one of its alternative words. The term with the fewest
+            # entries drives: its posting lists are merged lazily (alphabetical), the others are checked
+            sizes = [sum(len(postings.get(word, ())) for word in words) for words in alternatives]
+            driver = sizes.index(min(sizes))
+            if not sizes[driver]:
+                return False
+            others = alternatives[:driver] + alternatives[driver + 1:]
+            stream = merge(*(postings[word] for word in alternatives[driver] if word in postings))
+            return take(stream, lambda pos: all(any(word in words for word in words_of[pos]) for words in others))
+
+        phrase = " ".join(terms)
+        names = index.names
+        prefixes = [index.prefixed(t) for t in terms]
+        if (take(range(bisect_left(names, phrase), bisect_left(names, phrase + "\uffff")))
+                or take_matching(prefixes, index.name_postings, index.name_words)
+                or take_matching(prefixes, index.all_postings, index.all_words)):
+            return [index.entries[pos] for pos in found]
+        substrings = [words | index.containing(t) for t, words in zip(terms, prefixes)]
+        if substrings != prefixes and take_matching(substrings, index.all_postings, index.all_words):
+            return [index.entries[pos] for pos in found]
+        fuzzy = [words | index.similar(t) for t, words in zip(terms, substrings)]
+        if fuzzy != substrings:
+            take_matching(fuzzy, index.all_postings, index.all_words)
+        return [index.entries[pos] for pos in found]
+
+    def stats(self):
+        return {"exercises": len(self._index.rows), "words": len(self._index.vocab),
+                "version": self._version, "builds": self.builds}
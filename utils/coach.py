@@ -0,0 +1,157 @@
+import numpy as np
+import pandas as pd
+from utils.analysis import trend_metrics
+
+# Strength Standards (Multiplier of Bodyweight)
+STANDARDS = {
+    "Bench Press": {"beg": 0.7, "int": 1.0, "adv": 1.5},
+    "Squat": {"beg": 1.0, "int": 1.5, "adv": 2.0},
+    "Deadlift": {"beg": 1.25, "int": 1.8, "adv": 2.5},
+    "Overhead Press": {"beg": 0.5, "int": 0.75, "adv": 1.0}
+}
+# Vectorized lookup table for STANDARDS (index = exercise name)
+STANDARDS_TABLE = pd.DataFrame.from_dict(STANDARDS, orient="index")
+
+LEVELS = ["Novice", "Intermediate", "Advanced/Elite"]
+LEVEL_STATUS = ["info", "success", "strength"]
+
+# Sessions per exercise the trend advice looks at; stalls within +/- TREND_FLAT kg/week
+TREND_WINDOW = 8
+TREND_MIN_SESSIONS = 3
+TREND_FLAT = 0.5
+
+def strength_advice(stats_df, weight):
+    """Classifies the latest lift of every exercise against STANDARDS in one pass."""
+    latest = stats_df.sort_values('updated_at', kind='stable').groupby('name')['pr'].last()
+    return _standards_messages(latest, weight)
+
+def _standards_messages(latest, weight):
+    """latest: Series of the current weight per exercise name."""
+    std = STANDARDS_TABLE.reindex(latest.index)
+    ratio = latest.to_numpy() / weight
+    level = np.select([ratio < std['beg'].to_numpy(), ratio < std['int'].to_numpy()], [0, 1], 2)
+    is_major = std['beg'].notna().to_numpy()
+
+    advice = []
+    for name, pr, r, lvl, major in zip(latest.index, latest.tolist(), ratio.tolist(), level, is_major):
+        if major:
+            advice.append({"type": LEVEL_STATUS[lvl], "msg": f"🏋️ **{name} Check:** Your {pr}kg lift is {round(r,2)}x BW ({LEVELS[lvl]}). Focus on form and consistent loading."})
+        else:
+            # For non-major lifts, just check the trend
+            advice.append({"type": "info", "msg": f"💪 **{name}:** You are currently moving {pr}kg. Keep tracking to see your 4-week trend."})
+    return advice
+
+def progression_advice(stats_df):
+    """PR alerts: last vs second-to-last entry of every exercise, in order of first appearance."""
+    codes, names = pd.factorize(stats_df['name'])
+    from_end = stats_df.groupby(codes, sort=False).cumcount(ascending=False).to_numpy()
+    pr = stats_df['pr'].to_numpy()
+
+    last_idx = np.full(len(names), -1)
+    prev_idx = np.full(len(names), -1)
+    last_idx[codes[from_end == 0]] = np.flatnonzero(from_end == 0)
+    prev_idx[codes[from_end == 1]] = np.flatnonzero(from_end == 1)
+
+    has_prev = prev_idx >= 0
+    return _pr_alerts(names[has_prev], pr[last_idx[has_prev]], pr[prev_idx[has_prev]])
+
+def _pr_alerts(names, recent, prev):
+    improved = recent > prev
+    return [
+        {"type": "success", "msg": f"🔥 **PR Alert:** You increased your {name} by {round(r-p,1)}kg. This is effective 'Overload'!"}
+        for name, r, p in zip(np.asarray(names)[improved], recent[improved].tolist(), prev[improved].tolist())
+    ]
+
+def summary_advice(summary_df, weight):
+    """
+    Standards checks and PR alerts straight from DatabaseManager.get_exercise_summary rows
+    (one per exercise, in order of first appearance) instead of the history.
+    """
+    latest = summary_df.sort_values('latest_at', kind='stable').groupby('name')['latest_pr'].last()
+    has_prev = summary_df['previous_pr'].notna().to_numpy()
+    recent = summary_df['latest_pr'].to_numpy(dtype=float)[has_prev]
+    prev = summary_df['previous_pr'].to_numpy(dtype=float)[has_prev]
+    return _standards_messages(latest, weight) + _pr_alerts(summary_df['name'].to_numpy()[has_prev], recent, prev)
+
+def trend_advice(stats_df):
+    """Slope and consistency over the last TREND_WINDOW sessions of every exercise with enough data."""
+    trends = trend_metrics(stats_df, window=TREND_WINDOW)
+    trends = trends[trends['sessions'] >= TREND_MIN_SESSIONS]
+
+    advice = []
+    for name, n, slope, consistency in zip(trends.index, trends['sessions'], trends['slope'], trends['consistency']):
+        if slope >= TREND_FLAT:
+            advice.append({"type": "success", "msg": f"📈 **{name} Trend:** +{round(slope,1)}kg/week over your last {n} sessions. Keep the progression going."})
+        elif slope <= -TREND_FLAT:
+            advice.append({"type": "warning", "msg": f"📉 **{name} Trend:** {round(slope,1)}kg/week over your last {n} sessions. Check sleep, calories and overall training stress."})
+        else:
+            advice.append({"type": "plateau", "msg": f"⏸️ **{name} Plateau:** Your load has been flat for {n} sessions. Change the rep range or take a light week."})
+        if consistency < 0.5:
+            advice.append({"type": "warning", "msg": f"📅 **{name} Consistency:** Trained in only {int(consistency * 100)}% of the weeks. Regular exposure drives progress more than single heavy days."})
+    return advice
+
+def build_report(stats_df, nutri_df, weight, age, goal, summary_df=None):
+    """
+    Builds the AI coach report.
+    - stats_df: name, pr, reps, updated_at rows in chronological order (the
+      last TREND_WINDOW per exercise are enough)
+    - nutri_df: date, total_calories, total_protein rows (at least the last 5 days)
+    - summary_df: optional get_exercise_summary rows; when given, the
+      standards checks and PR alerts read them instead of stats_df
+    Raises ValueError for an unusable bodyweight.
+    """
+    advice = []
+    goal = goal.lower()
+
+    # If there is no stats or nutrition data, return a friendly message
+    if stats_df.empty and nutri_df.empty:
+        return [
+            {
+                "type": "info",
+                "msg": "Not enough data yet. Log at least one workout and one meal to receive an in-depth AI analysis."
+            }
+        ]
+
+    if weight is None or weight <= 0:
+        raise ValueError("Invalid weight value for analysis.")
+
+    # --- 1. BIOMETRIC & AGE ANALYSIS ---
+    if age < 25:
+        advice.append({"type": "info", "msg": "🧬 **Metabolic Profile:** At your age, your recovery capacity is peak. You can handle higher training volume (reps/sets) than older athletes."})
+    elif age > 45:
+        advice.append({"type": "warning", "msg": "🧬 **Recovery Profile:** Joint integrity and hormonal recovery take longer at 45+. Prioritize 8 hours of sleep and consider a 1:4 deload cycle (3 weeks on, 1 week light)."})
+
+    # --- 2. GLOBAL STRENGTH ASSESSMENT ---
+    if not stats_df.empty:
+        if summary_df is not None:
+            # --- 2 + 3. STANDARDS AND PROGRESSION FROM THE RUNNING AGGREGATES ---
+            advice.extend(summary_advice(summary_df, weight))
+        else:
+            advice.extend(strength_advice(stats_df, weight))
+
+            # --- 3. PROGRESSION CHECK (DELTAS) ---
+            advice.extend(progression_advice(stats_df))
+
+        # --- 3b. TRENDS (LAST TREND_WINDOW SESSIONS) ---
+        if {'reps', 'updated_at'} <= set(stats_df.columns):
+            advice.extend(trend_advice(stats_df))
+
+    # --- 4. NUTRITION & CALORIC JUDGMENT ---
+    if not nutri_df.empty:
+        avg_cal = nutri_df.tail(5)['total_calories'].mean()
+        avg_prot = nutri_df.tail(5)['total_protein'].mean()
+        prot_ratio = avg_prot / weight
+
+        # Caloric check based on goal
+        if goal == "bulk" and avg_cal < (weight * 34):
+            advice.append({"type": "warning", "msg": f"🍎 **Bulk Warning:** You're averaging {int(avg_cal)} kcal. For growth at {weight}kg, you need closer to {int(weight * 38)} kcal."})
+        elif goal == "cut" and avg_cal > (weight * 28):
+            advice.append({"type": "warning", "msg": f"📉 **Cut Warning:** Your calories ({int(avg_cal)}) are a bit high for fat loss. Aim for ~{int(weight * 24)} kcal."})
+
+        # Protein Floor
+        if prot_ratio < 1.6:
+            advice.append({"type": "plateau", "msg": f"🥩 **Protein Deficiency:** {round(prot_ratio,1)}g/kg is too low. To protect muscle, aim for {int(weight * 2.0)}g total protein."})
+        else:
+            advice.append({"type": "success", "msg": f"✅ **Protein Target Hit:** {round(prot_ratio,1)}g/kg is excellent for recovery."})
+
+    return advice
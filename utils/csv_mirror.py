@@ -0,0 +1,154 @@
+import csv
+import os
+import threading
+import atexit
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, so keep to one writing process per csv_dir
+    fcntl = None
+
+LOCK_FILE = ".mirror.lock"
+
+class CsvMirror:
+    """
+    Mirrors SQLite tables to CSV files without rewriting them on every write.
+    - Inserts are appended after the last id already in the file, re-read on
+      every append, so several processes (API workers, maintenance.py) can
+      mirror into one directory without duplicating rows
+    - Each table write holds an exclusive lock on csv_dir/.mirror.lock
+    - Updates/deletes mark the table for a full rewrite
+    - Pending work is coalesced and flushed every `interval` seconds by a
+      background thread (interval <= 0 flushes synchronously on each write)
+    """
+
+    def __init__(self, connect, csv_dir, interval=2.0):
+        self.connect = connect
+        self.csv_dir = csv_dir
+        self.interval = interval
+        self._high_water = {}
+        self._pending = set()
+        self._rewrite = set()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        if not os.path.exists(self.csv_dir):
+            os.makedirs(self.csv_dir)
+        if self.interval > 0:
+            self._thread = threading.Thread(target=self._run, name="csv-mirror", daemon=True)
+            self._thread.start()
+        atexit.register(self.close)
+
+    def _path(self, table_name):
+        return os.path.join(self.csv_dir, f"{table_name}.csv")
+
+    def mark(self, table_name, rewrite=False):
+        """Records that `table_name` changed; rewrite=True for updates/deletes."""
+        with self._lock:
+            self._pending.add(table_name)
+            if rewrite:
+                self._rewrite.add(table_name)
+        if self.interval <= 0:
+            self.flush()
+
+    def flush(self):
+        """Writes all pending changes. Safe to call from any thread."""
+        with self._flush_lock:
+            with self._lock:
+                pending, rewrite = self._pending, self._rewrite
+                self._pending, self._rewrite = set(), set()
+            for table_name in pending:
+                try:
+                    with self._dir_lock():
+                        if table_name in rewrite or table_name not in self._high_water or not os.path.exists(self._path(table_name)):
+                            self._rebuild_table(table_name)
+                        else:
+                            self._append_table(table_name)
+                except Exception as e:
+                    print(f"Sync Error for {table_name}: {e}")
+                    # Retry as a full rewrite on the next flush
+                    with self._lock:
+                        self._pending.add(table_name)
+                        self._rewrite.add(table_name)
+
+    def rebuild(self, tables):
+        """Full rewrite of the given tables (recovery mode)."""
+        for t in tables:
+            with self._lock:
+                self._pending.add(t)
+                self._rewrite.add(t)
+        self.flush()
+
+    @contextmanager
+    def _dir_lock(self):
+        """Exclusive lock shared with every process mirroring into csv_dir (released on close)."""
+        with open(os.path.join(self.csv_dir, LOCK_FILE), "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+
+    @staticmethod
+    def _last_id(path, tail=65536):
+        """id (first column) of the file's last row, 0 for a header-only file, None if it can't be read."""
+        with open(path, "rb") as f:
+            size = f.seek(0, os.SEEK_END)
+            f.seek(max(0, size - tail))
+            lines = f.read().splitlines()
+        if not lines:
+            return None
+        if len(lines) == 1 and size <= tail:
+            return 0
+        try:
+            return int(next(csv.reader([lines[-1].decode()]))[0])
+        except (ValueError, IndexError, UnicodeDecodeError):
+            return None
+
+    @staticmethod
+    def _columns(conn, table_name):
+        """Stored columns only; generated (derived) columns are not backed up."""
+        return ", ".join(row[1] for row in conn.execute(f"PRAGMA table_xinfo({table_name})") if row[6] == 0)
+
+    def _rebuild_table(self, table_name):
+        path = self._path(table_name)
+        tmp_path = f"{path}.tmp"
+        with self.connect() as conn:
+            cursor = conn.execute(f"SELECT rowid, {self._columns(conn, table_name)} FROM {table_name} ORDER BY rowid")
+            high_water = 0
+            with open(tmp_path, "w", newline="") as f:
+                writer = csv.writer(f, lineterminator="\n")
+                writer.writerow([d[0] for d in cursor.description[1:]])
+                while True:
+                    rows = cursor.fetchmany(5000)
+                    if not rows:
+                        break
+                    high_water = rows[-1][0]
+                    writer.writerows(r[1:] for r in rows)
+        os.replace(tmp_path, path)
+        self._high_water[table_name] = high_water
+
+    def _append_table(self, table_name):
+        # The file, not this process, knows what was written: another process may have appended or rewritten it
+        high_water = self._last_id(self._path(table_name))
+        if high_water is None:
+            self._rebuild_table(table_name)
+            return
+        with self.connect() as conn:
+            cursor = conn.execute(f"SELECT rowid, {self._columns(conn, table_name)} FROM {table_name} WHERE rowid > ? ORDER BY rowid", (high_water,))
+            rows = cursor.fetchall()
+        if not rows:
+            return
+        with open(self._path(table_name), "a", newline="") as f:
+            writer = csv.writer(f, lineterminator="\n")
+            writer.writerows(r[1:] for r in rows)
+        self._high_water[table_name] = rows[-1][0]
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def close(self):
+        """Stops the background thread and writes anything still pending."""
+        self._stop.set()
+        self.flush()
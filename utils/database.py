@@ -1,27 +1,73 @@
+import json
 import sqlite3
 import pandas as pd
-import os
-from utils.auth import hash_password, verify_password
+from utils.auth import hash_password, verify_password, needs_rehash
+from utils.csv_mirror import CsvMirror
+from utils.db_pool import ConnectionPool
+from utils.migrations import MIGRATIONS, EXERCISE_SUMMARY_SELECT
+
+MIRRORED_TABLES = ['users', 'exercises', 'user_stats', 'user_nutrition']
+DASHBOARD_FIELDS = ('profile', 'metrics', 'latest_prs', 'exercises', 'nutrition_series', 'stats_series')
+NAME_COLUMNS = {'users': 'username', 'exercises': 'name'}
 
 class DatabaseManager:
-    def __init__(self, db_path="data/fitai.db"):
+    def __init__(self, db_path="data/fitai.db", csv_dir="data/csv_backups/", csv_flush_interval=2.0, pool_size=8):
         self.db_path = db_path
-        self.csv_dir = "data/csv_backups/"
-        if not os.path.exists(self.csv_dir):
-            os.makedirs(self.csv_dir)
+        self.pool = ConnectionPool(db_path, size=pool_size, timeout=20)
+        self.csv_dir = csv_dir
+        # csv_dir=None disables mirroring (batch tools, benchmarks)
+        self.mirror = CsvMirror(self.get_connection, csv_dir, csv_flush_interval) if csv_dir else None
         self.create_tables()
 
     def get_connection(self):
-        return sqlite3.connect(self.db_path, timeout=20)
+        """Checks out a pooled connection; use as `with db.get_connection() as conn:`."""
+        return self.pool.connection()
 
-    def _sync_to_csv(self, table_name):
-        """Internal method to mirror DB data to CSV."""
-        try:
+    def _sync_to_csv(self, table_name, rewrite=False):
+        """Queues a CSV mirror update. Inserts are appended; pass rewrite=True after updates/deletes."""
+        if self.mirror:
+            self.mirror.mark(table_name, rewrite=rewrite)
+
+    def _read(self, query, params=(), as_frame=True):
+        """Runs a SELECT. Returns a DataFrame, or a list of dicts when as_frame=False (skips pandas on hot API paths)."""
+        with self.get_connection() as conn:
+            if as_frame:
+                return pd.read_sql(query, conn, params=params)
+            return self._fetch_dicts(conn, query, params)
+
+    @staticmethod
+    def _fetch_dicts(conn, query, params=()):
+        cursor = conn.execute(query, params)
+        columns = [d[0] for d in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor]
+
+    @staticmethod
+    def _fetch_columns(conn, query, params=()):
+        """Column-oriented result ({column: [values]}), ready for charting."""
+        cursor = conn.execute(query, params)
+        columns = [d[0] for d in cursor.description]
+        rows = cursor.fetchall()
+        return {c: [row[i] for row in rows] for i, c in enumerate(columns)}
+
+    def _iter_pages(self, page, key, limit=None, batch_size=500):
+        """
+        Generator over a keyset-paginated SELECT as dicts.
+        - page(after, n) builds the (query, params) of the next n rows after `after`
+          (None for the first page); key(row) is the `after` of the following page
+        - A pooled connection is checked out per page and returned before rows are
+          yielded, so slow stream consumers never pin the pool
+        """
+        after, remaining = None, limit
+        while remaining is None or remaining > 0:
+            size = batch_size if remaining is None else min(batch_size, remaining)
             with self.get_connection() as conn:
-                df = pd.read_sql(f"SELECT * FROM {table_name}", conn)
-                df.to_csv(f"{self.csv_dir}{table_name}.csv", index=False)
-        except Exception as e:
-            print(f"Sync Error for {table_name}: {e}")
+                rows = self._fetch_dicts(conn, *page(after, size))
+            yield from rows
+            if len(rows) < size:
+                return
+            after = key(rows[-1])
+            if remaining is not None:
+                remaining -= len(rows)
 
     def create_tables(self):
         with self.get_connection() as conn:
@@ -37,11 +83,32 @@ class DatabaseManager:
             cursor.execute("CREATE TABLE IF NOT EXISTS user_stats (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER, exercise_id INTEGER, pr REAL, reps INTEGER, updated_at TEXT)")
             cursor.execute("CREATE TABLE IF NOT EXISTS user_nutrition (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER, calories INTEGER, protein INTEGER, date TEXT)")
             conn.commit()
-        for t in ['users', 'exercises', 'user_stats', 'user_nutrition']: 
-            self._sync_to_csv(t)
+        self.migrate()
+        for t in MIRRORED_TABLES:
+            self._sync_to_csv(t, rewrite=True)
 
-    def add_user(self, username, password, age, height, weight, goal, frequency, is_admin=0):
-        hashed = hash_password(password)
+    def migrate(self):
+        """Applies pending MIGRATIONS in order, one transaction per step. Returns the schema version."""
+        with self.get_connection() as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for step, description, statements in MIGRATIONS:
+                if step <= version:
+                    continue
+                conn.execute("BEGIN IMMEDIATE")
+                # Another process may have migrated while we waited for the lock
+                if conn.execute("PRAGMA user_version").fetchone()[0] >= step:
+                    conn.rollback()
+                    continue
+                for sql in statements:
+                    conn.execute(sql)
+                conn.execute(f"PRAGMA user_version = {step}")
+                conn.commit()
+                print(f"Applied schema migration {step}: {description}")
+            return conn.execute("PRAGMA user_version").fetchone()[0]
+
+    def add_user(self, username, password, age, height, weight, goal, frequency, is_admin=0, password_hash=None):
+        """password_hash lets callers hash off-thread (see the API's auth process pool)."""
+        hashed = password_hash or hash_password(password)
         try:
             with self.get_connection() as conn:
                 conn.execute("""
@@ -54,29 +121,308 @@ class DatabaseManager:
         except sqlite3.IntegrityError: 
             return False
 
-    def get_user(self, username, password):
+    def get_user_record(self, username):
+        """Returns the user row including the stored password hash, without verifying anything."""
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, username, password, age, height, weight, goal, frequency, is_admin FROM users WHERE username = ?", (username,))
-            user = cursor.fetchone()
-            if user and verify_password(user[2], password): 
-                return user
-        return None
+            return conn.execute("SELECT id, username, password, age, height, weight, goal, frequency, is_admin FROM users WHERE username = ?", (username,)).fetchone()
 
-    def get_all_users(self):
+    def update_password_hash(self, user_id, hashed):
         with self.get_connection() as conn:
-            return pd.read_sql("SELECT id, username, age, height, weight, goal, frequency, is_admin FROM users", conn)
+            conn.execute("UPDATE users SET password = ? WHERE id = ?", (hashed, user_id))
+        self._sync_to_csv('users', rewrite=True)
+
+    def get_user(self, username, password):
+        """Verifies credentials; legacy or outdated hashes are upgraded on a successful login."""
+        user = self.get_user_record(username)
+        if user and verify_password(user[2], password):
+            if needs_rehash(user[2]):
+                self.update_password_hash(user[0], hash_password(password))
+            return user
+        return None
+
+    def get_user_profile(self, user_id):
+        """Returns the public profile fields of one user as a dict, or None."""
+        rows = self._read("SELECT id, username, age, height, weight, goal, frequency, is_admin FROM users WHERE id = ?", (user_id,), as_frame=False)
+        return rows[0] if rows else None
+
+    def get_all_users(self, as_frame=True):
+        return self._read("SELECT id, username, age, height, weight, goal, frequency, is_admin FROM users", as_frame=as_frame)
 
     def update_stat(self, user_id, exercise_id, pr, reps, date):
+        """
+        Logs a set and reports whether it is a personal best.
+        Returns {id, est_1rm, tonnage, previous_best_1rm, is_pr}; the previous best comes from
+        user_exercise_summary, which the insert trigger then updates in O(1).
+        """
         with self.get_connection() as conn:
-            conn.execute("INSERT INTO user_stats (user_id, exercise_id, pr, reps, updated_at) VALUES (?, ?, ?, ?, ?)", (user_id, exercise_id, pr, reps, date))
+            # Read the previous best inside the write transaction: concurrent logs of the same
+            # exercise queue here, so each one compares against the best the previous one left
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT best_1rm FROM user_exercise_summary WHERE user_id = ? AND exercise_id = ?", (user_id, exercise_id)
+            ).fetchone()
+            previous_best = row[0] if row else None
+            cursor = conn.execute("INSERT INTO user_stats (user_id, exercise_id, pr, reps, updated_at) VALUES (?, ?, ?, ?, ?)", (user_id, exercise_id, pr, reps, date))
+            est_1rm, tonnage = conn.execute("SELECT est_1rm, tonnage FROM user_stats WHERE id = ?", (cursor.lastrowid,)).fetchone()
             conn.commit()
         self._sync_to_csv('user_stats')
+        return {
+            "id": cursor.lastrowid, "est_1rm": est_1rm, "tonnage": tonnage, "previous_best_1rm": previous_best,
+            "is_pr": est_1rm is not None and (previous_best is None or est_1rm > previous_best),
+        }
+
+    def get_personal_bests(self, user_id, as_frame=True):
+        """
+        Best estimated 1RM (with its date) and heaviest weight per exercise.
+        Driven by the user's user_exercise_summary rows, so the cost follows the exercises the user
+        logged, not the catalog; the date is one lookup on the (user_id, exercise_id, est_1rm) index.
+        """
+        query = """
+            SELECT sm.exercise_id, e.name, sm.best_1rm,
+                   (SELECT updated_at FROM user_stats s WHERE s.user_id = sm.user_id AND s.exercise_id = sm.exercise_id
+                    ORDER BY est_1rm DESC LIMIT 1) AS best_1rm_date,
+                   sm.best_pr
+            FROM user_exercise_summary sm JOIN exercises e ON e.id = sm.exercise_id
+            WHERE sm.user_id = ?
+            ORDER BY e.name
+        """
+        return self._read(query, (user_id,), as_frame)
+
+    def _summary_query(self, *user_ids):
+        """Per-exercise summary rows of `user_ids`, in order of first appearance; mean_delta is None with a single entry."""
+        query = f"""
+            SELECT sm.user_id, sm.exercise_id, e.name, sm.entry_count, sm.latest_pr, sm.latest_reps, sm.latest_at,
+                   sm.previous_pr, sm.previous_at, sm.best_pr, sm.best_1rm,
+                   CASE WHEN sm.entry_count > 1 THEN (sm.latest_pr - sm.first_pr) / (sm.entry_count - 1) END AS mean_delta
+            FROM user_exercise_summary sm JOIN exercises e ON e.id = sm.exercise_id
+            WHERE sm.user_id IN ({", ".join("?" for _ in user_ids)})
+            ORDER BY sm.user_id, sm.first_at, sm.first_id
+        """
+        return query, user_ids
+
+    def get_exercise_summary(self, user_id, as_frame=True):
+        """
+        Per-exercise running aggregates (user_exercise_summary), maintained by triggers on user_stats.
+        - latest/previous entry, count, best weight and best estimated 1RM
+        - mean_delta: average change between consecutive entries
+        One row per exercise instead of a history scan.
+        """
+        return self._read(*self._summary_query(user_id), as_frame)
+
+    def _stats_query(self, user_id, after_id=None, since=None, until=None, limit=None):
+        """Builds the history query. Keyset pagination on (updated_at, id); since/until are inclusive dates."""
+        query = "SELECT us.id, e.name, us.pr, us.reps, us.updated_at FROM user_stats us JOIN exercises e ON us.exercise_id = e.id WHERE us.user_id = ?"
+        params = [user_id]
+        if after_id is not None:
+            query += " AND (us.updated_at, us.id) > (SELECT updated_at, id FROM user_stats WHERE id = ?)"
+            params.append(after_id)
+        if since:
+            query += " AND us.updated_at >= ?"
+            params.append(since)
+        if until:
+            query += " AND us.updated_at < date(?, '+1 day')"
+            params.append(until)
+        query += " ORDER BY us.updated_at ASC, us.id ASC"
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        return query, tuple(params)
+
+    def _insert_bulk(self, table, columns, rows):
+        """executemany in one transaction; returns the new ids in input order."""
+        rows = list(rows)
+        if not rows:
+            return []
+        placeholders = ", ".join("?" for _ in columns)
+        with self.get_connection() as conn:
+            conn.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", rows)
+            # AUTOINCREMENT ids are contiguous inside a single write transaction
+            last_id = conn.execute(f"SELECT MAX(id) FROM {table}").fetchone()[0]
+        self._sync_to_csv(table)
+        return list(range(last_id - len(rows) + 1, last_id + 1))
+
+    def add_stats_bulk(self, rows):
+        """Inserts (user_id, exercise_id, pr, reps, date) tuples in a single transaction."""
+        return self._insert_bulk("user_stats", ("user_id", "exercise_id", "pr", "reps", "updated_at"), rows)
+
+    def add_nutrition_bulk(self, rows):
+        """Inserts (user_id, calories, protein, date) tuples in a single transaction."""
+        return self._insert_bulk("user_nutrition", ("user_id", "calories", "protein", "date"), rows)
+
+    def get_user_stats(self, user_id, as_frame=True, after_id=None, since=None, until=None, limit=None):
+        query, params = self._stats_query(user_id, after_id, since, until, limit)
+        return self._read(query, params, as_frame)
 
-    def get_user_stats(self, user_id):
+    def iter_user_stats(self, user_id, after_id=None, since=None, until=None, limit=None):
+        """Yields history rows as dicts, one keyset page (on updated_at, id) at a time."""
+        return self._iter_pages(lambda after, n: self._stats_query(user_id, after_id if after is None else after, since, until, n),
+                                lambda row: row["id"], limit)
+
+    def get_data_version(self, user_id):
+        """Counter bumped (by triggers) on every write to the user's profile, workouts or nutrition."""
+        with self.get_connection() as conn:
+            row = conn.execute("SELECT version FROM user_data_version WHERE user_id = ?", (user_id,)).fetchone()
+            return row[0] if row else 0
+
+    def get_catalog_version(self):
+        """Counter bumped (by triggers) on every insert, update or delete of an exercise."""
         with self.get_connection() as conn:
-            query = "SELECT e.name, us.pr, us.reps, us.updated_at FROM user_stats us JOIN exercises e ON us.exercise_id = e.id WHERE us.user_id = ? ORDER BY us.updated_at ASC"
-            return pd.read_sql(query, conn, params=(user_id,))
+            return conn.execute("SELECT version FROM catalog_version WHERE id = 1").fetchone()[0]
+
+    def get_change_seq(self):
+        """Latest value of the global change sequence (user_data_version.changed_seq)."""
+        with self.get_connection() as conn:
+            return conn.execute("SELECT COALESCE(MAX(changed_seq), 0) FROM user_data_version").fetchone()[0]
+
+    def get_changed_users(self, after_seq):
+        """(user_id, changed_seq) of the users whose data changed after `after_seq`, oldest change first."""
+        with self.get_connection() as conn:
+            return conn.execute(
+                "SELECT user_id, changed_seq FROM user_data_version WHERE changed_seq > ? ORDER BY changed_seq", (after_seq,)
+            ).fetchall()
+
+    def iter_latest_lifts(self, user_ids=None, batch_size=5000):
+        """
+        Yields (user_id, weight, age, exercise_id, latest_pr) tuples from user_exercise_summary,
+        for every user or just `user_ids`; users without a weight or age are left out.
+        """
+        query = """
+            SELECT sm.user_id, u.weight, u.age, sm.exercise_id, sm.latest_pr
+            FROM user_exercise_summary sm JOIN users u ON u.id = sm.user_id
+            WHERE sm.latest_pr IS NOT NULL AND u.weight IS NOT NULL AND u.age IS NOT NULL
+        """
+        params = ()
+        if user_ids is not None:
+            params = tuple(user_ids)
+            query += f" AND sm.user_id IN ({', '.join('?' for _ in params)})"
+        with self.get_connection() as conn:
+            cursor = conn.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+
+    def get_coach_inputs(self, user_id, nutrition_days=5, history=2):
+        """
+        Everything the coach report needs, in one connection:
+        - profile: weight/age/goal (None if the user does not exist)
+        - stats: the last `history` (at least two) entries per exercise, exercises in order of first appearance
+        - nutrition: the last `nutrition_days` daily totals
+        - summary: get_exercise_summary rows
+        Every exercise is a user_exercise_summary row plus one index range, not a history scan.
+        """
+        return self.get_coach_inputs_batch([user_id], nutrition_days, history).get(user_id)
+
+    def get_coach_inputs_batch(self, user_ids, nutrition_days=5, history=2):
+        """
+        get_coach_inputs for a chunk of users with one query per input.
+        Returns {user_id: (profile, stats, nutrition, summary)}; unknown users are left out
+        and every frame keeps a user_id column.
+        """
+        user_ids = list(user_ids)
+        marks = ", ".join("?" for _ in user_ids)
+        with self.get_connection() as conn:
+            profiles = {
+                row[0]: {"weight": row[1], "age": row[2], "goal": row[3] or ""}
+                for row in conn.execute(f"SELECT id, weight, age, goal FROM users WHERE id IN ({marks})", user_ids)
+            }
+            if not profiles:
+                return {}
+            stats = pd.read_sql(f"""
+                SELECT sm.user_id, us.id, e.name, us.pr, us.reps, us.updated_at
+                FROM user_exercise_summary sm
+                JOIN exercises e ON e.id = sm.exercise_id
+                JOIN user_stats us ON us.id IN (
+                    SELECT id FROM user_stats s WHERE s.user_id = sm.user_id AND s.exercise_id = sm.exercise_id
+                    ORDER BY s.updated_at DESC, s.id DESC LIMIT ?
+                )
+                WHERE sm.user_id IN ({marks})
+                ORDER BY sm.user_id, sm.first_at, sm.first_id, us.updated_at, us.id
+            """, conn, params=(max(history, 2), *user_ids))
+            # Only the index range from each user's nutrition_days-th latest day onwards
+            nutrition = pd.read_sql(f"""
+                SELECT d.user_id, d.date, d.total_calories, d.total_protein
+                FROM users u JOIN user_nutrition_daily d ON d.user_id = u.id AND d.date >= COALESCE((
+                    SELECT date FROM user_nutrition_daily x WHERE x.user_id = u.id ORDER BY date DESC LIMIT 1 OFFSET ?
+                ), '')
+                WHERE u.id IN ({marks})
+                ORDER BY d.user_id, d.date
+            """, conn, params=(nutrition_days - 1, *user_ids))
+            query, params = self._summary_query(*user_ids)
+            summary = pd.read_sql(query, conn, params=params)
+        if len(set(user_ids)) == 1:
+            # Single-user calls (GET /coach) skip the slicing
+            return {user_id: (profile, stats, nutrition, summary) for user_id, profile in profiles.items()}
+        stats, nutrition, summary = (self._split_by_user(df) for df in (stats, nutrition, summary))
+        return {
+            user_id: (profile, stats(user_id), nutrition(user_id), summary(user_id))
+            for user_id, profile in profiles.items()
+        }
+
+    @staticmethod
+    def _split_by_user(frame):
+        """user_id -> that user's rows (index reset) of a frame sorted by user_id."""
+        bounds = frame["user_id"].searchsorted
+        return lambda user_id: frame.iloc[bounds(user_id, "left"):bounds(user_id, "right")].reset_index(drop=True)
+
+    def get_coach_report(self, user_id, data_version):
+        """The stored coach report (see utils.report_job) if it was built from `data_version`, else None."""
+        with self.get_connection() as conn:
+            row = conn.execute("SELECT report FROM coach_reports WHERE user_id = ? AND data_version = ?", (user_id, data_version)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_coach_reports(self, rows):
+        """Upserts (user_id, data_version, report) rows in one transaction; report is any JSON-serializable value."""
+        with self.get_connection() as conn:
+            conn.executemany("""
+                INSERT INTO coach_reports (user_id, data_version, report, generated_at) VALUES (?, ?, ?, datetime('now'))
+                ON CONFLICT (user_id) DO UPDATE SET
+                    data_version = excluded.data_version, report = excluded.report, generated_at = excluded.generated_at
+            """, ((user_id, version, json.dumps(report)) for user_id, version, report in rows))
+            conn.commit()
+
+    def get_dashboard(self, user_id, fields=None):
+        """
+        Everything the program/analytics view renders, in one connection.
+        - fields: subset of DASHBOARD_FIELDS (default: all)
+        - metrics: average daily calories/protein, weight and BMI
+        - latest_prs: latest entry per exercise (from user_exercise_summary)
+        - nutrition_series / stats_series: column-oriented chart data
+        Returns None if the user does not exist.
+        """
+        fields = set(fields or DASHBOARD_FIELDS)
+        with self.get_connection() as conn:
+            users = self._fetch_dicts(conn, "SELECT id, username, age, height, weight, goal, frequency, is_admin FROM users WHERE id = ?", (user_id,))
+            if not users:
+                return None
+            profile = users[0]
+            result = {}
+            if 'profile' in fields:
+                result['profile'] = profile
+            if 'metrics' in fields:
+                avg_cal, avg_prot, days = conn.execute(
+                    "SELECT AVG(total_calories), AVG(total_protein), COUNT(*) FROM user_nutrition_daily WHERE user_id = ?", (user_id,)
+                ).fetchone()
+                height_m = (profile['height'] or 0) / 100
+                result['metrics'] = {
+                    "avg_calories": avg_cal, "avg_protein": avg_prot, "days_logged": days,
+                    "weight": profile['weight'],
+                    "bmi": round(profile['weight'] / height_m ** 2, 1) if height_m > 0 and profile['weight'] else None,
+                }
+            if 'latest_prs' in fields:
+                result['latest_prs'] = self._fetch_dicts(conn, """
+                    SELECT sm.exercise_id, e.name, sm.latest_pr AS pr, sm.latest_reps AS reps, sm.latest_at AS updated_at
+                    FROM user_exercise_summary sm JOIN exercises e ON e.id = sm.exercise_id
+                    WHERE sm.user_id = ? ORDER BY e.name
+                """, (user_id,))
+            if 'exercises' in fields:
+                result['exercises'] = self._fetch_dicts(conn, "SELECT e.* FROM exercises e JOIN user_exercises ue ON e.id = ue.exercise_id WHERE ue.user_id = ?", (user_id,))
+            if 'nutrition_series' in fields:
+                result['nutrition_series'] = self._fetch_columns(conn, *self._nutrition_query(user_id))
+            if 'stats_series' in fields:
+                result['stats_series'] = self._fetch_columns(conn, *self._stats_query(user_id))
+        return result
 
     def add_nutrition_log(self, user_id, calories, protein, date):
         with self.get_connection() as conn:
@@ -84,24 +430,112 @@ class DatabaseManager:
             conn.commit()
         self._sync_to_csv('user_nutrition')
 
-    def get_daily_nutrition_summary(self, user_id):
+    def _nutrition_query(self, user_id, after=None, since=None, until=None, limit=None):
+        """Builds the daily summary query. Keyset pagination on date (`after` is exclusive)."""
+        # Served from the trigger-maintained rollup: O(days), not O(entries)
+        query = "SELECT date, total_calories, total_protein FROM user_nutrition_daily WHERE user_id = ?"
+        params = [user_id]
+        if after:
+            query += " AND date > ?"
+            params.append(after)
+        if since:
+            query += " AND date >= ?"
+            params.append(since)
+        if until:
+            query += " AND date <= ?"
+            params.append(until)
+        query += " ORDER BY date ASC"
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        return query, tuple(params)
+
+    def get_daily_nutrition_summary(self, user_id, as_frame=True, after=None, since=None, until=None, limit=None):
+        query, params = self._nutrition_query(user_id, after, since, until, limit)
+        return self._read(query, params, as_frame)
+
+    def iter_daily_nutrition_summary(self, user_id, after=None, since=None, until=None, limit=None):
+        """Yields daily summary rows as dicts, one keyset page (on date) at a time."""
+        return self._iter_pages(lambda last, n: self._nutrition_query(user_id, after if last is None else last, since, until, n),
+                                lambda row: row["date"], limit)
+
+    def rebuild_nutrition_rollup(self):
+        """Recomputes user_nutrition_daily from the raw user_nutrition rows."""
         with self.get_connection() as conn:
-            query = "SELECT date, SUM(calories) as total_calories, SUM(protein) as total_protein FROM user_nutrition WHERE user_id = ? GROUP BY date ORDER BY date ASC"
-            return pd.read_sql(query, conn, params=(user_id,))
+            conn.execute("DELETE FROM user_nutrition_daily")
+            conn.execute("""
+                INSERT INTO user_nutrition_daily (user_id, date, total_calories, total_protein, entry_count)
+                SELECT user_id, date, SUM(COALESCE(calories, 0)), SUM(COALESCE(protein, 0)), COUNT(*)
+                FROM user_nutrition GROUP BY user_id, date
+            """)
+            conn.commit()
 
-    def get_exercises(self):
-        with self.get_connection() as conn: 
-            return pd.read_sql("SELECT * FROM exercises", conn)
+    def check_nutrition_rollup(self):
+        """Returns the (user_id, date) rows where the rollup disagrees with the raw data (empty = consistent)."""
+        with self.get_connection() as conn:
+            query = """
+                WITH raw AS (
+                    SELECT user_id, date, SUM(COALESCE(calories, 0)) AS total_calories,
+                           SUM(COALESCE(protein, 0)) AS total_protein, COUNT(*) AS entry_count
+                    FROM user_nutrition GROUP BY user_id, date
+                )
+                SELECT r.user_id, r.date, r.total_calories AS expected_calories, d.total_calories AS rollup_calories,
+                       r.total_protein AS expected_protein, d.total_protein AS rollup_protein,
+                       r.entry_count AS expected_count, d.entry_count AS rollup_count
+                FROM raw r LEFT JOIN user_nutrition_daily d ON d.user_id = r.user_id AND d.date = r.date
+                WHERE d.user_id IS NULL OR d.total_calories != r.total_calories
+                   OR d.total_protein != r.total_protein OR d.entry_count != r.entry_count
+                UNION ALL
+                SELECT d.user_id, d.date, NULL, d.total_calories, NULL, d.total_protein, NULL, d.entry_count
+                FROM user_nutrition_daily d LEFT JOIN raw r ON r.user_id = d.user_id AND r.date = d.date
+                WHERE r.user_id IS NULL
+            """
+            return pd.read_sql(query, conn)
 
-    def add_user_exercise(self, user_id, exercise_id):
+    def rebuild_exercise_summary(self):
+        """Recomputes user_exercise_summary from the raw user_stats rows."""
         with self.get_connection() as conn:
-            conn.execute("INSERT INTO user_exercises (user_id, exercise_id) VALUES (?, ?)", (user_id, exercise_id))
+            conn.execute("DELETE FROM user_exercise_summary")
+            conn.execute(f"INSERT INTO user_exercise_summary {EXERCISE_SUMMARY_SELECT.format(where='1')}")
             conn.commit()
 
-    def get_user_exercises(self, user_id):
+    def check_exercise_summary(self):
+        """Returns the summary rows that disagree with user_stats (source 'expected' / 'summary'; empty = consistent)."""
+        expected = EXERCISE_SUMMARY_SELECT.format(where='1')
+        query = f"""
+            SELECT 'expected' AS source, * FROM ({expected} EXCEPT SELECT * FROM user_exercise_summary)
+            UNION ALL
+            SELECT 'summary', * FROM (SELECT * FROM user_exercise_summary EXCEPT {expected})
+            ORDER BY 2, 3, 1
+        """
+        return self._read(query)
+
+    def get_names(self, table, ids):
+        """{id: display name} for ids of `table` (users -> username, exercises -> name)."""
+        ids = list(ids)
+        if not ids:
+            return {}
+        column = NAME_COLUMNS[table]
         with self.get_connection() as conn:
-            query = "SELECT e.* FROM exercises e JOIN user_exercises ue ON e.id = ue.exercise_id WHERE ue.user_id = ?"
-            return pd.read_sql(query, conn, params=(user_id,))
+            return dict(conn.execute(f"SELECT id, {column} FROM {table} WHERE id IN ({', '.join('?' for _ in ids)})", ids))
+
+    def find_exercise(self, key):
+        """The exercise whose id or (case-insensitive) name is `key`, or None."""
+        rows = self._read("SELECT * FROM exercises WHERE id = ? OR lower(name) = lower(?) ORDER BY id != ? LIMIT 1",
+                          (key, str(key).strip(), key), as_frame=False)
+        return rows[0] if rows else None
+
+    def get_exercises(self, as_frame=True):
+        return self._read("SELECT * FROM exercises", as_frame=as_frame)
+
+    def add_user_exercise(self, user_id, exercise_id):
+        with self.get_connection() as conn:
+            conn.execute("INSERT OR IGNORE INTO user_exercises (user_id, exercise_id) VALUES (?, ?)", (user_id, exercise_id))
+            conn.commit()
+
+    def get_user_exercises(self, user_id, as_frame=True):
+        query = "SELECT e.* FROM exercises e JOIN user_exercises ue ON e.id = ue.exercise_id WHERE ue.user_id = ?"
+        return self._read(query, (user_id,), as_frame)
 
     def remove_user_exercise(self, user_id, exercise_id):
         with self.get_connection() as conn:
@@ -112,13 +546,13 @@ class DatabaseManager:
         with self.get_connection() as conn:
             conn.execute("UPDATE users SET is_admin = 1 WHERE id = ?", (user_id,))
             conn.commit()
-        self._sync_to_csv('users')
+        self._sync_to_csv('users', rewrite=True)
 
     def delete_user(self, user_id):
         with self.get_connection() as conn:
             conn.execute("DELETE FROM users WHERE id = ?", (user_id,))
             conn.commit()
-        self._sync_to_csv('users')
+        self._sync_to_csv('users', rewrite=True)
 
     def update_user_details(self, user_id, username, age, height, weight, goal, frequency, is_admin):
         try:
@@ -130,7 +564,7 @@ class DatabaseManager:
                 """
                 conn.execute(query, (username, age, height, weight, goal, frequency, is_admin, user_id))
                 conn.commit()
-            self._sync_to_csv('users')
+            self._sync_to_csv('users', rewrite=True)
             return True
         except Exception as e:
             print(f"DB Update Error: {e}")
@@ -146,7 +580,7 @@ class DatabaseManager:
         with self.get_connection() as conn:
             conn.execute(f"DELETE FROM {table_name} WHERE id = ?", (row_id,))
             conn.commit()
-        self._sync_to_csv(table_name)
+        self._sync_to_csv(table_name, rewrite=True)
 
     def update_log(self, table, row_id, val1, val2):
         with self.get_connection() as conn:
@@ -156,4 +590,4 @@ class DatabaseManager:
             elif table == "user_nutrition":
                 conn.execute("UPDATE user_nutrition SET calories = ?, protein = ? WHERE id = ?", (val1, val2, row_id))
             conn.commit()
-        self._sync_to_csv(table)
\ No newline at end of file
+        self._sync_to_csv(table, rewrite=True)
\ No newline at end of file
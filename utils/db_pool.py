@@ -0,0 +1,95 @@
+import sqlite3
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+# Applied to every pooled connection
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 268435456,   # 256 MB
+    "cache_size": -16000,     # ~16 MB (negative = KiB)
+}
+
+class ConnectionPool:
+    """
+    Thread-safe pool of pre-configured SQLite connections.
+    - Connections are created lazily up to `size` and reused (LIFO)
+    - `connection()` checks one out inside a transaction and always returns it
+    - `metrics()` reports checkout wait times and in-use counts
+    """
+
+    def __init__(self, db_path, size=8, timeout=20):
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._all = []
+        self._lock = threading.Lock()
+        self._checkouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._in_use = 0
+        self._peak_in_use = 0
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+        for name, value in PRAGMAS.items():
+            conn.execute(f"PRAGMA {name}={value}")
+        return conn
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._all) < self.size:
+                conn = self._connect()
+                self._all.append(conn)
+                return conn
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(f"Connection pool exhausted ({self.size} in use)")
+
+    @contextmanager
+    def connection(self):
+        start = time.perf_counter()
+        conn = self._acquire()
+        waited = time.perf_counter() - start
+        with self._lock:
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+            self._in_use += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+        try:
+            with conn:
+                yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            with self._lock:
+                self._in_use -= 1
+            self._idle.put(conn)
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "size": self.size,
+                "open": len(self._all),
+                "in_use": self._in_use,
+                "peak_in_use": self._peak_in_use,
+                "checkouts": self._checkouts,
+                "avg_wait_ms": round(self._wait_total / self._checkouts * 1000, 3) if self._checkouts else 0.0,
+                "max_wait_ms": round(self._wait_max * 1000, 3),
+            }
+
+    def close(self):
+        with self._lock:
+            for conn in self._all:
+                conn.close()
+            self._all.clear()
+        self._idle = queue.LifoQueue()
@@ -0,0 +1,217 @@
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from utils.auth import hash_password, is_password_hash
+
+# Columns written for each importable table (an `id` column is kept when the source has one)
+TABLE_COLUMNS = {
+    "users": ("username", "password", "age", "height", "weight", "goal", "frequency", "is_admin"),
+    "exercises": ("name", "muscle_group", "category"),
+    "user_stats": ("user_id", "exercise_id", "pr", "reps", "updated_at"),
+    "user_nutrition": ("user_id", "calories", "protein", "date"),
+}
+
+def read_records(path):
+    """Streams dicts from a .csv or .jsonl/.ndjson file."""
+    if path.endswith((".jsonl", ".ndjson")):
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        with open(path, newline="") as f:
+            yield from csv.DictReader(f)
+
+def _value(rec, *keys):
+    for key in keys:
+        value = rec.get(key)
+        if value not in (None, ""):
+            return value
+    return None
+
+class BulkImporter:
+    """
+    Streams large CSV/JSONL files into the database in bounded memory.
+    - Exercise names and usernames are resolved to ids through in-memory indexes
+    - Every chunk is one transaction that also records how many source rows
+      are done, so an interrupted import resumes where it stopped
+    - Non-unique indexes on the target table are dropped for the duration and
+      rebuilt at the end (survives interruption via import_deferred_indexes)
+    - Plaintext user passwords are hashed per chunk on `hash_workers` processes
+      (scrypt costs ~50 ms each); stored hashes are kept as they are
+    - user_stats rows need a date; an import that keeps source ids rebuilds
+      user_exercise_summary at the end (its insert trigger expects ascending ids)
+    """
+
+    def __init__(self, db, chunk_size=50000, create_missing_exercises=False, defer_indexes=True, progress=print,
+                 hash_workers=None):
+        self.db = db
+        self.hash_workers = hash_workers or multiprocessing.cpu_count()
+        self._hash_pool = None
+        self.chunk_size = chunk_size
+        self.create_missing_exercises = create_missing_exercises
+        self.defer_indexes = defer_indexes
+        self.progress = progress
+        self._exercises = None
+        self._users = None
+
+    # --- ID RESOLUTION ---
+    def _exercise_index(self):
+        if self._exercises is None:
+            with self.db.get_connection() as conn:
+                self._exercises = {name.strip().lower(): ex_id for ex_id, name in conn.execute("SELECT id, name FROM exercises") if name}
+        return self._exercises
+
+    def _user_index(self):
+        if self._users is None:
+            with self.db.get_connection() as conn:
+                self._users = {username: user_id for user_id, username in conn.execute("SELECT id, username FROM users")}
+        return self._users
+
+    def _resolve_user(self, rec):
+        user_id = _value(rec, "user_id")
+        if user_id is None and _value(rec, "username") is not None:
+            user_id = self._user_index().get(rec["username"])
+        return user_id
+
+    def _resolve_exercise(self, rec):
+        ex_id = _value(rec, "exercise_id")
+        name = _value(rec, "exercise", "name")
+        if ex_id is not None or name is None:
+            return ex_id
+        index = self._exercise_index()
+        key = str(name).strip().lower()
+        if key not in index and self.create_missing_exercises:
+            with self.db.get_connection() as conn:
+                index[key] = conn.execute("INSERT INTO exercises (name, muscle_group) VALUES (?, 'General')", (str(name).strip(),)).lastrowid
+        return index.get(key)
+
+    def _convert(self, table, rec):
+        """Maps a source record to the row tuple for `table`, or None if it cannot be imported."""
+        if table == "users":
+            username, password = _value(rec, "username"), _value(rec, "password")
+            if username is None or password is None:
+                return None
+            # Backups already hold salted hashes; plain passwords are hashed per chunk by _hash_passwords
+            return (username, str(password), _value(rec, "age"), _value(rec, "height"), _value(rec, "weight"),
+                    _value(rec, "goal"), _value(rec, "frequency"), _value(rec, "is_admin") or 0)
+        if table == "exercises":
+            name = _value(rec, "name")
+            if name is None or str(name).strip().lower() in self._exercise_index():
+                return None
+            self._exercise_index()[str(name).strip().lower()] = None
+            return (str(name).strip(), _value(rec, "muscle_group") or "General", _value(rec, "category"))
+        if table == "user_stats":
+            row = (self._resolve_user(rec), self._resolve_exercise(rec), _value(rec, "pr", "weight"),
+                   _value(rec, "reps"), _value(rec, "updated_at", "date"))
+            # A dateless row has no place in user_exercise_summary's first/latest order
+            return row if None not in (row[0], row[1], row[2], row[4]) else None
+        if table == "user_nutrition":
+            row = (self._resolve_user(rec), _value(rec, "calories"), _value(rec, "protein"), _value(rec, "date"))
+            return row if row[0] is not None and row[3] is not None else None
+        raise ValueError(f"Unsupported table: {table}")
+
+    # --- INDEX DEFERRAL ---
+    def _drop_indexes(self, table):
+        with self.db.get_connection() as conn:
+            indexes = conn.execute(
+                "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL AND sql NOT LIKE 'CREATE UNIQUE%'",
+                (table,),
+            ).fetchall()
+            for name, sql in indexes:
+                conn.execute("INSERT OR IGNORE INTO import_deferred_indexes (name, table_name, sql) VALUES (?, ?, ?)", (name, table, sql))
+                conn.execute(f"DROP INDEX {name}")
+
+    def _restore_indexes(self, table):
+        start = time.perf_counter()
+        with self.db.get_connection() as conn:
+            indexes = conn.execute("SELECT name, sql FROM import_deferred_indexes WHERE table_name = ?", (table,)).fetchall()
+            for name, sql in indexes:
+                # sqlite_master stores the DDL without IF NOT EXISTS
+                conn.execute(sql.replace("CREATE INDEX", "CREATE INDEX IF NOT EXISTS", 1))
+                conn.execute("DELETE FROM import_deferred_indexes WHERE name = ?", (name,))
+        if indexes:
+            self.progress(f"Rebuilt {len(indexes)} index(es) on {table} in {time.perf_counter() - start:.1f}s")
+
+    def _hash_passwords(self, rows, at):
+        """Replaces the plaintext passwords (column `at`) of a chunk with scrypt hashes."""
+        plain = [i for i, row in enumerate(rows) if not is_password_hash(row[at])]
+        if not plain:
+            return rows
+        if self.hash_workers > 1 and self._hash_pool is None:
+            self._hash_pool = ProcessPoolExecutor(self.hash_workers, mp_context=multiprocessing.get_context("spawn"))
+        passwords = [rows[i][at] for i in plain]
+        hashes = self._hash_pool.map(hash_password, passwords, chunksize=32) if self._hash_pool else map(hash_password, passwords)
+        for i, hashed in zip(plain, hashes):
+            rows[i] = rows[i][:at] + (hashed,) + rows[i][at + 1:]
+        return rows
+
+    # --- IMPORT ---
+    def run(self, table, path, restart=False):
+        """Imports `path` into `table`. Returns a summary dict (read/inserted/skipped/rows_per_sec)."""
+        if table not in TABLE_COLUMNS:
+            raise ValueError(f"Unsupported table: {table}")
+        source = f"{os.path.abspath(path)}:{table}"
+        with self.db.get_connection() as conn:
+            if restart:
+                conn.execute("DELETE FROM import_progress WHERE source = ?", (source,))
+            row = conn.execute("SELECT rows_done FROM import_progress WHERE source = ?", (source,)).fetchone()
+        done = row[0] if row else 0
+        if done:
+            self.progress(f"Resuming {source} after {done} rows")
+
+        records = itertools.islice(read_records(path), done, None)
+        first = next(records, None)
+        if first is None:
+            self.progress(f"Nothing to import from {path}")
+            return {"read": 0, "inserted": 0, "skipped": 0, "rows_per_sec": 0.0}
+        columns = (("id",) if _value(first, "id") is not None else ()) + TABLE_COLUMNS[table]
+        sql = f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+
+        if self.defer_indexes:
+            self._drop_indexes(table)
+        read = inserted = 0
+        start = time.perf_counter()
+        try:
+            records = itertools.chain([first], records)
+            while True:
+                chunk = list(itertools.islice(records, self.chunk_size))
+                if not chunk:
+                    break
+                rows = []
+                for rec in chunk:
+                    row = self._convert(table, rec)
+                    if row is not None:
+                        rows.append(((_value(rec, "id"),) if "id" in columns else ()) + row)
+                if table == "users":
+                    rows = self._hash_passwords(rows, columns.index("password"))
+                with self.db.get_connection() as conn:
+                    cursor = conn.executemany(sql, rows)
+                    conn.execute(
+                        "INSERT INTO import_progress (source, table_name, rows_done, updated_at) VALUES (?, ?, ?, datetime('now')) "
+                        "ON CONFLICT (source) DO UPDATE SET rows_done = excluded.rows_done, updated_at = excluded.updated_at",
+                        (source, table, done + read + len(chunk)),
+                    )
+                read += len(chunk)
+                inserted += max(cursor.rowcount, 0)
+                rate = read / (time.perf_counter() - start)
+                self.progress(f"{table}: {done + read} rows read, {inserted} inserted ({rate:,.0f} rows/s)")
+        finally:
+            if self._hash_pool is not None:
+                self._hash_pool.shutdown()
+                self._hash_pool = None
+            if self.defer_indexes:
+                self._restore_indexes(table)
+            if table == "user_stats" and "id" in columns:
+                # The summary insert trigger assumes each new row has the highest id; source ids break that
+                self.db.rebuild_exercise_summary()
+                self.progress("Rebuilt user_exercise_summary (the source carried ids)")
+            if table == "exercises":
+                # Names queued during this run have no ids yet
+                self._exercises = None
+        rate = read / (time.perf_counter() - start) if read else 0.0
+        return {"read": read, "inserted": inserted, "skipped": read - inserted, "rows_per_sec": round(rate, 1)}
@@ -0,0 +1,135 @@
+import threading
+from bisect import bisect_left, bisect_right, insort
+from heapq import nlargest
+
+# Band edges (a value on an edge starts the next band): bodyweight in kg, age in years
+WEIGHT_BANDS = (60, 70, 80, 90, 100, 110)
+AGE_BANDS = (25, 35, 45, 55)
+
+def band_of(weight, age):
+    """(weight band, age band) indexes of a bodyweight and age."""
+    return bisect_right(WEIGHT_BANDS, weight), bisect_right(AGE_BANDS, age)
+
+def _label(edges, i, unit=""):
+    if i == 0:
+        return f"<{edges[0]}{unit}"
+    if i == len(edges):
+        return f"{edges[-1]}+{unit}"
+    return f"{edges[i - 1]}-{edges[i]}{unit}"
+
+def band_label(band):
+    """{'weight': '80-90kg', 'age': '25-35'} for a band_of() pair."""
+    return {"weight": _label(WEIGHT_BANDS, band[0], "kg"), "age": _label(AGE_BANDS, band[1])}
+
+class PercentileIndex:
+    """
+    Ranks every user's latest lift per exercise against the users in the same
+    bodyweight and age band.
+    - One sorted list of (latest_pr, user_id) per (exercise, weight band, age
+      band): percentile, rank and top-N lookups are bisects, O(log n)
+    - build() loads user_exercise_summary once; sync() re-reads only the users
+      whose data changed since (user_data_version.changed_seq), so writes from
+      any process - update_stat, log edits, profile changes - are picked up
+    - Readers call sync() first; the first sync builds the index
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._boards = {}       # (exercise_id, weight band, age band) -> sorted [(pr, user_id)]
+        self._by_exercise = {}  # exercise_id -> board keys
+        self._entries = {}      # user_id -> {exercise_id: (board key, pr)}
+        self._seq = None
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.synced_users = 0
+
+    def _add(self, user_id, weight, age, exercise_id, pr):
+        key = (exercise_id, *band_of(weight, age))
+        board = self._boards.get(key)
+        if board is None:
+            board = self._boards[key] = []
+            self._by_exercise.setdefault(exercise_id, []).append(key)
+        insort(board, (pr, user_id))
+        self._entries.setdefault(user_id, {})[exercise_id] = (key, pr)
+
+    def _remove_user(self, user_id):
+        for key, pr in self._entries.pop(user_id, {}).values():
+            board = self._boards[key]
+            del board[bisect_left(board, (pr, user_id))]
+
+    def build(self):
+        """Full refresh from user_exercise_summary."""
+        with self._lock:
+            self._build()
+
+    def _build(self):
+        # Caller holds the lock. Read the sequence first: changes landing during the load are replayed by sync()
+        seq = self.db.get_change_seq()
+        boards, entries = {}, {}
+        for user_id, weight, age, exercise_id, pr in self.db.iter_latest_lifts():
+            key = (exercise_id, *band_of(weight, age))
+            boards.setdefault(key, []).append((pr, user_id))
+            entries.setdefault(user_id, {})[exercise_id] = (key, pr)
+        by_exercise = {}
+        for key, board in boards.items():
+            board.sort()
+            by_exercise.setdefault(key[0], []).append(key)
+        self._boards, self._by_exercise, self._entries, self._seq = boards, by_exercise, entries, seq
+        self.builds += 1
+
+    def sync(self, chunk_size=500):
+        """Re-reads the users changed since the last build/sync. Returns how many were refreshed."""
+        with self._lock:
+            # Checked under the lock: concurrent first requests wait for one build instead of each running one
+            if self._seq is None:
+                self._build()
+                return 0
+            changed = self.db.get_changed_users(self._seq)
+            if not changed:
+                return 0
+            users = list(dict.fromkeys(user_id for user_id, _ in changed))
+            for start in range(0, len(users), chunk_size):
+                chunk = users[start:start + chunk_size]
+                for user_id in chunk:
+                    self._remove_user(user_id)
+                for row in self.db.iter_latest_lifts(chunk):
+                    self._add(*row)
+            self._seq = changed[-1][1]
+            self.synced_users += len(users)
+            return len(users)
+
+    def _rank(self, key, pr):
+        board = self._boards[key]
+        below = bisect_left(board, (pr,))
+        not_above = bisect_right(board, (pr, float("inf")))
+        return {
+            # Ties count half, so everyone on one value sits at the 50th percentile
+            "percentile": round(100 * (below + (not_above - below) / 2) / len(board), 1),
+            "rank": len(board) - not_above + 1,
+            "size": len(board),
+            "band": band_label(key[1:]),
+        }
+
+    def user_ranks(self, user_id):
+        """{exercise_id: {percentile, rank, size, band}} for every exercise the user has a lift in."""
+        with self._lock:
+            return {exercise_id: self._rank(key, pr) for exercise_id, (key, pr) in self._entries.get(user_id, {}).items()}
+
+    def band_for(self, user_id, exercise_id):
+        """The user's board band for an exercise, or None."""
+        entry = self._entries.get(user_id, {}).get(exercise_id)
+        return entry[0][1:] if entry else None
+
+    def top(self, exercise_id, band=None, limit=10):
+        """[(pr, user_id, band)] strongest first, within `band` or across all bands. Returns (rows, board size)."""
+        with self._lock:
+            keys = [(exercise_id, *band)] if band is not None else self._by_exercise.get(exercise_id, [])
+            boards = [(key, self._boards.get(key, [])) for key in keys]
+            rows = nlargest(limit, ((pr, user_id, key[1:]) for key, board in boards for pr, user_id in board[-limit:]))
+            return rows, sum(len(board) for _, board in boards)
+
+    def stats(self):
+        with self._lock:
+            return {"boards": len(self._boards), "users": len(self._entries),
+                    "lifts": sum(len(board) for board in self._boards.values()),
+                    "seq": self._seq, "builds": self.builds, "synced_users": self.synced_users}
@@ -0,0 +1,284 @@
+# Ordered schema steps applied by DatabaseManager.migrate() at startup.
+# Each entry is (version, description, statements); the highest applied
+# version is stored in the database header (PRAGMA user_version).
+# Never edit a released step - append a new one instead.
+# Per-(user, exercise) aggregates recomputed from user_stats for the keys matched by
+# {where}; columns in user_exercise_summary order. Used by migration 8's triggers and
+# backfill, and by DatabaseManager.rebuild_exercise_summary/check_exercise_summary.
+EXERCISE_SUMMARY_SELECT = """
+    SELECT agg.user_id, agg.exercise_id, agg.entry_count,
+           f.id AS first_id, f.pr AS first_pr, f.updated_at AS first_at,
+           p.id AS previous_id, p.pr AS previous_pr, p.updated_at AS previous_at,
+           l.id AS latest_id, l.pr AS latest_pr, l.reps AS latest_reps, l.updated_at AS latest_at,
+           agg.best_pr, agg.best_1rm
+    FROM (
+        SELECT user_id, exercise_id, COUNT(*) AS entry_count, MAX(pr) AS best_pr, MAX(est_1rm) AS best_1rm
+        FROM user_stats WHERE {where} GROUP BY user_id, exercise_id
+    ) agg
+    JOIN user_stats f ON f.id = (SELECT id FROM user_stats s WHERE s.user_id = agg.user_id AND s.exercise_id = agg.exercise_id
+                                 ORDER BY s.updated_at, s.id LIMIT 1)
+    JOIN user_stats l ON l.id = (SELECT id FROM user_stats s WHERE s.user_id = agg.user_id AND s.exercise_id = agg.exercise_id
+                                 ORDER BY s.updated_at DESC, s.id DESC LIMIT 1)
+    LEFT JOIN user_stats p ON p.id = (SELECT id FROM user_stats s WHERE s.user_id = agg.user_id AND s.exercise_id = agg.exercise_id
+                                      ORDER BY s.updated_at DESC, s.id DESC LIMIT 1 OFFSET 1)
+"""
+
+def _refresh_exercise_summary(row):
+    """Trigger body recomputing the summary of the key of OLD/NEW `row` (O(entries of that key))."""
+    where = f"user_id = {row}.user_id AND exercise_id = {row}.exercise_id"
+    return (f"DELETE FROM user_exercise_summary WHERE {where};\n"
+            f"INSERT INTO user_exercise_summary {EXERCISE_SUMMARY_SELECT.format(where=where)};")
+
+def _sorts_after(at, id_, other_at, other_id):
+    """
+    SQL condition: entry (at, id_) comes after (other_at, other_id) in the summary's
+    ORDER BY updated_at, id order, where NULL dates sort first.
+    """
+    return (f"(({at} IS NOT NULL AND {other_at} IS NULL) OR {at} > {other_at} "
+            f"OR ({at} IS {other_at} AND {id_} > {other_id}))")
+
+_NEW_IS_LATEST = _sorts_after("excluded.latest_at", "excluded.latest_id", "latest_at", "latest_id")
+_NEW_IS_PREVIOUS = f'(previous_id IS NULL OR {_sorts_after("excluded.latest_at", "excluded.latest_id", "previous_at", "previous_id")})'
+_NEW_IS_FIRST = _sorts_after("first_at", "first_id", "excluded.first_at", "excluded.first_id")
+
+MIGRATIONS = [
+    (1, "Index workout history by user and date", [
+        "CREATE INDEX IF NOT EXISTS idx_user_stats_user_updated ON user_stats (user_id, updated_at)",
+        "CREATE INDEX IF NOT EXISTS idx_user_stats_exercise ON user_stats (exercise_id)",
+    ]),
+    (2, "Index nutrition logs by user and date", [
+        "CREATE INDEX IF NOT EXISTS idx_user_nutrition_user_date ON user_nutrition (user_id, date)",
+    ]),
+    (3, "One program entry per user and exercise", [
+        "DELETE FROM user_exercises WHERE id NOT IN (SELECT MIN(id) FROM user_exercises GROUP BY user_id, exercise_id)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_user_exercises_user_exercise ON user_exercises (user_id, exercise_id)",
+    ]),
+    (4, "Materialized per-user daily nutrition rollup", [
+        """CREATE TABLE IF NOT EXISTS user_nutrition_daily (
+            user_id INTEGER, date TEXT, total_calories INTEGER, total_protein INTEGER, entry_count INTEGER,
+            PRIMARY KEY (user_id, date)
+        ) WITHOUT ROWID""",
+        """CREATE TRIGGER IF NOT EXISTS trg_nutrition_daily_insert AFTER INSERT ON user_nutrition BEGIN
+            INSERT INTO user_nutrition_daily (user_id, date, total_calories, total_protein, entry_count)
+            VALUES (NEW.user_id, NEW.date, COALESCE(NEW.calories, 0), COALESCE(NEW.protein, 0), 1)
+            ON CONFLICT (user_id, date) DO UPDATE SET
+                total_calories = total_calories + excluded.total_calories,
+                total_protein = total_protein + excluded.total_protein,
+                entry_count = entry_count + 1;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_nutrition_daily_delete AFTER DELETE ON user_nutrition BEGIN
+            UPDATE user_nutrition_daily SET
+                total_calories = total_calories - COALESCE(OLD.calories, 0),
+                total_protein = total_protein - COALESCE(OLD.protein, 0),
+                entry_count = entry_count - 1
+            WHERE user_id = OLD.user_id AND date = OLD.date;
+            DELETE FROM user_nutrition_daily WHERE user_id = OLD.user_id AND date = OLD.date AND entry_count <= 0;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_nutrition_daily_update AFTER UPDATE OF user_id, date, calories, protein ON user_nutrition BEGIN
+            UPDATE user_nutrition_daily SET
+                total_calories = total_calories - COALESCE(OLD.calories, 0),
+                total_protein = total_protein - COALESCE(OLD.protein, 0),
+                entry_count = entry_count - 1
+            WHERE user_id = OLD.user_id AND date = OLD.date;
+            DELETE FROM user_nutrition_daily WHERE user_id = OLD.user_id AND date = OLD.date AND entry_count <= 0;
+            INSERT INTO user_nutrition_daily (user_id, date, total_calories, total_protein, entry_count)
+            VALUES (NEW.user_id, NEW.date, COALESCE(NEW.calories, 0), COALESCE(NEW.protein, 0), 1)
+            ON CONFLICT (user_id, date) DO UPDATE SET
+                total_calories = total_calories + excluded.total_calories,
+                total_protein = total_protein + excluded.total_protein,
+                entry_count = entry_count + 1;
+        END""",
+        "DELETE FROM user_nutrition_daily",
+        """INSERT INTO user_nutrition_daily (user_id, date, total_calories, total_protein, entry_count)
+            SELECT user_id, date, SUM(COALESCE(calories, 0)), SUM(COALESCE(protein, 0)), COUNT(*)
+            FROM user_nutrition GROUP BY user_id, date""",
+    ]),
+    (5, "Per-user data version for cache invalidation", [
+        "CREATE TABLE IF NOT EXISTS user_data_version (user_id INTEGER PRIMARY KEY, version INTEGER NOT NULL)",
+        """CREATE TRIGGER IF NOT EXISTS trg_version_stats_insert AFTER INSERT ON user_stats BEGIN
+            INSERT INTO user_data_version (user_id, version) VALUES (NEW.user_id, 1) ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_version_stats_update AFTER UPDATE ON user_stats BEGIN
+            INSERT INTO user_data_version (user_id, version) VALUES (OLD.user_id, 1) ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+            INSERT INTO user_data_version (user_id, version) VALUES (NEW.user_id, 1) ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_version_stats_delete AFTER DELETE ON user_stats BEGIN
+            INSERT INTO user_data_version (user_id, version) VALUES (OLD.user_id, 1) ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_version_nutrition_insert AFTER INSERT ON user_nutrition BEGIN
+            INSERT INTO user_data_version (user_id, version) VALUES (NEW.user_id, 1) ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_version_nutrition_update AFTER UPDATE ON user_nutrition BEGIN
+            INSERT INTO user_data_version (user_id, version) VALUES (OLD.user_id, 1) ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+            INSERT INTO user_data_version (user_id, version) VALUES (NEW.user_id, 1) ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_version_nutrition_delete AFTER DELETE ON user_nutrition BEGIN
+            INSERT INTO user_data_version (user_id, version) VALUES (OLD.user_id, 1) ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_version_users_update AFTER UPDATE ON users BEGIN
+            INSERT INTO user_data_version (user_id, version) VALUES (NEW.id, 1) ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_version_users_delete AFTER DELETE ON users BEGIN
+            INSERT INTO user_data_version (user_id, version) VALUES (OLD.id, 1) ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+        END""",
+    ]),
+    (6, "Bookkeeping for the resumable bulk importer", [
+        "CREATE TABLE IF NOT EXISTS import_progress (source TEXT PRIMARY KEY, table_name TEXT, rows_done INTEGER, updated_at TEXT)",
+        "CREATE TABLE IF NOT EXISTS import_deferred_indexes (name TEXT PRIMARY KEY, table_name TEXT, sql TEXT)",
+    ]),
+    (7, "Derived est_1rm/tonnage columns and best-lift indexes on user_stats", [
+        # VIRTUAL generated columns: always consistent with pr/reps (update_log included);
+        # the indexes store the computed values, so best-lift lookups never recompute them.
+        # est_1rm is Brzycki, matching utils.strength (NULL outside 1..36 reps)
+        """ALTER TABLE user_stats ADD COLUMN est_1rm REAL GENERATED ALWAYS AS (
+            CASE WHEN reps = 1 THEN pr WHEN reps BETWEEN 2 AND 36 THEN pr * (36.0 / (37 - reps)) END
+        ) VIRTUAL""",
+        "ALTER TABLE user_stats ADD COLUMN tonnage REAL GENERATED ALWAYS AS (pr * reps) VIRTUAL",
+        "CREATE INDEX IF NOT EXISTS idx_user_stats_best_1rm ON user_stats (user_id, exercise_id, est_1rm)",
+        "CREATE INDEX IF NOT EXISTS idx_user_stats_best_pr ON user_stats (user_id, exercise_id, pr)",
+    ]),
+    (8, "Incremental per-exercise summary of user_stats", [
+        # Latest/previous/first entry by (updated_at, id), count and bests per (user, exercise).
+        # Inserts are applied in O(1); updates and deletes recompute just the affected key(s).
+        """CREATE TABLE IF NOT EXISTS user_exercise_summary (
+            user_id INTEGER, exercise_id INTEGER, entry_count INTEGER,
+            first_id INTEGER, first_pr REAL, first_at TEXT,
+            previous_id INTEGER, previous_pr REAL, previous_at TEXT,
+            latest_id INTEGER, latest_pr REAL, latest_reps INTEGER, latest_at TEXT,
+            best_pr REAL, best_1rm REAL,
+            PRIMARY KEY (user_id, exercise_id)
+        ) WITHOUT ROWID""",
+        "CREATE INDEX IF NOT EXISTS idx_user_stats_user_exercise_updated ON user_stats (user_id, exercise_id, updated_at)",
+        # Assumes NEW.id is the highest id and dates are never NULL; migration 13 replaces this trigger
+        """CREATE TRIGGER IF NOT EXISTS trg_exercise_summary_insert AFTER INSERT ON user_stats BEGIN
+            INSERT INTO user_exercise_summary (user_id, exercise_id, entry_count, first_id, first_pr, first_at,
+                                               latest_id, latest_pr, latest_reps, latest_at, best_pr, best_1rm)
+            VALUES (NEW.user_id, NEW.exercise_id, 1, NEW.id, NEW.pr, NEW.updated_at,
+                    NEW.id, NEW.pr, NEW.reps, NEW.updated_at, NEW.pr, NEW.est_1rm)
+            ON CONFLICT (user_id, exercise_id) DO UPDATE SET
+                entry_count = entry_count + 1,
+                first_id = CASE WHEN excluded.first_at < first_at THEN excluded.first_id ELSE first_id END,
+                first_pr = CASE WHEN excluded.first_at < first_at THEN excluded.first_pr ELSE first_pr END,
+                first_at = CASE WHEN excluded.first_at < first_at THEN excluded.first_at ELSE first_at END,
+                previous_id = CASE WHEN excluded.latest_at >= latest_at THEN latest_id
+                                   WHEN previous_id IS NULL OR excluded.latest_at >= previous_at THEN excluded.latest_id
+                                   ELSE previous_id END,
+                previous_pr = CASE WHEN excluded.latest_at >= latest_at THEN latest_pr
+                                   WHEN previous_id IS NULL OR excluded.latest_at >= previous_at THEN excluded.latest_pr
+                                   ELSE previous_pr END,
+                previous_at = CASE WHEN excluded.latest_at >= latest_at THEN latest_at
+                                   WHEN previous_id IS NULL OR excluded.latest_at >= previous_at THEN excluded.latest_at
+                                   ELSE previous_at END,
+                latest_id = CASE WHEN excluded.latest_at >= latest_at THEN excluded.latest_id ELSE latest_id END,
+                latest_pr = CASE WHEN excluded.latest_at >= latest_at THEN excluded.latest_pr ELSE latest_pr END,
+                latest_reps = CASE WHEN excluded.latest_at >= latest_at THEN excluded.latest_reps ELSE latest_reps END,
+                latest_at = CASE WHEN excluded.latest_at >= latest_at THEN excluded.latest_at ELSE latest_at END,
+                best_pr = MAX(COALESCE(best_pr, excluded.best_pr), COALESCE(excluded.best_pr, best_pr)),
+                best_1rm = MAX(COALESCE(best_1rm, excluded.best_1rm), COALESCE(excluded.best_1rm, best_1rm));
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_exercise_summary_delete AFTER DELETE ON user_stats BEGIN
+            {_refresh_exercise_summary("OLD")}
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_exercise_summary_update
+            AFTER UPDATE OF user_id, exercise_id, pr, reps, updated_at ON user_stats BEGIN
+            {_refresh_exercise_summary("NEW")}
+        END""",
+        # Only when the row moved to another (user, exercise): the old key lost an entry
+        f"""CREATE TRIGGER IF NOT EXISTS trg_exercise_summary_move
+            AFTER UPDATE OF user_id, exercise_id ON user_stats
+            WHEN OLD.user_id IS NOT NEW.user_id OR OLD.exercise_id IS NOT NEW.exercise_id BEGIN
+            {_refresh_exercise_summary("OLD")}
+        END""",
+        "DELETE FROM user_exercise_summary",
+        f"INSERT INTO user_exercise_summary {EXERCISE_SUMMARY_SELECT.format(where='1')}",
+    ]),
+    (9, "Stored coach reports for the batch report job", [
+        # report is the build_report JSON for the user's data at data_version (user_data_version)
+        """CREATE TABLE IF NOT EXISTS coach_reports (
+            user_id INTEGER PRIMARY KEY, data_version INTEGER NOT NULL, report TEXT NOT NULL, generated_at TEXT
+        )""",
+        """CREATE TRIGGER IF NOT EXISTS trg_coach_reports_users_delete AFTER DELETE ON users BEGIN
+            DELETE FROM coach_reports WHERE user_id = OLD.id;
+        END""",
+    ]),
+    (10, "Global change sequence on user_data_version", [
+        # Every version bump also takes the next value of one global counter, so
+        # in-memory indexes (utils.leaderboard) can ask "which users changed since N?"
+        "ALTER TABLE user_data_version ADD COLUMN changed_seq INTEGER NOT NULL DEFAULT 0",
+        "UPDATE user_data_version SET changed_seq = user_id",
+        "CREATE INDEX IF NOT EXISTS idx_user_data_version_changed_seq ON user_data_version (changed_seq)",
+        """CREATE TRIGGER IF NOT EXISTS trg_change_seq_insert AFTER INSERT ON user_data_version BEGIN
+            UPDATE user_data_version SET changed_seq = (SELECT MAX(changed_seq) FROM user_data_version) + 1
+            WHERE user_id = NEW.user_id;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_change_seq_update AFTER UPDATE OF version ON user_data_version BEGIN
+            UPDATE user_data_version SET changed_seq = (SELECT MAX(changed_seq) FROM user_data_version) + 1
+            WHERE user_id = NEW.user_id;
+        END""",
+    ]),
+    (11, "Exercise catalog version", [
+        # One counter bumped on every catalog write, so in-memory copies of the
+        # exercises table (utils.catalog) know when to reload
+        "CREATE TABLE IF NOT EXISTS catalog_version (id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER NOT NULL)",
+        "INSERT OR IGNORE INTO catalog_version (id, version) VALUES (1, 1)",
+        """CREATE TRIGGER IF NOT EXISTS trg_catalog_version_insert AFTER INSERT ON exercises BEGIN
+            UPDATE catalog_version SET version = version + 1;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_catalog_version_update AFTER UPDATE ON exercises BEGIN
+            UPDATE catalog_version SET version = version + 1;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_catalog_version_delete AFTER DELETE ON exercises BEGIN
+            UPDATE catalog_version SET version = version + 1;
+        END""",
+    ]),
+    (12, "Program changes bump the user's data version", [
+        # The dashboard's exercise list comes from user_exercises; clients key their caches on the version
+        """CREATE TRIGGER IF NOT EXISTS trg_version_program_insert AFTER INSERT ON user_exercises BEGIN
+            INSERT INTO user_data_version (user_id, version) VALUES (NEW.user_id, 1) ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_version_program_delete AFTER DELETE ON user_exercises BEGIN
+            INSERT INTO user_data_version (user_id, version) VALUES (OLD.user_id, 1) ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+        END""",
+    ]),
+    (13, "Summary insert trigger ordered by (updated_at, id) with NULL dates first", [
+        # Migration 8's trigger compared dates only: a NULL date or a row whose id is not the
+        # highest of its key (imported ids) misplaced first/previous/latest. Same O(1) update,
+        # compared on the full sort key of EXERCISE_SUMMARY_SELECT.
+        "DROP TRIGGER IF EXISTS trg_exercise_summary_insert",
+        f"""CREATE TRIGGER trg_exercise_summary_insert AFTER INSERT ON user_stats BEGIN
+            INSERT INTO user_exercise_summary (user_id, exercise_id, entry_count, first_id, first_pr, first_at,
+                                               latest_id, latest_pr, latest_reps, latest_at, best_pr, best_1rm)
+            VALUES (NEW.user_id, NEW.exercise_id, 1, NEW.id, NEW.pr, NEW.updated_at,
+                    NEW.id, NEW.pr, NEW.reps, NEW.updated_at, NEW.pr, NEW.est_1rm)
+            ON CONFLICT (user_id, exercise_id) DO UPDATE SET
+                entry_count = entry_count + 1,
+                first_id = CASE WHEN {_NEW_IS_FIRST} THEN excluded.first_id ELSE first_id END,
+                first_pr = CASE WHEN {_NEW_IS_FIRST} THEN excluded.first_pr ELSE first_pr END,
+                first_at = CASE WHEN {_NEW_IS_FIRST} THEN excluded.first_at ELSE first_at END,
+                previous_id = CASE WHEN {_NEW_IS_LATEST} THEN latest_id
+                                   WHEN {_NEW_IS_PREVIOUS} THEN excluded.latest_id ELSE previous_id END,
+                previous_pr = CASE WHEN {_NEW_IS_LATEST} THEN latest_pr
+                                   WHEN {_NEW_IS_PREVIOUS} THEN excluded.latest_pr ELSE previous_pr END,
+                previous_at = CASE WHEN {_NEW_IS_LATEST} THEN latest_at
+                                   WHEN {_NEW_IS_PREVIOUS} THEN excluded.latest_at ELSE previous_at END,
+                latest_id = CASE WHEN {_NEW_IS_LATEST} THEN excluded.latest_id ELSE latest_id END,
+                latest_pr = CASE WHEN {_NEW_IS_LATEST} THEN excluded.latest_pr ELSE latest_pr END,
+                latest_reps = CASE WHEN {_NEW_IS_LATEST} THEN excluded.latest_reps ELSE latest_reps END,
+                latest_at = CASE WHEN {_NEW_IS_LATEST} THEN excluded.latest_at ELSE latest_at END,
+                best_pr = MAX(COALESCE(best_pr, excluded.best_pr), COALESCE(excluded.best_pr, best_pr)),
+                best_1rm = MAX(COALESCE(best_1rm, excluded.best_1rm), COALESCE(excluded.best_1rm, best_1rm));
+        END""",
+        # Repair summaries the old trigger got wrong
+        "DELETE FROM user_exercise_summary",
+        f"INSERT INTO user_exercise_summary {EXERCISE_SUMMARY_SELECT.format(where='1')}",
+    ]),
+    (14, "Deleting an exercise bumps the data version of the users who have it", [
+        # Dashboards and coach reports show exercise names from the catalog but are cached on the user's version
+        """CREATE TRIGGER IF NOT EXISTS trg_version_exercise_delete AFTER DELETE ON exercises BEGIN
+            INSERT INTO user_data_version (user_id, version)
+            SELECT user_id, 1 FROM (SELECT user_id FROM user_exercises WHERE exercise_id = OLD.id
+                                    UNION SELECT user_id FROM user_stats WHERE exercise_id = OLD.id) WHERE true
+            ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+        END""",
+    ]),
+]
@@ -0,0 +1,110 @@
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from utils.coach import build_report, TREND_WINDOW
+from utils.database import DatabaseManager
+
+# Set in every worker process by _init_worker
+_worker_db = None
+
+def _init_worker(db_path):
+    global _worker_db
+    _worker_db = DatabaseManager(db_path, csv_dir=None, pool_size=1)
+
+def _build_chunk(chunk, history):
+    """Worker: loads the inputs of a chunk of (user_id, data_version) pairs at once and builds every report."""
+    inputs = _worker_db.get_coach_inputs_batch([user_id for user_id, _ in chunk], history=history)
+    reports, failed = [], []
+    for user_id, version in chunk:
+        if user_id not in inputs:
+            continue  # deleted since it was queued
+        profile, stats_df, nutri_df, summary_df = inputs[user_id]
+        try:
+            report = build_report(stats_df, nutri_df, profile["weight"], profile["age"], profile["goal"], summary_df)
+        except Exception as e:
+            failed.append((user_id, str(e)))
+            continue
+        reports.append((user_id, version, report))
+    return reports, failed
+
+class CoachReportJob:
+    """
+    Builds every user's coach report into coach_reports (served by GET /coach/{user_id}).
+    - Users are streamed in id order, `chunk_size` at a time, and the chunks are
+      spread over a ProcessPoolExecutor of `workers` processes
+    - Each worker loads its chunk's inputs with get_coach_inputs_batch and runs
+      build_report; the parent (the only writer) upserts each chunk in one transaction
+    - A report is stored with the user's data version, so users whose report is
+      still current are skipped: an interrupted run resumes where it stopped and
+      a nightly run only rebuilds users who logged something (force=True rebuilds all)
+    """
+
+    def __init__(self, db, workers=None, chunk_size=200, history=TREND_WINDOW, progress=print):
+        self.db = db
+        self.workers = workers or multiprocessing.cpu_count()
+        self.chunk_size = chunk_size
+        self.history = history
+        self.progress = progress
+
+    def _pending_filter(self, force):
+        return "" if force else "AND (r.user_id IS NULL OR r.data_version != COALESCE(v.version, 0))"
+
+    def count_pending(self, force=False):
+        with self.db.get_connection() as conn:
+            return conn.execute(f"""
+                SELECT COUNT(*) FROM users u
+                LEFT JOIN user_data_version v ON v.user_id = u.id
+                LEFT JOIN coach_reports r ON r.user_id = u.id
+                WHERE 1 {self._pending_filter(force)}
+            """).fetchone()[0]
+
+    def iter_chunks(self, force=False):
+        """Yields lists of (user_id, data_version) needing a report; keyset pages, so no cursor stays open."""
+        after = 0
+        while True:
+            with self.db.get_connection() as conn:
+                chunk = conn.execute(f"""
+                    SELECT u.id, COALESCE(v.version, 0) FROM users u
+                    LEFT JOIN user_data_version v ON v.user_id = u.id
+                    LEFT JOIN coach_reports r ON r.user_id = u.id
+                    WHERE u.id > ? {self._pending_filter(force)}
+                    ORDER BY u.id LIMIT ?
+                """, (after, self.chunk_size)).fetchall()
+            if not chunk:
+                return
+            yield chunk
+            after = chunk[-1][0]
+
+    def run(self, force=False):
+        """Builds the pending reports. Returns a summary dict (pending/written/failed/users_per_sec/errors)."""
+        total = self.count_pending(force)
+        if not total:
+            self.progress("All coach reports are current")
+            return {"pending": 0, "written": 0, "failed": 0, "users_per_sec": 0.0, "errors": []}
+        self.progress(f"Building {total} coach report(s) with {self.workers} worker(s)")
+
+        chunks = self.iter_chunks(force)
+        written, errors = 0, []
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker, initargs=(self.db.db_path,)) as pool:
+            # Two chunks in flight per worker keeps them busy without queueing the whole table
+            in_flight = set()
+            for chunk in chunks:
+                in_flight.add(pool.submit(_build_chunk, chunk, self.history))
+                if len(in_flight) >= 2 * self.workers:
+                    break
+            while in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    reports, failed = future.result()
+                    self.db.save_coach_reports(reports)
+                    written += len(reports)
+                    errors.extend(failed)
+                    chunk = next(chunks, None)
+                    if chunk is not None:
+                        in_flight.add(pool.submit(_build_chunk, chunk, self.history))
+                rate = (written + len(errors)) / (time.perf_counter() - start)
+                self.progress(f"coach reports: {written + len(errors)}/{total} users, {len(errors)} failed ({rate:,.0f} users/s)")
+        rate = (written + len(errors)) / (time.perf_counter() - start)
+        return {"pending": total, "written": written, "failed": len(errors), "users_per_sec": round(rate, 1), "errors": errors}
@@ -1,16 +1,111 @@
+import json
+import os
+import threading
+import time
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+
+FALLBACK_TIPS = ["Focus on form over weight.", "Consistency beats intensity."]
 
 class FitnessScraper:
-    def __init__(self):
-        self.url = "https://www.muscleandfitness.com/workout-routines/"
+    """
+    Cached fitness headlines.
+    - get_latest_articles() never touches the network: it serves the cached
+      headlines (or FALLBACK_TIPS) and, when they are older than `ttl`,
+      schedules a background refresh (stale-while-revalidate)
+    - Refreshes are conditional (ETag / If-Modified-Since) and parse only
+      the <h3> elements
+    - The cache is persisted to `cache_path`, so a restart serves the last
+      headlines immediately
+    - start() adds a daemon thread refreshing every `refresh_interval` seconds
+    """
+
+    def __init__(self, url=None, cache_path="data/news_cache.json", ttl=1800, refresh_interval=1800, timeout=5, retry_after=60):
+        self.url = url or os.getenv("NEWS_URL", "https://www.muscleandfitness.com/workout-routines/")
         self.headers = {"User-Agent": "Mozilla/5.0"}
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.refresh_interval = refresh_interval
+        self.timeout = timeout
+        self.retry_after = retry_after  # back-off between attempts while the site is failing
+        self._last_attempt = 0.0
+        self.session = requests.Session()
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._thread = None
+        self._cache = {"articles": [], "fetched_at": 0.0, "etag": None, "last_modified": None}
+        self._load()
 
-    def get_latest_articles(self):
+    def _load(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                self._cache.update(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"News cache unreadable, starting empty: {e}")
+
+    def _save(self):
+        if not self.cache_path:
+            return
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        tmp_path = self.cache_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._cache, f)
+        os.replace(tmp_path, self.cache_path)
+
+    @staticmethod
+    def parse(html):
+        soup = BeautifulSoup(html, 'html.parser', parse_only=SoupStrainer('h3'))
+        articles = soup.find_all('h3', limit=5)
+        return [a.get_text().strip() for a in articles if len(a.get_text()) > 5]
+
+    def refresh(self):
+        """Fetches the page if it changed since the last fetch; returns the current headlines."""
+        headers = dict(self.headers)
+        if self._cache["etag"]:
+            headers["If-None-Match"] = self._cache["etag"]
+        if self._cache["last_modified"]:
+            headers["If-Modified-Since"] = self._cache["last_modified"]
         try:
-            res = requests.get(self.url, headers=self.headers, timeout=5)
-            soup = BeautifulSoup(res.text, 'html.parser')
-            articles = soup.find_all('h3', limit=5)
-            return [a.get_text().strip() for a in articles if len(a.get_text()) > 5]
-        except:
-            return ["Focus on form over weight.", "Consistency beats intensity."]
\ No newline at end of file
+            res = self.session.get(self.url, headers=headers, timeout=self.timeout)
+            with self._lock:
+                if res.status_code == 200:
+                    articles = self.parse(res.text)
+                    if articles:
+                        self._cache["articles"] = articles
+                    self._cache["etag"] = res.headers.get("ETag")
+                    self._cache["last_modified"] = res.headers.get("Last-Modified")
+                if res.status_code in (200, 304):
+                    self._cache["fetched_at"] = time.time()
+                    self._save()
+        except Exception as e:
+            print(f"News refresh failed: {e}")
+        finally:
+            self._refreshing = False
+        return self._cache["articles"] or list(FALLBACK_TIPS)
+
+    def _refresh_async(self):
+        with self._lock:
+            if self._refreshing or time.time() - self._last_attempt < self.retry_after:
+                return
+            self._refreshing = True
+            self._last_attempt = time.time()
+        threading.Thread(target=self.refresh, daemon=True).start()
+
+    def get_latest_articles(self):
+        if time.time() - self._cache["fetched_at"] > self.ttl:
+            self._refresh_async()
+        return self._cache["articles"] or list(FALLBACK_TIPS)
+
+    def start(self):
+        """Starts the periodic background refresh (idempotent)."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            self._refresh_async()
+            time.sleep(self.refresh_interval)
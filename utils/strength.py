@@ -0,0 +1,40 @@
+import numpy as np
+
+# Reps above this make every formula meaningless (Brzycki divides by zero at 37)
+MAX_REPS = 36
+
+# One-rep-max estimators; w and r are float arrays
+FORMULAS = {
+    "brzycki": lambda w, r: w * (36 / (37 - r)),
+    "epley": lambda w, r: w * (1 + r / 30),
+    "lombardi": lambda w, r: w * r ** 0.10,
+    "lander": lambda w, r: 100 * w / (101.3 - 2.67123 * r),
+    "mayhew": lambda w, r: 100 * w / (52.2 + 41.9 * np.exp(-0.055 * r)),
+    "oconner": lambda w, r: w * (1 + 0.025 * r),
+    "wathan": lambda w, r: 100 * w / (48.8 + 53.8 * np.exp(-0.075 * r)),
+}
+
+# Percent-of-1RM training zones, as shown by the Calculators tab
+TRAINING_ZONES = {"Strength (85%)": 0.85, "Hypertrophy (75%)": 0.75, "Endurance (60%)": 0.60}
+
+def estimate_1rm(weight, reps, formula="brzycki"):
+    """
+    Estimated 1RM for arrays of (weight, reps) in one NumPy pass.
+    - A single rep is the 1RM itself
+    - Rows with reps outside 1..MAX_REPS come back as NaN
+    Raises ValueError for an unknown formula.
+    """
+    if formula not in FORMULAS:
+        raise ValueError(f"Unknown formula '{formula}'. Choose from: {', '.join(FORMULAS)}")
+    w = np.asarray(weight, dtype=float)
+    r = np.asarray(reps, dtype=float)
+    valid = (r >= 1) & (r <= MAX_REPS)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        est = np.where(r == 1, w, FORMULAS[formula](w, r))
+    return np.where(valid, est, np.nan)
+
+def training_zones(one_rm):
+    """{zone: array of loads} for an array of 1RMs, rounded to 0.1 kg."""
+    one_rm = np.asarray(one_rm, dtype=float)
+    loads = np.round(np.multiply.outer(one_rm, list(TRAINING_ZONES.values())), 1)
+    return {zone: loads[..., i] for i, zone in enumerate(TRAINING_ZONES)}
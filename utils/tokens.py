@@ -0,0 +1,74 @@
+import base64
+import hashlib
+import hmac
+import json
+import secrets
+import threading
+import time
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+class TokenManager:
+    """
+    Stateless signed session tokens (`<payload>.<signature>`, HMAC-SHA256).
+    - verify() needs no database lookup: signature, expiry and a small
+      in-memory revocation set are all it checks
+    - revoke_user() invalidates every token a user was issued so far (role
+      change, deletion); like revoke(), it only covers this process
+    - Without an explicit secret a random one is generated, so tokens do not
+      survive a restart; set one to share tokens between workers
+    """
+
+    def __init__(self, secret=None, ttl=86400):
+        self.secret = secret.encode() if secret else secrets.token_bytes(32)
+        self.ttl = ttl
+        self._revoked = {}  # jti -> expiry, kept only until the token would expire anyway
+        self._user_cutoffs = {}  # uid -> time; tokens issued at or before it are rejected, kept for one ttl
+        self._lock = threading.Lock()
+
+    def _sign(self, payload: str) -> str:
+        return _b64encode(hmac.new(self.secret, payload.encode(), hashlib.sha256).digest())
+
+    def issue(self, user_id, is_admin=0) -> str:
+        now = time.time()
+        claims = {"uid": user_id, "adm": int(is_admin), "iat": now, "exp": int(now) + self.ttl, "jti": secrets.token_hex(8)}
+        payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode())
+        return f"{payload}.{self._sign(payload)}"
+
+    def verify(self, token):
+        """Returns the token's claims, or None if it is malformed, forged, expired or revoked."""
+        try:
+            payload, signature = token.split(".")
+            # Bytes: compare_digest rejects non-ASCII str with TypeError
+            if not hmac.compare_digest(signature.encode(), self._sign(payload).encode()):
+                return None
+            claims = json.loads(_b64decode(payload))
+        except (AttributeError, ValueError):
+            return None
+        if claims["exp"] < time.time() or claims["jti"] in self._revoked:
+            return None
+        cutoff = self._user_cutoffs.get(claims["uid"])
+        if cutoff is not None and claims.get("iat", 0) <= cutoff:
+            return None
+        return claims
+
+    def revoke(self, token) -> bool:
+        claims = self.verify(token)
+        if claims is None:
+            return False
+        now = time.time()
+        with self._lock:
+            self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp >= now}
+            self._revoked[claims["jti"]] = claims["exp"]
+        return True
+
+    def revoke_user(self, user_id):
+        """Rejects every token issued to `user_id` up to now; tokens issued afterwards are valid."""
+        now = time.time()
+        with self._lock:
+            self._user_cutoffs = {uid: at for uid, at in self._user_cutoffs.items() if at + self.ttl >= now}
+            self._user_cutoffs[user_id] = now